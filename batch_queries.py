@@ -0,0 +1,313 @@
+from model.facility import Facility
+from model.package import Package
+from model.statustimeline import StatusTimeline
+from model.truck import Truck
+from user_interface import UserInterface
+import csv
+import datetime
+import io
+import json
+
+
+class BatchQueries:
+    """A class used to answer queries against a planned facility without the interactive menu, for scripts and
+    scheduled jobs. Each query is one line of text:
+        1) lookup <package ID>: a package's details and truck
+        2) status <package ID> <HH:mm AM/PM>: a package's status at a time
+        3) statuses <HH:mm AM/PM>: the status of every package on a truck at a time, one record each
+        4) mileage: the miles driven by each truck, then the total
+    Blank lines and lines starting with '#' are skipped. A query that cannot be answered produces a record with an
+    error rather than stopping the run. Records are written as JSON lines or CSV rows to one output stream. The plan
+    does not change during a run, so the rendered text of each distinct query is kept, and a repeated query costs one
+    dictionary lookup and one buffered write.
+
+    **Class Attributes**
+        *JSONL*, *CSV* (str):
+            The output formats.
+        *FIELDS* ([str]):
+            The fields a record may have, in CSV column order.
+        *BUFFER_SIZE* (int):
+            The write buffer size, in bytes, for output files.
+
+    **Instance Attributes**
+        *facility* (Facility):
+            The planned facility the queries are answered from.
+        *output_format* (str):
+            JSONL or CSV.
+
+    **Methods**
+        *__init__* (facility (Facility), output_format (str, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *run* (lines (iterable of str), output (text stream)) -> int
+            - TIME: O(f(x))= q, plus n for each distinct statuses query
+            - SPACE: O(f(x))= d, for the output of d distinct queries
+        *answer* (line (str)) -> [dict]
+            - TIME: O(f(x))= 1, or n for a statuses or mileage query
+            - SPACE: O(f(x))= 1, or n for a statuses or mileage query
+    """
+
+    JSONL: str = "jsonl"
+    CSV: str = "csv"
+    FIELDS: [str] = ["query", "package_id", "time", "truck", "address", "city", "zipcode", "deadline", "weight", "note",
+                     "status", "delivery_time", "miles", "error"]
+    BUFFER_SIZE: int = 1 << 20
+
+    def __init__(self, facility: Facility, output_format: str = JSONL) -> None:
+        """*__init__*
+            Creates a query runner over a planned facility.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param facility: (Facility) The planned facility
+        :param output_format: (str, optional) JSONL or CSV
+        :return: None
+        """
+        if output_format not in (BatchQueries.JSONL, BatchQueries.CSV):
+            raise ValueError(f"Unknown output format {output_format!r}")
+        self.facility = facility
+        self.output_format = output_format
+        self._truck_numbers = {id(truck): number for number, truck in enumerate(facility.all_trucks, 1)}
+        self._times = {}
+        self._time_strings = {}
+        self._rendered = {}
+        self._csv_buffer = io.StringIO()
+        self._csv_writer = csv.DictWriter(self._csv_buffer, BatchQueries.FIELDS, lineterminator="\n")
+        self._encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def run(self, lines, output) -> int:
+        """*run*
+            Answers every query and writes the records to output. Nothing is flushed until the end, so the stream's
+            buffer decides how often the output is written.
+
+            TIME: O(f(x))= q, for q queries, plus n for each distinct statuses query
+
+            SPACE: O(f(x))= d, for the output of d distinct queries
+
+        :param lines: (iterable of str) The queries, one per line
+        :param output: (text stream) Where the records are written
+        :return: (int) The number of records written
+        """
+        record_count = 0
+        rendered = self._rendered
+        write = output.write
+        if self.output_format == BatchQueries.CSV:
+            write(",".join(BatchQueries.FIELDS) + "\n")
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = rendered.get(line)
+            if entry is None:
+                records = self.answer(line)
+                entry = rendered[line] = (self._render(records), len(records))
+            write(entry[0])
+            record_count += entry[1]
+        output.flush()
+        return record_count
+
+    def _render(self, records: [dict]) -> str:
+        """*_render*
+            Formats records as JSON lines or CSV rows.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param records: ([dict]) The records
+        :return: (str) The formatted records, each ending with a newline
+        """
+        if self.output_format == BatchQueries.JSONL:
+            return "".join([self._encode(record) + "\n" for record in records])
+        self._csv_buffer.seek(0)
+        self._csv_buffer.truncate()
+        self._csv_writer.writerows(records)
+        return self._csv_buffer.getvalue()
+
+    def answer(self, line: str) -> [dict]:
+        """*answer*
+            Answers one query.
+
+            TIME: O(f(x))= 1, or n for a statuses or mileage query
+
+            SPACE: O(f(x))= 1, or n for a statuses or mileage query
+
+        :param line: (str) The query
+        :return: ([dict]) The records answering it
+        """
+        words = line.split(maxsplit=2)
+        query = words[0].lower()
+        if query == "lookup" and len(words) == 2:
+            return [self._lookup(words[1])]
+        if query == "status" and len(words) == 3:
+            return [self._status(words[1], words[2])]
+        if query == "statuses" and len(words) >= 2:
+            return self._statuses(line.split(maxsplit=1)[1])
+        if query == "mileage" and len(words) == 1:
+            return self._mileage()
+        return [{"query": line, "error": "unknown query"}]
+
+    def _parse_time(self, string_time: str) -> datetime.datetime or None:
+        """*_parse_time*
+            Parses a query time once, so repeated times share one datetime and one cached set of statuses.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param string_time: (str) The time in the format HH:mm AM/PM
+        :return: (datetime or None) The time, or None if it is not formatted properly
+        """
+        key = string_time.lower()
+        if key not in self._times:
+            self._times[key] = UserInterface.string_to_datetime(key)
+        return self._times[key]
+
+    def _time_string(self, time: datetime.datetime) -> str:
+        """*_time_string*
+            Formats a time the way the menu does, formatting each distinct time once.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param time: (datetime) The time to format
+        :return: (str) The formatted time
+        """
+        time_string = self._time_strings.get(time)
+        if time_string is None:
+            time_string = self._time_strings[time] = UserInterface.datetime_to_string(time)
+        return time_string
+
+    def _package_record(self, query: str, package_id: str) -> (dict, Package or None, Truck or None):
+        """*_package_record*
+            Starts the record of a query about one package.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param query: (str) The kind of query
+        :param package_id: (str) The package ID as written in the query
+        :return: ((dict, Package or None, Truck or None)) The record, the package and its truck, or None for both with
+            an error in the record if the package is not on a truck
+        """
+        record = {"query": query, "package_id": package_id}
+        if not UserInterface.is_integer(package_id):
+            record["error"] = "invalid package ID"
+            return record, None, None
+        record["package_id"] = int(package_id)
+        entry = self.facility.find_package(record["package_id"])
+        if entry is None or entry[1] is None:
+            record["error"] = "package not on a truck"
+            return record, None, None
+        return record, entry[0], entry[1]
+
+    def _lookup(self, package_id: str) -> dict:
+        """*_lookup*
+            Answers a lookup query.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (str) The package ID as written in the query
+        :return: (dict) The record
+        """
+        record, package, truck = self._package_record("lookup", package_id)
+        if package is None:
+            return record
+        record["truck"] = self._truck_numbers[id(truck)]
+        record["address"] = package.address
+        record["city"] = package.city
+        record["zipcode"] = package.zipcode
+        record["deadline"] = self._time_string(package.deadline)
+        record["weight"] = package.weight
+        record["note"] = package.note
+        return record
+
+    def _status(self, package_id: str, string_time: str) -> dict:
+        """*_status*
+            Answers a status query.
+
+            TIME: O(f(x))= log n
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (str) The package ID as written in the query
+        :param string_time: (str) The time as written in the query
+        :return: (dict) The record
+        """
+        record, package, truck = self._package_record("status", package_id)
+        record["time"] = string_time
+        if package is None:
+            # The package error comes first, so a malformed ID is reported even when the time is malformed too
+            return record
+        at_time = self._parse_time(string_time)
+        if at_time is None:
+            record["error"] = "invalid time"
+            return record
+        status = self.facility.status_timeline().status(package.package_id, at_time)
+        return self._fill_status(record, package, truck, status)
+
+    def _statuses(self, string_time: str) -> [dict]:
+        """*_statuses*
+            Answers a statuses query, in order of package ID.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param string_time: (str) The time as written in the query
+        :return: ([dict]) One record per package on a truck
+        """
+        at_time = self._parse_time(string_time)
+        if at_time is None:
+            return [{"query": "statuses", "time": string_time, "error": "invalid time"}]
+        statuses = self.facility.status_timeline().statuses(at_time)
+        records = []
+        for package_id in self.facility.package_ids:
+            package, truck = self.facility.find_package(package_id)
+            if truck is not None:
+                records.append(self._fill_status({"query": "statuses", "package_id": package_id, "time": string_time},
+                                                 package, truck, statuses[package_id]))
+        return records
+
+    def _fill_status(self, record: dict, package: Package, truck: Truck, status: str) -> dict:
+        """*_fill_status*
+            Adds a package's status and delivery time to a record.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param record: (dict) The record
+        :param package: (Package) The package
+        :param truck: (Truck) The truck the package is on
+        :param status: (str) The package's status at the record's time
+        :return: (dict) The record
+        """
+        record["truck"] = self._truck_numbers[id(truck)]
+        record["deadline"] = self._time_string(package.deadline)
+        record["status"] = status
+        if status == StatusTimeline.DELIVERED:
+            record["delivery_time"] = self._time_string(package.delivery_time_stamp)
+        return record
+
+    def _mileage(self) -> [dict]:
+        """*_mileage*
+            Answers a mileage query.
+
+            TIME: O(f(x))= t
+
+            SPACE: O(f(x))= t
+
+        :return: ([dict]) One record per truck, then one for the total with no truck
+        """
+        records = [{"query": "mileage", "truck": number, "miles": round(truck.miles_traveled, 2)}
+                   for number, truck in enumerate(self.facility.all_trucks, 1)]
+        records.append({"query": "mileage", "miles": round(sum(truck.miles_traveled
+                                                                for truck in self.facility.all_trucks), 2)})
+        return records
@@ -0,0 +1,68 @@
+"""Compares improving one long route as a whole with RouteImprover against RouteDecomposer, which improves it cluster
+by cluster, first in this process and then across worker processes. Each route visits every location of a random
+matrix, starting from its nearest neighbor tour, with no deadlines. Run from the repository root:
+
+    python -m benchmarks.bench_decomposition [--stops N ...] [--time-budget S] [--workers W]
+
+The whole-route search builds a sorted neighbor list for every stop before its first move, which is what grows with
+the square of the route; the time budget only bounds the search after that.
+"""
+from benchmarks.generators import random_distance_matrix
+from dataStructures.neighborindex import NeighborIndex
+from model.routedecomposer import RouteDecomposer
+from model.routeimprover import RouteImprover
+import argparse
+import os
+import sys
+import time
+
+
+def greedy_route(index: NeighborIndex, stops: [int]) -> [int]:
+    tour = index.tour(stops)
+    current = 0
+    route = [0]
+    while len(tour) > 0:
+        current = tour.nearest(current)
+        tour.remove(current)
+        route.append(current)
+    route.append(0)
+    return route
+
+
+def timed(function, *arguments) -> ([int], float):
+    start = time.perf_counter()
+    result = function(*arguments)
+    return result, time.perf_counter() - start
+
+
+def main(argv: [str]) -> None:
+    parser = argparse.ArgumentParser(description="Time whole-route improvement against cluster decomposition.")
+    parser.add_argument("--stops", type=int, nargs="+", default=[500, 2000, 5000],
+                        help="route lengths to time (default: 500 2000 5000)")
+    parser.add_argument("--time-budget", type=float, default=2.0,
+                        help="seconds of local search per route (default: 2)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for the parallel run (default: one per CPU)")
+    arguments = parser.parse_args(argv)
+
+    print(f"{'stops':>6} | {'greedy mi':>9} | {'whole (s)':>9} | {'whole mi':>9} | {'1 worker (s)':>12} | "
+          f"{'1 worker mi':>11} | {f'{arguments.workers} workers (s)':>14} | {'workers mi':>10}")
+    for stops in arguments.stops:
+        matrix = random_distance_matrix(stops + 1, seed=stops)
+        route = greedy_route(NeighborIndex(matrix), list(range(1, stops + 1)))
+        improver = RouteImprover(matrix)
+        whole, whole_seconds = timed(improver.improve, route, None, arguments.time_budget)
+        serial, serial_seconds = timed(RouteDecomposer(matrix, 1).improve, route, None, arguments.time_budget)
+        parallel, parallel_seconds = timed(RouteDecomposer(matrix, arguments.workers).improve, route, None,
+                                           arguments.time_budget)
+        for improved in (whole, serial, parallel):
+            if sorted(improved) != sorted(route):
+                raise AssertionError("an improved route did not visit the same stops")
+        print(f"{stops:>6} | {improver.route_length(route):>9.1f} | {whole_seconds:>9.2f} | "
+              f"{improver.route_length(whole):>9.1f} | {serial_seconds:>12.2f} | "
+              f"{improver.route_length(serial):>11.1f} | {parallel_seconds:>14.2f} | "
+              f"{improver.route_length(parallel):>10.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
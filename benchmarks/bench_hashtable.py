@@ -0,0 +1,71 @@
+"""Times the open addressing HashTable against the original fixed-size ChainingHashTable and the builtin dict. The
+chaining table is created the way Truck and Facility sized it, for a fixed guess of 40 items, so larger runs show what
+happens when more items are pushed through than the constructor expected. Run from the repository root:
+
+    python -m benchmarks.bench_hashtable [sizes ...]
+"""
+from dataStructures.chaininghashtable import ChainingHashTable
+from dataStructures.hashtable import HashTable
+import argparse
+import sys
+import time
+
+
+class DictTable:
+    """Adapts dict to the HashTable API so all three tables run the same workload."""
+
+    def __init__(self) -> None:
+        self.table = {}
+
+    def insert(self, key: int, value: object) -> None:
+        self.table[key] = value
+
+    def lookup(self, key: int) -> object:
+        return self.table.get(key)
+
+    def remove(self, key: int) -> bool:
+        return self.table.pop(key, None) is not None
+
+
+def run_workload(table, size: int) -> {str: float}:
+    timings = {}
+    start = time.perf_counter()
+    for key in range(size):
+        table.insert(key, key)
+    timings["insert"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in range(size):
+        table.lookup(key)
+    timings["lookup hit"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in range(size, size * 2):
+        table.lookup(key)
+    timings["lookup miss"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in range(size):
+        table.remove(key)
+    timings["remove"] = time.perf_counter() - start
+    return timings
+
+
+def main(argv: [str]) -> None:
+    parser = argparse.ArgumentParser(description="Time HashTable against ChainingHashTable and dict.")
+    parser.add_argument("sizes", type=int, nargs="*", default=[40, 1000, 20000],
+                        help="numbers of items to time (default: 40 1000 20000)")
+    arguments = parser.parse_args(argv)
+
+    tables = {
+        "ChainingHashTable(40)": lambda: ChainingHashTable(40),
+        "HashTable()": lambda: HashTable(),
+        "dict": DictTable,
+    }
+    print(f"{'items':>7} | {'table':<22} | {'insert':>9} | {'lookup hit':>10} | {'lookup miss':>11} | {'remove':>9}")
+    for size in arguments.sizes:
+        for name, factory in tables.items():
+            timings = run_workload(factory(), size)
+            print(f"{size:>7} | {name:<22} | {timings['insert']:>9.4f} | {timings['lookup hit']:>10.4f} | "
+                  f"{timings['lookup miss']:>11.4f} | {timings['remove']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,74 @@
+"""Compares a greedy nearest neighbor tour driven by a linear scan of the remaining stops against the same tour driven
+by NeighborIndex. Run from the repository root:
+
+    python -m benchmarks.bench_nearest_neighbor [sizes ...]
+
+The index is built once and then shared by every tour over the same chart, so two speedups are shown: per tour once
+the index is built, and for a single tour that has to pay for the build itself. The last column is the number of tours
+over the chart after which the build has paid for itself.
+"""
+from benchmarks.generators import random_distance_matrix
+from dataStructures.neighborindex import NeighborIndex
+import argparse
+import math
+import sys
+import time
+
+
+def scan_tour(matrix, targets: [int]) -> [int]:
+    remaining = list(targets)
+    current = 0
+    order = []
+    while remaining:
+        current = matrix.nearest(current, remaining)
+        remaining.remove(current)
+        order.append(current)
+    return order
+
+
+def indexed_tour(index: NeighborIndex, targets: [int]) -> [int]:
+    tour = index.tour(targets)
+    current = 0
+    order = []
+    while len(tour) > 0:
+        current = tour.nearest(current)
+        tour.remove(current)
+        order.append(current)
+    return order
+
+
+def main(argv: [str]) -> None:
+    parser = argparse.ArgumentParser(description="Time nearest neighbor tours by linear scan and by NeighborIndex.")
+    parser.add_argument("sizes", type=int, nargs="*", default=[100, 1000, 10000],
+                        help="numbers of stops to time (default: 100 1000 10000)")
+    arguments = parser.parse_args(argv)
+
+    print(f"{'stops':>7} | {'scan (s)':>10} | {'index build (s)':>15} | {'indexed (s)':>11} | "
+          f"{'per tour after build':>20} | {'one tour with build':>19} | {'break-even tours':>16}")
+    for size in arguments.sizes:
+        matrix = random_distance_matrix(size + 1, seed=size)
+        targets = list(range(1, size + 1))
+
+        start = time.perf_counter()
+        scan_order = scan_tour(matrix, targets)
+        scan_seconds = time.perf_counter() - start
+
+        index = NeighborIndex(matrix)
+        start = time.perf_counter()
+        index.build()
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed_order = indexed_tour(index, targets)
+        indexed_seconds = time.perf_counter() - start
+
+        if sorted(scan_order) != sorted(indexed_order):
+            raise AssertionError("the tours did not visit the same stops")
+        print(f"{size:>7} | {scan_seconds:>10.4f} | {build_seconds:>15.4f} | {indexed_seconds:>11.4f} | "
+              f"{scan_seconds / indexed_seconds:>19.1f}x | "
+              f"{scan_seconds / (build_seconds + indexed_seconds):>18.1f}x | "
+              f"{math.ceil(build_seconds / (scan_seconds - indexed_seconds)):>16}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+"""Measures the memory held by a manifest stored as a list of Package objects against the same manifest stored in a
+PackageStore. Rows are generated the way the CSV reader produces them: every row gets its own address, city and note
+strings, while deadlines are shared from a small set of parsed times. Run from the repository root:
+
+    python -m benchmarks.bench_package_memory [sizes ...]
+"""
+from model.package import Package
+from model.packagestore import PackageStore
+import argparse
+import datetime
+import random
+import sys
+import tracemalloc
+
+
+def generate_rows(count: int, seed: int = 0):
+    generator = random.Random(seed)
+    today = datetime.date.today()
+    deadlines = [datetime.datetime.combine(today, datetime.time(hour, minute))
+                 for hour, minute in ((9, 0), (10, 30), (12, 0), (23, 59))]
+    for package_id in range(1, count + 1):
+        street = generator.randrange(2000)
+        yield (package_id, "".join([str(street), " Synthetic St"]), "".join(["Salt Lake City"]),
+               84100 + generator.randrange(30), deadlines[generator.randrange(len(deadlines))],
+               float(generator.randrange(1, 90)), "".join(["" if generator.random() < 0.9 else "Delayed"]))
+
+
+def measure(build, count: int) -> (int, float):
+    tracemalloc.start()
+    held = build(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current, current / count
+
+
+def build_packages(count: int) -> [Package]:
+    packages = []
+    for row in generate_rows(count):
+        package = Package(*row)
+        package.delivery_time_stamp = row[4] - datetime.timedelta(minutes=row[0] % 60)
+        packages.append(package)
+    return packages
+
+
+def build_store(count: int) -> PackageStore:
+    store = PackageStore()
+    for row in generate_rows(count):
+        view = store.append(*row)
+        view.delivery_time_stamp = row[4] - datetime.timedelta(minutes=row[0] % 60)
+    return store
+
+
+def main(argv: [str]) -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure a manifest's memory as Package objects and as a PackageStore.")
+    parser.add_argument("sizes", type=int, nargs="*", default=[10000, 100000, 1000000],
+                        help="numbers of packages to measure (default: 10000 100000 1000000)")
+    arguments = parser.parse_args(argv)
+
+    print(f"{'packages':>9} | {'representation':<14} | {'total (MB)':>10} | {'bytes/package':>13}")
+    for size in arguments.sizes:
+        for name, build in (("[Package]", build_packages), ("PackageStore", build_store)):
+            total, per_package = measure(build, size)
+            print(f"{size:>9} | {name:<14} | {total / 1048576:>10.1f} | {per_package:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,181 @@
+"""Times each phase of planning a day on synthetic data: parsing the files into a Facility, the greedy pipeline's
+preload, loader and delivery, the insertion planner, and the fleet loader, plus HashTable inserts and lookups at the
+manifest's size. Manifests and charts are written by the seeded generators in benchmarks.generators, so a run can be
+repeated exactly. Trucks are added beyond the facility's three until every package fits, and the fleet phase plans
+for that many vehicles. The peak memory each phase allocates is traced with tracemalloc, which slows the phases down;
+pass --no-memory for clean timings. Run from the repository root:
+
+    python -m benchmarks.bench_planning [--locations N ...] [--packages-per-location R] [--json results.json]
+
+The distance chart is dense, so files and memory grow with the square of the locations: 2000 locations is a 4 million
+cell matrix. Sizes toward 50k locations need a machine with tens of gigabytes of memory.
+"""
+from benchmarks.generators import DEFAULT_DEADLINE_MIX, DEFAULT_NOTE_MIX, write_distance_chart, write_manifest
+from dataStructures.hashtable import HashTable
+from model.facility import Facility
+from model.fleet import VehicleType
+from model.truck import Truck
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PHASES = ["facility_init", "preload", "loader", "delivery", "plan", "fleet", "hashtable"]
+
+
+def parse_mix(text: str) -> {str: float}:
+    mix = {}
+    for item in text.split(","):
+        key, share = item.rsplit("=", 1)
+        mix[key.strip()] = float(share)
+    return mix
+
+
+class PhaseTimer:
+    def __init__(self, trace_memory: bool) -> None:
+        self.trace_memory = trace_memory
+        self.phases = {}
+
+    def run(self, name: str, function, *arguments):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = function(*arguments)
+        seconds = time.perf_counter() - start
+        phase = {"seconds": round(seconds, 6)}
+        if self.trace_memory:
+            phase["peak_bytes"] = tracemalloc.get_traced_memory()[1] - baseline
+        self.phases[name] = phase
+        return result
+
+
+def add_trucks(facility: Facility) -> None:
+    needed = math.ceil(len(facility.package_ids) / Truck.MAX_PACKAGES)
+    facility.all_trucks.extend(Truck() for _ in range(needed - len(facility.all_trucks)))
+
+
+def load_all(facility: Facility) -> None:
+    remaining = facility.unassigned_packages
+    for truck in facility.all_trucks:
+        if not remaining:
+            break
+        remaining = facility.loader(truck, remaining)
+
+
+def deliver_all(facility: Facility, time_budget: float) -> None:
+    for truck in facility.all_trucks:
+        if len(truck.package_list) > 0:
+            facility.delivery(truck, time_budget)
+
+
+def hashtable_round_trip(count: int) -> None:
+    table = HashTable()
+    for key in range(count):
+        table.insert(key, key)
+    for key in range(count):
+        table.lookup(key)
+
+
+def run_size(directory: str, locations: int, packages: int, seed: int, deadline_mix: {str: float},
+             note_mix: {str: float}, time_budget: float, trace_memory: bool) -> dict:
+    chart_path = os.path.join(directory, f"chart_{locations}_{seed}.csv")
+    manifest_path = os.path.join(directory, f"manifest_{packages}_{seed}.csv")
+    start = time.perf_counter()
+    addresses = write_distance_chart(chart_path, locations, seed)
+    write_manifest(manifest_path, packages, addresses, seed, deadline_mix, note_mix)
+    generate_seconds = time.perf_counter() - start
+
+    timer = PhaseTimer(trace_memory)
+    facility = timer.run("facility_init", Facility, manifest_path, chart_path, False)
+    add_trucks(facility)
+    timer.run("preload", facility.preload)
+    timer.run("loader", load_all, facility)
+    timer.run("delivery", deliver_all, facility, time_budget)
+    greedy_miles = sum(truck.miles_traveled for truck in facility.all_trucks)
+
+    # The insertion planner starts from an unplanned facility
+    facility = Facility(manifest_path, chart_path, False)
+    add_trucks(facility)
+    timer.run("plan", facility.plan, None, time_budget)
+    planned_miles = sum(truck.miles_traveled for truck in facility.all_trucks)
+    truck_count = len(facility.all_trucks)
+    unassigned_after_plan = len(facility.unassigned_packages)
+
+    # The fleet loader also starts from an unplanned facility, with one vehicle per truck the planner had
+    facility = Facility(manifest_path, chart_path, False)
+    timer.run("fleet", facility.plan_fleet, [VehicleType(truck_count)], None, time_budget)
+    fleet_miles = sum(truck.miles_traveled for truck in facility.all_trucks)
+    timer.run("hashtable", hashtable_round_trip, packages)
+    return {"locations": locations,
+            "packages": packages,
+            "trucks": truck_count,
+            "seed": seed,
+            "generate_seconds": round(generate_seconds, 6),
+            "phases": timer.phases,
+            "greedy_miles": round(greedy_miles, 2),
+            "planned_miles": round(planned_miles, 2),
+            "unassigned_after_plan": unassigned_after_plan,
+            "fleet_waves": len(facility.all_trucks),
+            "fleet_miles": round(fleet_miles, 2),
+            "unassigned_after_fleet": len(facility.unassigned_packages)}
+
+
+def main(argv: [str]) -> None:
+    parser = argparse.ArgumentParser(description="Time each planning phase on seeded synthetic data.")
+    parser.add_argument("--locations", type=int, nargs="+", default=[100, 500, 2000],
+                        help="chart sizes, including the hub (default: 100 500 2000)")
+    parser.add_argument("--packages-per-location", type=float, default=1.5,
+                        help="packages in each manifest per chart location (default: 1.5)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generators (default: 0)")
+    parser.add_argument("--deadlines", type=parse_mix, default=DEFAULT_DEADLINE_MIX,
+                        help="deadline mix as 'TIME=share,...', e.g. '10:30 AM=0.3,EOD=0.7'")
+    parser.add_argument("--notes", type=parse_mix, default=DEFAULT_NOTE_MIX,
+                        help="note mix as 'kind=share,...' over truck, delayed, together and wrong_address")
+    parser.add_argument("--time-budget", type=float, default=0.0,
+                        help="seconds of local search per route (default: 0, none)")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracing peak memory")
+    parser.add_argument("--json", metavar="FILE", default=None, help="also write the results as JSON to FILE")
+    arguments = parser.parse_args(argv)
+
+    trace_memory = not arguments.no_memory
+    if trace_memory:
+        tracemalloc.start()
+    results = []
+    print(f"{'locations':>9} | {'packages':>8} | " + " | ".join(f"{phase:>13}" for phase in PHASES)
+          + f" | {'peak (MB)':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for locations in arguments.locations:
+            packages = max(1, round(locations * arguments.packages_per_location))
+            result = run_size(directory, locations, packages, arguments.seed, arguments.deadlines, arguments.notes,
+                              arguments.time_budget, trace_memory)
+            results.append(result)
+            peak = max((phase.get("peak_bytes", 0) for phase in result["phases"].values()), default=0)
+            print(f"{locations:>9} | {packages:>8} | "
+                  + " | ".join(f"{result['phases'][phase]['seconds']:>12.4f}s" for phase in PHASES)
+                  + f" | {peak / 1048576:>9.1f}")
+    if trace_memory:
+        tracemalloc.stop()
+    if arguments.json is not None:
+        document = {"created": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "memory_traced": trace_memory,
+                    "settings": {"packages_per_location": arguments.packages_per_location,
+                                 "seed": arguments.seed,
+                                 "deadlines": arguments.deadlines,
+                                 "notes": arguments.notes,
+                                 "time_budget": arguments.time_budget},
+                    "results": results}
+        with open(arguments.json, "w") as json_file:
+            json.dump(document, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,89 @@
+"""Times closing distance charts over shortest paths. Dense charts, with some pairs inflated past a route through a
+third location and some left blank, are closed by Floyd-Warshall; sparse road graphs, with a few roads per location,
+by Dijkstra's algorithm from every location. Opening the cached result is timed as well, and the miles saved are
+reported as the mean shortening of the pairs that got shorter. Run from the repository root:
+
+    python -m benchmarks.bench_shortest_paths [--dense N ...] [--sparse N ...] [--degree D]
+
+Both algorithms are cubic in the worst case in pure Python: Floyd-Warshall takes about n^3 * 70 ns, and Dijkstra
+about n * m log n for m roads, so a 10,000 location road graph closes in minutes while a dense chart of that size
+would take hours. The closure is cached beside the chart, so this is paid once per chart.
+"""
+from array import array
+from benchmarks.generators import random_distance_matrix, random_road_matrix
+from dataStructures.distancematrix import DistanceMatrix
+from dataStructures.shortestpaths import ShortestPaths
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def non_metric_matrix(count: int, seed: int = 0, inflated: float = 0.1, blank: float = 0.05) -> DistanceMatrix:
+    generator = random.Random(seed)
+    metric = random_distance_matrix(count, seed)
+    values = array('f', metric.values)
+    for row in range(count):
+        for column in range(row + 1, count):
+            draw = generator.random()
+            if draw < blank:
+                distance = math.nan
+            elif draw < blank + inflated:
+                distance = values[row * count + column] * generator.uniform(1.2, 2.0)
+            else:
+                continue
+            values[row * count + column] = distance
+            values[column * count + row] = distance
+    return DistanceMatrix(metric.addresses, values)
+
+
+def run(kind: str, source: DistanceMatrix) -> None:
+    start = time.perf_counter()
+    shortest_paths = ShortestPaths.close(source)
+    close_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "chart.paths")
+        shortest_paths.save(path, source)
+        start = time.perf_counter()
+        cached = ShortestPaths.open(path, source)
+        open_seconds = time.perf_counter() - start
+        if cached is None or list(cached.distances.row(source.size - 1)) != list(shortest_paths.distances.row(
+                source.size - 1)):
+            raise AssertionError("the cached closure does not match")
+        del cached
+    shortened = 0
+    saved = 0.0
+    filled = 0
+    for row in range(source.size):
+        for given, closed in zip(source.row(row), shortest_paths.distances.row(row)):
+            if math.isnan(given):
+                filled += closed < DistanceMatrix.UNREACHABLE
+            elif closed < given - 1e-4:
+                shortened += 1
+                saved += given - closed
+    print(f"{kind:>6} | {source.size:>6} | {close_seconds:>9.2f} | {open_seconds * 1000:>9.1f} | {filled:>8} | "
+          f"{shortened:>9} | {saved / max(shortened, 1):>12.2f}")
+
+
+def main(argv: [str]) -> None:
+    parser = argparse.ArgumentParser(description="Time closing distance charts over shortest paths.")
+    parser.add_argument("--dense", type=int, nargs="*", default=[100, 200, 400],
+                        help="sizes of dense non-metric charts (default: 100 200 400)")
+    parser.add_argument("--sparse", type=int, nargs="*", default=[500, 1000, 2000],
+                        help="sizes of sparse road graphs (default: 500 1000 2000)")
+    parser.add_argument("--degree", type=int, default=4, help="roads per location in the sparse graphs (default: 4)")
+    arguments = parser.parse_args(argv)
+
+    print(f"{'chart':>6} | {'size':>6} | {'close (s)':>9} | {'open (ms)':>9} | {'filled':>8} | {'shortened':>9} | "
+          f"{'mean saved mi':>12}")
+    for size in arguments.dense:
+        run("dense", non_metric_matrix(size, seed=size))
+    for size in arguments.sparse:
+        run("sparse", random_road_matrix(size, arguments.degree, seed=size))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
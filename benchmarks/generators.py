@@ -0,0 +1,181 @@
+from array import array
+from dataStructures.distancematrix import DistanceMatrix
+import csv
+import math
+import random
+
+# The share of packages given each deadline, written the way PackageInfo.csv writes them
+DEFAULT_DEADLINE_MIX = {"9:00 AM": 0.05, "10:30 AM": 0.25, "EOD": 0.70}
+# The share of packages given each kind of special note; the rest have none
+DEFAULT_NOTE_MIX = {"truck": 0.03, "delayed": 0.05, "together": 0.03, "wrong_address": 0.01}
+
+
+def random_points(count: int, seed: int = 0, extent: float = 20.0) -> [(float, float)]:
+    """*random_points*
+        Scatters locations uniformly over a square service area, with the hub at the centre.
+
+        TIME: O(f(x))= n
+
+        SPACE: O(f(x))= n
+
+    :param count: (int) The number of locations, including the hub
+    :param seed: (int, optional) The seed for the random number generator
+    :param extent: (float, optional) The side length of the service area in miles
+    :return: ([(float, float)]) The coordinates of every location, hub first
+    """
+    generator = random.Random(seed)
+    points = [(extent / 2, extent / 2)]
+    for _ in range(count - 1):
+        points.append((generator.uniform(0, extent), generator.uniform(0, extent)))
+    return points
+
+
+def random_distance_matrix(count: int, seed: int = 0) -> DistanceMatrix:
+    """*random_distance_matrix*
+        Builds a metric distance matrix from straight-line distances between random locations.
+
+        TIME: O(f(x))= n^2
+
+        SPACE: O(f(x))= n^2
+
+    :param count: (int) The number of locations, including the hub
+    :param seed: (int, optional) The seed for the random number generator
+    :return: (DistanceMatrix) The matrix, with the hub at index 0
+    """
+    points = random_points(count, seed)
+    values = array('f')
+    for point in points:
+        values.extend([math.dist(point, other) for other in points])
+    addresses = ["HUB"] + [f"{index} Synthetic St" for index in range(1, count)]
+    return DistanceMatrix(addresses, values)
+
+
+def random_road_matrix(count: int, degree: int = 4, seed: int = 0, detour: float = 1.3) -> DistanceMatrix:
+    """*random_road_matrix*
+        Builds a sparse chart like a road graph: each location has roads to its nearest locations, each road up to
+        detour times longer than the straight line, and every other pair is left blank (NaN).
+
+        TIME: O(f(x))= n^2 log n
+
+        SPACE: O(f(x))= n^2
+
+    :param count: (int) The number of locations, including the hub
+    :param degree: (int, optional) The number of nearest locations each location has a road to
+    :param seed: (int, optional) The seed for the random number generator
+    :param detour: (float, optional) The most a road may be longer than the straight line, as a factor
+    :return: (DistanceMatrix) The matrix, with the hub at index 0
+    """
+    generator = random.Random(seed)
+    points = random_points(count, seed)
+    matrix = DistanceMatrix(synthetic_addresses(count))
+    for index, point in enumerate(points):
+        matrix.values[index * count + index] = 0.0
+        nearest = sorted(range(count), key=lambda other: math.dist(point, points[other]))[1:degree + 1]
+        for other in nearest:
+            road = math.dist(point, points[other]) * generator.uniform(1.0, detour)
+            matrix.values[index * count + other] = road
+            matrix.values[other * count + index] = road
+    return matrix
+
+
+def synthetic_addresses(count: int) -> [str]:
+    """*synthetic_addresses*
+        Names the locations of a synthetic chart. The hub is named HUB, like the first row of LocationDistanceChart.csv.
+
+        TIME: O(f(x))= n
+
+        SPACE: O(f(x))= n
+
+    :param count: (int) The number of locations, including the hub
+    :return: ([str]) The address of every location, hub first
+    """
+    return ["HUB"] + [f"{index} Synthetic St" for index in range(1, count)]
+
+
+def write_distance_chart(path: str, count: int, seed: int = 0) -> [str]:
+    """*write_distance_chart*
+        Writes a LocationDistanceChart style CSV of straight-line distances between random locations. Only the lower
+        triangle and the diagonal are written, as the real chart leaves the upper triangle blank, so the file holds
+        n^2 / 2 cells.
+
+        TIME: O(f(x))= n^2
+
+        SPACE: O(f(x))= n
+
+    :param path: (str) Where to write the chart
+    :param count: (int) The number of locations, including the hub
+    :param seed: (int, optional) The seed for the random number generator
+    :return: ([str]) The address of every location, hub first
+    """
+    points = random_points(count, seed)
+    addresses = synthetic_addresses(count)
+    with open(path, "w", newline="") as chart_file:
+        for row_index, point in enumerate(points):
+            cells = [f"{math.dist(point, other):.1f}" for other in points[:row_index]]
+            cells.append("0")
+            chart_file.write(addresses[row_index] + "," + ",".join(cells) + "\n")
+    return addresses
+
+
+def _pick(generator: random.Random, mix: {str: float}) -> str or None:
+    """*_pick*
+        Picks a key of a mix with probability equal to its share. Shares adding up to less than one leave a chance of
+        picking nothing.
+
+        TIME: O(f(x))= k, for k keys
+
+        SPACE: O(f(x))= 1
+
+    :param generator: (Random) The random number generator
+    :param mix: ({str: float}) The share of each key
+    :return: (str or None) The key picked, or None
+    """
+    draw = generator.random()
+    for key, share in mix.items():
+        if draw < share:
+            return key
+        draw -= share
+    return None
+
+
+def write_manifest(path: str, count: int, addresses: [str], seed: int = 0, deadline_mix: {str: float} = None,
+                   note_mix: {str: float} = None) -> None:
+    """*write_manifest*
+        Writes a PackageInfo style CSV manifest of packages to random addresses other than the hub. Deadlines and
+        special notes are drawn from the given mixes. Truck notes name the second truck, delays end at 9:05 am, and
+        a package to be delivered with others names up to two packages listed just before it.
+
+        TIME: O(f(x))= n
+
+        SPACE: O(f(x))= 1
+
+    :param path: (str) Where to write the manifest
+    :param count: (int) The number of packages
+    :param addresses: ([str]) The addresses of the chart the manifest is for, hub first
+    :param seed: (int, optional) The seed for the random number generator
+    :param deadline_mix: ({str: float}, optional) The share of packages given each deadline
+    :param note_mix: ({str: float}, optional) The share of packages given each kind of note: "truck", "delayed",
+        "together" and "wrong_address"
+    :return: None
+    """
+    generator = random.Random(seed)
+    deadline_mix = DEFAULT_DEADLINE_MIX if deadline_mix is None else deadline_mix
+    note_mix = DEFAULT_NOTE_MIX if note_mix is None else note_mix
+    with open(path, "w", newline="") as manifest_file:
+        # Notes such as "Must be delivered with 3, 4" hold commas, so the rows are quoted where needed
+        writer = csv.writer(manifest_file, lineterminator="\n")
+        for package_id in range(1, count + 1):
+            address = addresses[generator.randrange(1, len(addresses))]
+            deadline = _pick(generator, deadline_mix) or "EOD"
+            note_kind = _pick(generator, note_mix)
+            note = ""
+            if note_kind == "truck":
+                note = "Can only be on truck 2"
+            elif note_kind == "delayed":
+                note = "Delayed on flight---will not arrive to depot until 9:05 am"
+            elif note_kind == "together" and package_id > 2:
+                note = f"Must be delivered with {package_id - 2}, {package_id - 1}"
+            elif note_kind == "wrong_address":
+                note = "Wrong address listed"
+            writer.writerow([package_id, address, "Salt Lake City", "UT", 84100 + generator.randrange(30), deadline,
+                             generator.randrange(1, 90), note])
@@ -0,0 +1,111 @@
+"""Measures the planning service's throughput: a number of clients send plan requests over one connection each, with
+a given number in flight at a time, and the plans per minute and latency percentiles are printed, with the service's
+counters of computed, coalesced and kept plans. The manifests are seeded variants of the default manifest, each with
+the deadlines of some end-of-day packages moved earlier, so the share of repeated requests is set by --distinct.
+Start the service first, then run from the repository root:
+
+    python main.py --serve 8765 [--workers W]
+    python -m benchmarks.load_generator [--port 8765 | --socket PATH] [--clients C] [--requests N] [--distinct D]
+"""
+from model.facility import Facility
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+EARLY_DEADLINES = ["12:00 PM", "3:00 PM", "5:00 PM"]
+
+
+def manifest_variant(rows: [str], variant: int, share: float = 0.2) -> str:
+    generator = random.Random(variant)
+    lines = []
+    for row in rows:
+        fields = row.split(",")
+        if variant > 0 and fields[5] == "EOD" and generator.random() < share:
+            fields[5] = generator.choice(EARLY_DEADLINES)
+        lines.append(",".join(fields))
+    return "\n".join(lines) + "\n"
+
+
+async def client(connect, requests: [dict], in_flight: int, latencies: [float], failures: [str]) -> None:
+    reader, writer = await connect()
+    sent_at = {}
+    slots = asyncio.Semaphore(in_flight)
+
+    async def receive() -> None:
+        for _ in requests:
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent_at.pop(response["id"]))
+            if not response["ok"]:
+                failures.append(response["error"])
+            slots.release()
+
+    receiver = asyncio.create_task(receive())
+    for request in requests:
+        await slots.acquire()
+        sent_at[request["id"]] = time.perf_counter()
+        writer.write((json.dumps(request) + "\n").encode())
+        await writer.drain()
+    await receiver
+    writer.close()
+
+
+async def run(arguments: argparse.Namespace) -> None:
+    if arguments.socket is not None:
+        def connect():
+            return asyncio.open_unix_connection(arguments.socket, limit=1 << 24)
+    else:
+        def connect():
+            return asyncio.open_connection(arguments.host, arguments.port, limit=1 << 24)
+    with open(arguments.manifest) as manifest_file:
+        rows = [line.rstrip("\r\n") for line in manifest_file if line.strip()]
+    manifests = [manifest_variant(rows, variant) for variant in range(arguments.distinct)]
+    generator = random.Random(arguments.seed)
+    requests = [[{"id": f"{client_number}-{number}", "op": "plan", "manifest": generator.choice(manifests),
+                  "time_budget": arguments.time_budget}
+                 for number in range(arguments.requests)] for client_number in range(arguments.clients)]
+    latencies = []
+    failures = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(connect, client_requests, arguments.in_flight, latencies, failures)
+                           for client_requests in requests))
+    seconds = time.perf_counter() - start
+
+    reader, writer = await connect()
+    writer.write(b'{"id": "stats", "op": "stats"}\n')
+    stats = json.loads(await reader.readline())["stats"]
+    writer.close()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"requests: {total} from {arguments.clients} clients, {arguments.distinct} distinct manifests")
+    print(f"elapsed: {seconds:.2f} s, {total / seconds * 60:.0f} plans per minute")
+    print(f"latency: p50 {latencies[total // 2] * 1000:.1f} ms, p95 {latencies[int(total * 0.95)] * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+    print(f"service: {json.dumps(stats)}")
+    if failures:
+        print(f"failures: {len(failures)}, first: {failures[0]}")
+
+
+def main(argv: [str]) -> None:
+    parser = argparse.ArgumentParser(description="Measure the planning service's throughput.")
+    parser.add_argument("--host", default="127.0.0.1", help="the service's address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="the service's TCP port (default: 8765)")
+    parser.add_argument("--socket", metavar="PATH", default=None, help="the service's Unix socket, instead of TCP")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent connections (default: 8)")
+    parser.add_argument("--requests", type=int, default=50, help="plan requests per client (default: 50)")
+    parser.add_argument("--in-flight", type=int, default=4,
+                        help="requests each client sends before waiting for an answer (default: 4)")
+    parser.add_argument("--distinct", type=int, default=20, help="distinct manifests to choose from (default: 20)")
+    parser.add_argument("--manifest", default=Facility.DEFAULT_PACKAGE_FILE,
+                        help="the manifest the variants are made from (default: the default manifest)")
+    parser.add_argument("--time-budget", type=float, default=Facility.ROUTE_IMPROVEMENT_SECONDS,
+                        help="seconds of local search per route (default: the facility's default)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for choosing the manifests (default: 0)")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,211 @@
+from array import array
+import math
+
+
+class DistanceMatrix:
+    """A class used to store the distances between every pair of addresses. The distances are kept in a single dense,
+    row-major float32 buffer and the addresses are indexed by a dictionary, so both the distance and the address
+    lookups are O(f(x)) = 1.
+
+    **Class Attributes**
+        *UNREACHABLE* (float):
+            The distance at or above which a location is treated as unreachable.
+
+    **Instance Attributes**
+        *addresses* ([str]):
+            The list of all addresses. Indices match to the rows and columns of the matrix.
+        *address_indices* ({str: int}):
+            The index of every address, used in place of a linear search of the address list.
+        *size* (int):
+            The number of addresses, which is also the number of rows and columns.
+        *values* (array('f') or memoryview):
+            The flat float32 buffer holding the matrix, row by row.
+
+    **Methods**
+        *__init__* (addresses ([str]), values (array('f') or memoryview, optional)) -> None
+            - TIME: O(f(x))= n^2
+            - SPACE: O(f(x))= n^2
+        *from_rows* (addresses ([str]), rows ([[float]])) -> DistanceMatrix
+            - TIME: O(f(x))= n^2
+            - SPACE: O(f(x))= n^2
+        *complete_triangle* () -> int
+            - TIME: O(f(x))= n^2
+            - SPACE: O(f(x))= 1
+        *index_of* (address (str)) -> int
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *distance* (from_index (int), to_index (int)) -> float
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *row* (index (int)) -> memoryview
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *nearest* (from_index (int), target_indices ([int])) -> int
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+    """
+
+    UNREACHABLE: float = 999.9
+
+    def __init__(self, addresses: [str], values=None) -> None:
+        """*__init__*
+            Creates the matrix for the supplied addresses. If no values are supplied every distance starts out missing
+            (NaN) so that it can be filled in afterwards.
+
+            TIME: O(f(x))= n^2
+
+            SPACE: O(f(x))= n^2
+
+        :param addresses: ([str]) The addresses, in the same order as the rows of the matrix
+        :param values: (array('f') or memoryview, optional) A flat row-major float32 buffer of size n * n
+        :return: None
+        """
+        self.addresses = list(addresses)
+        self.size = len(self.addresses)
+        self.address_indices = {}
+        for index, address in enumerate(self.addresses):
+            self.address_indices[address] = index
+        if values is None:
+            values = array('f', [math.nan]) * (self.size * self.size)
+        if len(values) != self.size * self.size:
+            raise ValueError(f"Expected {self.size * self.size} distances, got {len(values)}")
+        self.values = values
+        flat_view = memoryview(values)
+        if flat_view.format != 'f':
+            flat_view = flat_view.cast('B').cast('f')
+        self._rows = [flat_view[index * self.size:(index + 1) * self.size] for index in range(self.size)]
+
+    @classmethod
+    def from_rows(cls, addresses: [str], rows: [[float]]) -> "DistanceMatrix":
+        """*from_rows*
+            Builds a matrix from parsed chart rows. Rows may be shorter than the number of addresses and may contain
+            None or NaN for pairs that were left blank; these are filled in from the opposite triangle.
+
+            TIME: O(f(x))= n^2
+
+            SPACE: O(f(x))= n^2
+
+        :param addresses: ([str]) The addresses, in the same order as the rows
+        :param rows: ([[float]]) The distances for each row, possibly only half populated
+        :return: (DistanceMatrix) The completed matrix
+        """
+        matrix = cls(addresses)
+        for row_index, row in enumerate(rows):
+            offset = row_index * matrix.size
+            for column_index, distance in enumerate(row[:matrix.size]):
+                if distance is not None:
+                    matrix.values[offset + column_index] = distance
+        matrix.complete_triangle()
+        return matrix
+
+    def complete_triangle(self) -> int:
+        """*complete_triangle*
+            Fills every missing distance from its mirror across the diagonal, and sets a missing diagonal to zero.
+
+            TIME: O(f(x))= n^2
+
+            SPACE: O(f(x))= 1
+
+        :return: (int) The number of distances that were filled in
+        """
+        filled = 0
+        for row_index in range(self.size):
+            row = self._rows[row_index]
+            if math.isnan(row[row_index]):
+                row[row_index] = 0.0
+                filled += 1
+            for column_index in range(row_index + 1, self.size):
+                mirror_row = self._rows[column_index]
+                if math.isnan(row[column_index]):
+                    if not math.isnan(mirror_row[row_index]):
+                        row[column_index] = mirror_row[row_index]
+                        filled += 1
+                elif math.isnan(mirror_row[row_index]):
+                    mirror_row[row_index] = row[column_index]
+                    filled += 1
+        return filled
+
+    def index_of(self, address: str) -> int:
+        """*index_of*
+            Finds the row / column index of an address.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param address: (str) The address to look up
+        :return: (int) The index of the address
+        """
+        index = self.address_indices.get(address)
+        if index is None:
+            raise ValueError(f"{address!r} is not in the distance chart")
+        return index
+
+    def distance(self, from_index: int, to_index: int) -> float:
+        """*distance*
+            Returns the distance between two address indices.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param from_index: (int) The index of the starting address
+        :param to_index: (int) The index of the ending address
+        :return: (float) The distance in miles
+        """
+        return self._rows[from_index][to_index]
+
+    def row(self, index: int) -> memoryview:
+        """*row*
+            Returns a zero-copy view of the distances from one address to every other address.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param index: (int) The index of the address
+        :return: (memoryview) The distances from the address, indexed by address index
+        """
+        return self._rows[index]
+
+    def nearest(self, from_index: int, target_indices: [int]) -> int:
+        """*nearest*
+            Finds the closest target to an address. The minimum is taken by the builtin min over the row view, so ties
+            go to the target that appears first in target_indices. Blank (NaN) distances are skipped: nothing compares
+            less than NaN, so a NaN first candidate would otherwise win.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param from_index: (int) The index of the current address
+        :param target_indices: ([int]) The indices which are valid targets
+        :return: (int) The index of the nearest target, or -1 if no target is reachable
+        """
+        if not target_indices:
+            return -1
+        row = self._rows[from_index]
+        nearest_index = min(target_indices, key=row.__getitem__)
+        if math.isnan(row[nearest_index]):
+            # Only a NaN first candidate can win, so take the minimum again over the targets with a distance
+            nearest_index = min((target for target in target_indices if not math.isnan(row[target])),
+                                key=row.__getitem__, default=-1)
+            if nearest_index < 0:
+                return -1
+        if not row[nearest_index] < DistanceMatrix.UNREACHABLE:
+            return -1
+        return nearest_index
+
+    def __deepcopy__(self, memo: dict) -> "DistanceMatrix":
+        # The matrix is never changed once built, so copies share it rather than duplicating n^2 floats
+        return self
+
+    def __reduce__(self):
+        # Row views cannot be pickled, so the matrix is sent as its flat buffer and rebuilt on the other side
+        return DistanceMatrix, (self.addresses, array('f', memoryview(self.values).cast('B').cast('f')))
+
+    def __getitem__(self, index: int) -> memoryview:
+        return self._rows[index]
+
+    def __len__(self) -> int:
+        return self.size
@@ -1,26 +1,39 @@
+from typing import Iterator
+
+_EMPTY = object()
+_DELETED = object()
+
+
 class HashTable:
-    """A class used to store data. This is a chaining HashTable, so the lookup and remove functions have a worst case
-    O(f()) = n. This case only occurs when all items are inserted into the same slot on the HashMap. While technically
-    possible, it is a bit contrived.
+    """A class used to store data. This is an open addressing HashTable with linear probing. Keys and values are kept
+    in two flat parallel lists, and the table doubles in size whenever the occupied slots (items and tombstones) pass
+    the load factor, so probe sequences stay short no matter how many items are inserted. Removed items leave a
+    tombstone behind so that later probes still find the keys past them; tombstones are reused by inserts and dropped
+    when the table is resized. The keys, values and items methods are lazy generators over the live slots, so looping
+    over a table does not copy it; the table must not grow while one of them is being consumed.
+
+    **Class Attributes**
+        *DEFAULT_LOAD_FACTOR* (float):
+            The default fraction of slots that may be occupied before the table grows.
 
     **Instance Attributes**
-        *table* ( [[(int, object)]] ):
-            The foundation of the HashTable. It is a list of lists of key / value pairs.
+        *item_count* (int):
+            The number of items stored in the HashTable.
+        *load_factor* (float):
+            The fraction of slots that may be occupied before the table grows.
 
     **Methods**
-        *__init__* (table_size (int, optional)) -> None
+        *__init__* (table_size (int, optional), load_factor (float, optional)) -> None
             - TIME: O(f(x))= n
             - SPACE: O(f(x))= n
         *insert* (key (int), value (object)) -> None
-            - TIME: O(f(x))= 1
+            - TIME: Amortized: O(f(x))= 1
             - SPACE: O(f(x))= 1
         *remove* (key (int)) -> bool:
-            - TIME: Best: O(f(x))= 1
-            - TIME: Worst: O(f(x))= n
+            - TIME: Expected: O(f(x))= 1
             - SPACE: O(f(x))= 1
         *lookup* (key (int)) -> object:
-            - TIME: Best: O(f(x))= 1
-            - TIME: Worst: O(f(x))= n
+            - TIME: Expected: O(f(x))= 1
             - SPACE: O(f(x))= 1
         *get_keys* () -> [int]:
             - TIME: O(f(x))= n
@@ -28,30 +41,150 @@ class HashTable:
         *get_values* () -> [object]:
             - TIME: O(f(x))= n
             - SPACE: O(f(x))= n
+        *keys* () -> Iterator[int]:
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *values* () -> Iterator[object]:
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *items* () -> Iterator[(int, object)]:
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *__iter__* () -> Iterator[int]:
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *__len__* () -> int:
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *__contains__* (key (int)) -> bool:
+            - TIME: Expected: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *probe_stats* () -> dict:
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
     """
-    def __init__(self, table_size=10) -> None:
+
+    DEFAULT_LOAD_FACTOR: float = 0.7
+
+    def __init__(self, table_size=10, load_factor=DEFAULT_LOAD_FACTOR) -> None:
         """__init__:
-            Creates the initial empty HashTable. The default size is 10.
+            Creates the initial empty HashTable, with enough slots to hold table_size items without growing.
 
             TIME: O(f(x))= n
 
-            SPACE: O(f(x))= 1
+            SPACE: O(f(x))= n
 
-        :param table_size: (int, optional) The number of slots in the initial HashTable
+        :param table_size: (int, optional) The number of items the table should hold before it first grows
+        :param load_factor: (float, optional) The fraction of slots that may be occupied before the table grows
         :return: None
         """
+        if not 0 < load_factor < 1:
+            raise ValueError("load_factor must be between 0 and 1")
+        self.load_factor = load_factor
         self.item_count = 0
-        row_count = 0
-        self.table = []
-        while row_count < table_size:
-            self.table.insert(row_count, [])
-            row_count += 1
+        self._allocate(self._capacity_for(table_size))
+
+    def _capacity_for(self, item_count: int) -> int:
+        """_capacity_for:
+            Finds the smallest power of two slot count that holds item_count items under the load factor.
+
+            TIME: O(f(x))= log n
+
+            SPACE: O(f(x))= 1
+
+        :param item_count: (int) The number of items to hold
+        :return: (int) The number of slots
+        """
+        capacity = 8
+        while capacity * self.load_factor <= item_count:
+            capacity *= 2
+        return capacity
+
+    def _allocate(self, capacity: int) -> None:
+        """_allocate:
+            Replaces the slot lists with empty lists of the given power of two size.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param capacity: (int) The number of slots
+        :return: None
+        """
+        self._keys = [_EMPTY] * capacity
+        self._values = [None] * capacity
+        self._occupied = 0
+        self._shift = 64 - (capacity.bit_length() - 1)
+
+    def _home_slot(self, key: int) -> int:
+        """_home_slot:
+            Finds the first slot to probe for a key. The hash is scrambled by Fibonacci hashing so that runs of
+            consecutive integer keys spread out instead of forming one long probe cluster.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param key: (int) The key to place
+        :return: (int) The slot index
+        """
+        return ((hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+
+    def _find_slot(self, key: int) -> int:
+        """_find_slot:
+            Probes for the slot holding a key, skipping over tombstones.
+
+            TIME: Expected: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param key: (int) The key to find
+        :return: (int) The slot index, or -1 if the key is not stored
+        """
+        keys = self._keys
+        mask = len(keys) - 1
+        slot = self._home_slot(key)
+        while True:
+            slot_key = keys[slot]
+            if slot_key is _EMPTY:
+                return -1
+            if slot_key is not _DELETED and slot_key == key:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _resize(self, capacity: int) -> None:
+        """_resize:
+            Moves every item into a fresh set of slots, dropping all tombstones.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param capacity: (int) The new number of slots
+        :return: None
+        """
+        old_keys = self._keys
+        old_values = self._values
+        self._allocate(capacity)
+        keys = self._keys
+        values = self._values
+        mask = capacity - 1
+        for old_slot, key in enumerate(old_keys):
+            if key is _EMPTY or key is _DELETED:
+                continue
+            slot = self._home_slot(key)
+            while keys[slot] is not _EMPTY:
+                slot = (slot + 1) & mask
+            keys[slot] = key
+            values[slot] = old_values[old_slot]
+        self._occupied = self.item_count
 
     def insert(self, key: int, value: object) -> None:
         """insert:
-            Inserts an entry into the HashTable. If an item happens to hash into the same slot, it is added to the end.
+            Inserts an entry into the HashTable. If the key is already stored, its value is replaced. The table grows
+            once the occupied slots pass the load factor.
 
-            TIME: O(f(x))= 1
+            TIME: Amortized: O(f(x))= 1
 
             SPACE: O(f(x))= 1
 
@@ -59,49 +192,65 @@ class HashTable:
         :param value: (object) The object to be stored in the HashTable
         :return: None.
         """
-        hashed_key = hash(key) % len(self.table)
-        self.table[hashed_key].append((key, value))
+        keys = self._keys
+        mask = len(keys) - 1
+        slot = self._home_slot(key)
+        tombstone = -1
+        while True:
+            slot_key = keys[slot]
+            if slot_key is _EMPTY:
+                break
+            if slot_key is _DELETED:
+                if tombstone == -1:
+                    tombstone = slot
+            elif slot_key == key:
+                self._values[slot] = value
+                return
+            slot = (slot + 1) & mask
+        if tombstone != -1:
+            slot = tombstone
+        else:
+            self._occupied += 1
+        keys[slot] = key
+        self._values[slot] = value
         self.item_count += 1
+        if self._occupied > len(keys) * self.load_factor:
+            self._resize(self._capacity_for(self.item_count * 2))
 
     def remove(self, key: int) -> bool:
         """remove:
-            Removes the value with the specified key from the HashTable.
+            Removes the value with the specified key from the HashTable, leaving a tombstone in its slot.
 
-            TIME:
-                - Best: O(f(x))= 1
-                - Worst: O(f(x))= n
+            TIME: Expected: O(f(x))= 1
 
             SPACE: O(f(x))= 1
 
         :param key: (int) The key of the value to be removed
         :return: (bool) Whether or not the value was found and removed
         """
-        hashed_key = hash(key) % len(self.table)
-        for key_value_pair in self.table[hashed_key]:
-            if key_value_pair[0] == key:
-                self.table[hashed_key].remove(key_value_pair)
-                self.item_count -= 1
-                return True
-        return False
+        slot = self._find_slot(key)
+        if slot == -1:
+            return False
+        self._keys[slot] = _DELETED
+        self._values[slot] = None
+        self.item_count -= 1
+        return True
 
     def lookup(self, key: int) -> object:
         """lookup:
             Searches for an item and returns that item.
 
-            TIME:
-                - Best: O(f(x))= 1
-                - Worst: O(f(x))= n
+            TIME: Expected: O(f(x))= 1
 
             SPACE: O(f(x))= 1
 
         :param key: (int) The key of the value to be looked up
         :return: (object) The object returned by the lookup, None if the object is not found
         """
-        hashed_key = hash(key) % len(self.table)
-        for key_value_pair in self.table[hashed_key]:
-            if key_value_pair[0] == key:
-                return key_value_pair[1]
-        return None
+        slot = self._find_slot(key)
+        if slot == -1:
+            return None
+        return self._values[slot]
 
     def get_keys(self) -> [int]:
         """get_keys:
@@ -113,11 +262,7 @@ class HashTable:
 
         :return: ([int]) The list of all keys stored in the HashTable
         """
-        all_keys = []
-        for row in self.table:
-            for item in row:
-                all_keys.append(item[0])
-        return all_keys
+        return [key for key in self._keys if key is not _EMPTY and key is not _DELETED]
 
     def get_values(self) -> [object]:
         """get_values(self) -> [object]:
@@ -129,8 +274,115 @@ class HashTable:
 
         :return: ([object]) The list of all value objects stored in the HashTable
         """
-        all_values = []
-        for row in self.table:
-            for item in row:
-                all_values.append(item[1])
-        return all_values
+        keys = self._keys
+        return [value for slot, value in enumerate(self._values)
+                if keys[slot] is not _EMPTY and keys[slot] is not _DELETED]
+
+    def keys(self) -> Iterator[int]:
+        """keys:
+            Lazily yields every key stored in the HashTable, without building a list.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :return: (Iterator[int]) The keys stored in the HashTable
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self) -> Iterator[object]:
+        """values:
+            Lazily yields every value stored in the HashTable, without building a list.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :return: (Iterator[object]) The values stored in the HashTable
+        """
+        for _, value in self.items():
+            yield value
+
+    def items(self) -> Iterator[tuple]:
+        """items:
+            Lazily yields every key / value pair stored in the HashTable. Raises a RuntimeError if the table is resized
+            while the pairs are being consumed.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :return: (Iterator[(int, object)]) The key / value pairs stored in the HashTable
+        """
+        keys = self._keys
+        values = self._values
+        for slot in range(len(keys)):
+            if self._keys is not keys:
+                raise RuntimeError("HashTable resized during iteration")
+            key = keys[slot]
+            if key is not _EMPTY and key is not _DELETED:
+                yield key, values[slot]
+
+    def __getstate__(self) -> dict:
+        # The empty and deleted markers are compared by identity, so the slots are never copied or pickled directly;
+        # the items are saved instead and re-inserted into fresh slots
+        return {"load_factor": self.load_factor, "items": list(self.items())}
+
+    def __setstate__(self, state: dict) -> None:
+        self.load_factor = state["load_factor"]
+        self.item_count = 0
+        self._allocate(self._capacity_for(len(state["items"])))
+        for key, value in state["items"]:
+            self.insert(key, value)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.keys()
+
+    def __len__(self) -> int:
+        return self.item_count
+
+    def __contains__(self, key: int) -> bool:
+        return self._find_slot(key) != -1
+
+    def probe_stats(self) -> dict:
+        """probe_stats:
+            Measures how well the keys are spread, from the current layout of the slots, so it costs nothing until it
+            is called. A key's probe length is the number of slots a lookup for it reads, and a cluster is a run of
+            occupied slots (items and tombstones) that a probe may have to cross.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :return: (dict) The items, tombstones, capacity, load, mean and longest probe length, and longest cluster
+        """
+        keys = self._keys
+        mask = len(keys) - 1
+        total_probes = 0
+        longest_probe = 0
+        longest_cluster = 0
+        cluster = 0
+        for slot, key in enumerate(keys):
+            if key is _EMPTY:
+                cluster = 0
+                continue
+            cluster += 1
+            longest_cluster = max(longest_cluster, cluster)
+            if key is not _DELETED:
+                probes = ((slot - self._home_slot(key)) & mask) + 1
+                total_probes += probes
+                longest_probe = max(longest_probe, probes)
+        if cluster and keys[0] is not _EMPTY:
+            # A cluster that runs off the end of the slots continues at the start
+            wrapped = 0
+            while wrapped < len(keys) and keys[wrapped] is not _EMPTY:
+                wrapped += 1
+            longest_cluster = max(longest_cluster, min(len(keys), cluster + wrapped))
+        return {"items": self.item_count,
+                "tombstones": self._occupied - self.item_count,
+                "capacity": len(keys),
+                "load": round(self._occupied / len(keys), 4),
+                "mean_probe_length": round(total_probes / self.item_count, 4) if self.item_count else 0.0,
+                "longest_probe_length": longest_probe,
+                "longest_cluster": longest_cluster}
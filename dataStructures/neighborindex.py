@@ -0,0 +1,243 @@
+from array import array
+from dataStructures.distancematrix import DistanceMatrix
+import heapq
+import math
+import random
+
+
+class NeighborIndex:
+    """A class used to answer nearest neighbor queries without scanning every location. For each location it keeps a
+    list of its closest locations sorted by distance. The lists are built the first time a location is queried and
+    are then shared by every tour that uses the index.
+
+    **Class Attributes**
+        *DEFAULT_NEIGHBOR_COUNT* (int):
+            The default number of neighbors kept for each location.
+
+    **Instance Attributes**
+        *distances* (DistanceMatrix):
+            The matrix the neighbor lists are built from.
+        *neighbor_count* (int):
+            The number of neighbors kept for each location.
+
+    **Methods**
+        *__init__* (distances (DistanceMatrix), neighbor_count (int, optional)) -> None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *neighbors* (index (int)) -> array('i')
+            - TIME: First call: O(f(x))= n log k
+            - TIME: Later calls: O(f(x))= 1
+            - SPACE: O(f(x))= k
+        *build* () -> None
+            - TIME: O(f(x))= n^2 log k
+            - SPACE: O(f(x))= n * k
+        *tour* (target_indices ([int])) -> NeighborTour
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+    """
+
+    DEFAULT_NEIGHBOR_COUNT: int = 32
+
+    def __init__(self, distances: DistanceMatrix, neighbor_count: int = DEFAULT_NEIGHBOR_COUNT) -> None:
+        """*__init__*
+            Creates an empty index over a distance matrix. No neighbor lists are built until they are needed.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param distances: (DistanceMatrix) The matrix of distances between locations
+        :param neighbor_count: (int, optional) How many of the nearest locations to keep for each location
+        :return: None
+        """
+        self.distances = distances
+        self.neighbor_count = min(neighbor_count, distances.size)
+        self._neighbors = [None] * distances.size
+
+    def neighbors(self, index: int) -> array:
+        """*neighbors*
+            Returns the nearest locations to a location, closest first. Ties go to the lower location index. The
+            location itself is included, as it is at distance zero. Locations with a blank (NaN) distance are left out,
+            as they cannot be ordered.
+
+            TIME:
+                - First call: O(f(x))= n log k
+                - Later calls: O(f(x))= 1
+
+            SPACE: O(f(x))= k
+
+        :param index: (int) The index of the location
+        :return: (array('i')) The indices of the nearest locations
+        """
+        neighbor_list = self._neighbors[index]
+        if neighbor_list is None:
+            row = self.distances.row(index)
+            values = row.tolist()
+            if math.isnan(sum(values)):
+                # A blank distance cannot be ordered, so it is kept out of the way and then left out
+                values = [math.inf if math.isnan(value) else value for value in values]
+            # Only the k nearest are kept, so a bounded heap selects them without sorting the whole row
+            nearest = heapq.nsmallest(self.neighbor_count, range(len(values)), key=values.__getitem__)
+            neighbor_list = array('i', (other for other in nearest if not math.isnan(row[other])))
+            self._neighbors[index] = neighbor_list
+        return neighbor_list
+
+    def build(self) -> None:
+        """*build*
+            Builds the neighbor list of every location up front, so later queries never pay for a selection.
+
+            TIME: O(f(x))= n^2 log k
+
+            SPACE: O(f(x))= n * k
+
+        :return: None
+        """
+        for index in range(self.distances.size):
+            self.neighbors(index)
+
+    def __deepcopy__(self, memo: dict) -> "NeighborIndex":
+        # The neighbor lists only depend on the distances, which never change, so copies share them
+        return self
+
+    def tour(self, target_indices: [int]) -> "NeighborTour":
+        """*tour*
+            Starts a nearest neighbor tour over a set of target locations.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param target_indices: ([int]) The locations to visit. An index may appear more than once.
+        :return: (NeighborTour) The tour
+        """
+        return NeighborTour(self, target_indices)
+
+
+class NeighborTour:
+    """A class used to track the unvisited targets of a single nearest neighbor tour. Visited targets are deleted
+    lazily: each location keeps a cursor into its neighbor list that only moves forward past targets that are gone,
+    so over a whole tour each neighbor list is walked at most once.
+
+    **Class Attributes**
+        *RANDOM_CANDIDATES* (int):
+            The number of nearest targets a randomized query chooses between.
+
+    **Instance Attributes**
+        *index* (NeighborIndex):
+            The neighbor index the tour queries.
+        *remaining* ({int: int}):
+            The number of visits still owed to each target location.
+
+    **Methods**
+        *__init__* (index (NeighborIndex), target_indices ([int])) -> None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *nearest* (from_index (int), rng (Random, optional)) -> int
+            - TIME: Amortized: O(f(x))= 1
+            - TIME: Worst: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *remove* (target_index (int)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+    """
+
+    RANDOM_CANDIDATES: int = 3
+
+    def __init__(self, index: NeighborIndex, target_indices: [int]) -> None:
+        """*__init__*
+            Creates a tour that still has to visit every target.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param index: (NeighborIndex) The neighbor index to query
+        :param target_indices: ([int]) The locations to visit. An index may appear more than once.
+        :return: None
+        """
+        self.index = index
+        self.remaining = {}
+        for target_index in target_indices:
+            self.remaining[target_index] = self.remaining.get(target_index, 0) + 1
+        self._visits_left = len(target_indices)
+        self._cursors = {}
+
+    def nearest(self, from_index: int, rng: random.Random = None) -> int:
+        """*nearest*
+            Finds the closest unvisited target. If every target in the neighbor list has been visited, the remaining
+            targets are scanned directly. When a random number generator is supplied, one of the RANDOM_CANDIDATES
+            closest unvisited targets is picked at random instead, which lets repeated tours explore different routes.
+
+            TIME:
+                - Amortized: O(f(x))= 1
+                - Worst: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param from_index: (int) The index of the current location
+        :param rng: (Random, optional) The random number generator used to pick among the closest targets
+        :return: (int) The index of the nearest unvisited target, or -1 if none is reachable
+        """
+        if self._visits_left == 0:
+            return -1
+        neighbor_list = self.index.neighbors(from_index)
+        cursor = self._cursors.get(from_index, 0)
+        while cursor < len(neighbor_list) and neighbor_list[cursor] not in self.remaining:
+            cursor += 1
+        self._cursors[from_index] = cursor
+        if rng is not None:
+            candidates = self._candidates(from_index, neighbor_list, cursor)
+            if candidates:
+                return rng.choice(candidates)
+        if cursor < len(neighbor_list):
+            nearest_index = neighbor_list[cursor]
+            if self.index.distances.distance(from_index, nearest_index) < DistanceMatrix.UNREACHABLE:
+                return nearest_index
+            return -1
+        return self.index.distances.nearest(from_index, list(self.remaining))
+
+    def _candidates(self, from_index: int, neighbor_list: array, cursor: int) -> [int]:
+        """*_candidates*
+            Collects up to RANDOM_CANDIDATES reachable unvisited targets from a neighbor list, closest first.
+
+            TIME: O(f(x))= k
+
+            SPACE: O(f(x))= 1
+
+        :param from_index: (int) The index of the current location
+        :param neighbor_list: (array('i')) The neighbor list of the current location
+        :param cursor: (int) The position of the first unvisited target in the neighbor list
+        :return: ([int]) The candidate targets
+        """
+        candidates = []
+        row = self.index.distances.row(from_index)
+        for position in range(cursor, len(neighbor_list)):
+            candidate = neighbor_list[position]
+            if candidate in self.remaining and row[candidate] < DistanceMatrix.UNREACHABLE:
+                candidates.append(candidate)
+                if len(candidates) == NeighborTour.RANDOM_CANDIDATES:
+                    break
+        return candidates
+
+    def remove(self, target_index: int) -> None:
+        """*remove*
+            Marks one visit to a target as done.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param target_index: (int) The index of the visited target
+        :return: None
+        """
+        visits = self.remaining.get(target_index)
+        if visits is None:
+            raise ValueError(f"{target_index} is not a remaining target")
+        if visits == 1:
+            del self.remaining[target_index]
+        else:
+            self.remaining[target_index] = visits - 1
+        self._visits_left -= 1
+
+    def __len__(self) -> int:
+        return self._visits_left
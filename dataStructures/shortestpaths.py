@@ -0,0 +1,357 @@
+from array import array
+from dataStructures.distancematrix import DistanceMatrix
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+
+
+class ShortestPaths:
+    """A class used to close a distance chart over shortest paths. A chart may leave pairs blank, or list a pair as
+    longer than some route through a third location; either way, driving the chart's figure literally wastes miles.
+    The closed matrix holds the length of the shortest route between every pair, along the chart's own distances, and
+    a next-hop table records the first location after the start on each of those routes, so the locations actually
+    driven through can be rebuilt.
+
+    A chart with at most SPARSE_DENSITY of its pairs given, like a road graph, is closed by running Dijkstra's
+    algorithm from every location. A denser chart is closed by Floyd-Warshall, which compares each row against each
+    intermediate location's row in one pass and only writes back the entries that got shorter. Pairs with no route
+    are given UNREACHABLE. Both cost a cubic number of steps in the worst case, so the result is cached in a binary
+    file beside the chart, keyed by a hash of the source matrix, and memory mapped on later runs.
+
+    **Class Attributes**
+        *SPARSE_DENSITY* (float):
+            The share of pairs at or below which Dijkstra's algorithm is used.
+        *MAGIC* (bytes):
+            The bytes every cache file starts with.
+        *VERSION* (int):
+            The cache file format version. Files written by other versions are ignored.
+
+    **Instance Attributes**
+        *distances* (DistanceMatrix):
+            The closed matrix.
+        *next_hops* (array('i') or memoryview):
+            The flat row-major table of the location after each start on the shortest route to each end, -1 if there
+            is none.
+
+    **Methods**
+        *__init__* (distances (DistanceMatrix), next_hops (array('i') or memoryview)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *close* (source (DistanceMatrix)) -> ShortestPaths
+            - TIME: O(f(x))= n^3 for a dense chart, n * m log n for m given pairs
+            - SPACE: O(f(x))= n^2
+        *path* (from_index (int), to_index (int)) -> [int]
+            - TIME: O(f(x))= p, for p locations on the route
+            - SPACE: O(f(x))= p
+        *path_for* (distance_file (str)) -> str
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *open* (path (str), source (DistanceMatrix)) -> ShortestPaths or None
+            - TIME: O(f(x))= n^2, to hash the source
+            - SPACE: O(f(x))= 1, as the file is memory mapped
+        *save* (path (str), source (DistanceMatrix)) -> str
+            - TIME: O(f(x))= n^2
+            - SPACE: O(f(x))= n
+        *load* (source (DistanceMatrix), path (str, optional)) -> ShortestPaths
+            - TIME: O(f(x))= n^2 when cached, otherwise as close
+            - SPACE: O(f(x))= n^2
+    """
+
+    SPARSE_DENSITY: float = 0.1
+    MAGIC: bytes = b"DTRPATH\0"
+    VERSION: int = 1
+    _PREAMBLE: struct.Struct = struct.Struct("<8sII")
+    _ALIGNMENT: int = 64
+
+    def __init__(self, distances: DistanceMatrix, next_hops) -> None:
+        """*__init__*
+            Wraps a closed matrix and its next-hop table. Use close or load to create one.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param distances: (DistanceMatrix) The closed matrix
+        :param next_hops: (array('i') or memoryview) The flat row-major next-hop table
+        :return: None
+        """
+        self.distances = distances
+        self.next_hops = next_hops
+
+    @staticmethod
+    def close(source: DistanceMatrix) -> "ShortestPaths":
+        """*close*
+            Computes the shortest route between every pair of locations along the given distances. Blank (NaN) and
+            UNREACHABLE distances are not roads. The source matrix is not changed.
+
+            TIME: O(f(x))= n^3 for a dense chart, n * m log n for m given pairs
+
+            SPACE: O(f(x))= n^2
+
+        :param source: (DistanceMatrix) The chart as read
+        :return: (ShortestPaths) The closed matrix and its next-hop table
+        """
+        size = source.size
+        rows = []
+        hops = []
+        edge_count = 0
+        for index in range(size):
+            row = array('f', source.row(index))
+            hop_row = array('i', range(size))
+            for column, distance in enumerate(row):
+                if math.isnan(distance) or distance >= DistanceMatrix.UNREACHABLE:
+                    row[column] = math.inf
+                    hop_row[column] = -1
+                elif distance < 0:
+                    raise ValueError(f"Negative distance from {source.addresses[index]!r} to "
+                                     f"{source.addresses[column]!r}")
+                elif column != index:
+                    edge_count += 1
+            row[index] = 0.0
+            hop_row[index] = index
+            rows.append(row)
+            hops.append(hop_row)
+        if edge_count <= ShortestPaths.SPARSE_DENSITY * size * (size - 1):
+            ShortestPaths._dijkstra(rows, hops)
+        else:
+            ShortestPaths._floyd_warshall(rows, hops)
+        values = array('f')
+        next_hops = array('i')
+        for row, hop_row in zip(rows, hops):
+            if math.inf in row:
+                for column in [column for column, distance in enumerate(row) if distance == math.inf]:
+                    row[column] = DistanceMatrix.UNREACHABLE
+            values.extend(row)
+            next_hops.extend(hop_row)
+        return ShortestPaths(DistanceMatrix(source.addresses, values), next_hops)
+
+    @staticmethod
+    def _floyd_warshall(rows: [array], hops: [array]) -> None:
+        """*_floyd_warshall*
+            Shortens every row through each location in turn. A row is compared against the intermediate location's
+            row in one comprehension, and only the entries that got shorter are written, along with the first hop
+            toward the intermediate location.
+
+            TIME: O(f(x))= n^3
+
+            SPACE: O(f(x))= n
+
+        :param rows: ([array('f')]) The distances, with math.inf for no road; shortened in place
+        :param hops: ([array('i')]) The next hops, -1 for no road; updated in place
+        :return: None
+        """
+        columns = range(len(rows))
+        for middle, middle_row in enumerate(rows):
+            for row, hop_row in zip(rows, hops):
+                to_middle = row[middle]
+                if to_middle == math.inf or row is middle_row:
+                    continue
+                shorter = [column for column, direct, onward in zip(columns, row, middle_row)
+                           if to_middle + onward < direct]
+                if shorter:
+                    first_hop = hop_row[middle]
+                    for column in shorter:
+                        row[column] = to_middle + middle_row[column]
+                        hop_row[column] = first_hop
+
+    @staticmethod
+    def _dijkstra(rows: [array], hops: [array]) -> None:
+        """*_dijkstra*
+            Runs Dijkstra's algorithm over the given roads from every location, recording the first hop of each route.
+
+            TIME: O(f(x))= n * m log n, for m roads
+
+            SPACE: O(f(x))= n + m
+
+        :param rows: ([array('f')]) The distances, with math.inf for no road; replaced by the shortest in place
+        :param hops: ([array('i')]) The next hops, -1 for no road; replaced in place
+        :return: None
+        """
+        size = len(rows)
+        roads = [[(column, distance) for column, distance in enumerate(row) if distance != math.inf and column != index]
+                 for index, row in enumerate(rows)]
+        for start in range(size):
+            shortest = [math.inf] * size
+            first_hops = [-1] * size
+            shortest[start] = 0.0
+            first_hops[start] = start
+            settled = bytearray(size)
+            frontier = [(0.0, start)]
+            while frontier:
+                distance, location = heapq.heappop(frontier)
+                if settled[location]:
+                    continue
+                settled[location] = 1
+                first_hop = first_hops[location]
+                for neighbor, road in roads[location]:
+                    candidate = distance + road
+                    if candidate < shortest[neighbor]:
+                        shortest[neighbor] = candidate
+                        first_hops[neighbor] = neighbor if location == start else first_hop
+                        heapq.heappush(frontier, (candidate, neighbor))
+            rows[start] = array('f', shortest)
+            hops[start] = array('i', first_hops)
+
+    def path(self, from_index: int, to_index: int) -> [int]:
+        """*path*
+            Rebuilds the locations driven through on the shortest route between two locations.
+
+            TIME: O(f(x))= p, for p locations on the route
+
+            SPACE: O(f(x))= p
+
+        :param from_index: (int) The index of the starting location
+        :param to_index: (int) The index of the ending location
+        :return: ([int]) Both ends and every location between them, in order, or [] if there is no route
+        """
+        size = self.distances.size
+        path = [from_index]
+        while from_index != to_index:
+            from_index = self.next_hops[from_index * size + to_index]
+            if from_index < 0:
+                return []
+            path.append(from_index)
+        return path
+
+    @staticmethod
+    def path_for(distance_file: str) -> str:
+        """*path_for*
+            Names the cache file for a distance chart. It is written next to the chart.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param distance_file: (str) The path of the distance chart CSV
+        :return: (str) The path of the cache file
+        """
+        distance_name = os.path.splitext(os.path.basename(distance_file))[0]
+        return os.path.join(os.path.dirname(distance_file), f".{distance_name}.paths")
+
+    @staticmethod
+    def _source_hash(source: DistanceMatrix) -> str:
+        """*_source_hash*
+            Hashes a source matrix's addresses and distances.
+
+            TIME: O(f(x))= n^2
+
+            SPACE: O(f(x))= 1
+
+        :param source: (DistanceMatrix) The chart as read
+        :return: (str) The hash, as hexadecimal
+        """
+        digest = hashlib.sha256(json.dumps(source.addresses).encode())
+        digest.update(memoryview(source.values).cast('B'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def open(path: str, source: DistanceMatrix) -> "ShortestPaths" or None:
+        """*open*
+            Opens a cache file if it exists, was written by this version, and was closed from the same source matrix.
+            The closed matrix and next-hop table are read straight from a read-only mapping of the file.
+
+            TIME: O(f(x))= n^2, to hash the source
+
+            SPACE: O(f(x))= 1, as the file is memory mapped
+
+        :param path: (str) The path of the cache file
+        :param source: (DistanceMatrix) The chart as read
+        :return: (ShortestPaths or None) The closed chart, or None if the file is missing or stale
+        """
+        try:
+            with open(path, "rb") as paths_file:
+                paths_map = mmap.mmap(paths_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, header_length = ShortestPaths._PREAMBLE.unpack_from(paths_map, 0)
+            if magic != ShortestPaths.MAGIC or version != ShortestPaths.VERSION:
+                raise ValueError("unsupported paths file")
+            header_start = ShortestPaths._PREAMBLE.size
+            header = json.loads(paths_map[header_start:header_start + header_length].decode("utf-8"))
+            if header["byteorder"] != sys.byteorder or header["source_sha256"] != ShortestPaths._source_hash(source):
+                raise ValueError("stale paths file")
+            count = source.size * source.size
+            matrix_offset = header["matrix_offset"]
+            hops_offset = header["hops_offset"]
+            view = memoryview(paths_map)
+            distances = DistanceMatrix(source.addresses, view[matrix_offset:matrix_offset + count * 4].cast('f'))
+            return ShortestPaths(distances, view[hops_offset:hops_offset + count * 4].cast('i'))
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            paths_map.close()
+            return None
+
+    def save(self, path: str, source: DistanceMatrix) -> str:
+        """*save*
+            Writes the closed matrix and next-hop table to a cache file. The file is written under a temporary name
+            and then renamed into place, so a reader never sees a partial file.
+
+            TIME: O(f(x))= n^2
+
+            SPACE: O(f(x))= n
+
+        :param path: (str) The path of the cache file
+        :param source: (DistanceMatrix) The chart this was closed from
+        :return: (str) The path of the cache file
+        """
+        count = self.distances.size * self.distances.size
+        header = {"byteorder": sys.byteorder, "source_sha256": ShortestPaths._source_hash(source),
+                  "matrix_offset": 0, "hops_offset": 0}
+        # The offsets are part of the header, so grow them until the header stops changing length
+        while True:
+            encoded_header = json.dumps(header).encode("utf-8")
+            matrix_offset = ShortestPaths._PREAMBLE.size + len(encoded_header)
+            matrix_offset += -matrix_offset % ShortestPaths._ALIGNMENT
+            if matrix_offset == header["matrix_offset"]:
+                break
+            header["matrix_offset"] = matrix_offset
+            header["hops_offset"] = matrix_offset + count * 4
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as paths_file:
+            paths_file.write(ShortestPaths._PREAMBLE.pack(ShortestPaths.MAGIC, ShortestPaths.VERSION,
+                                                          len(encoded_header)))
+            paths_file.write(encoded_header)
+            paths_file.write(b"\0" * (matrix_offset - ShortestPaths._PREAMBLE.size - len(encoded_header)))
+            paths_file.write(memoryview(self.distances.values).cast('B'))
+            paths_file.write(memoryview(self.next_hops).cast('B'))
+        os.replace(temporary_path, path)
+        return path
+
+    @staticmethod
+    def load(source: DistanceMatrix, path: str = None) -> "ShortestPaths":
+        """*load*
+            Opens the cached closure of a chart, or closes the chart and caches the result. Without a path nothing is
+            cached.
+
+            TIME: O(f(x))= n^2 when cached, otherwise as close
+
+            SPACE: O(f(x))= n^2
+
+        :param source: (DistanceMatrix) The chart as read
+        :param path: (str, optional) The path of the cache file
+        :return: (ShortestPaths) The closed chart
+        """
+        if path is not None:
+            shortest_paths = ShortestPaths.open(path, source)
+            if shortest_paths is not None:
+                return shortest_paths
+        shortest_paths = ShortestPaths.close(source)
+        if path is not None:
+            try:
+                shortest_paths.save(path, source)
+            except OSError:
+                pass
+        return shortest_paths
+
+    def __deepcopy__(self, memo: dict) -> "ShortestPaths":
+        # Like the matrix, the table is never changed once built, so copies share it
+        return self
+
+    def __reduce__(self):
+        # A memory-mapped table cannot be pickled, so it is sent as a flat buffer
+        return ShortestPaths, (self.distances, array('i', self.next_hops))
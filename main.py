@@ -1,13 +1,32 @@
 # Jesse Perkins 001250868
+from batch_queries import BatchQueries
 from model.facility import Facility
+from model.fleet import VehicleType
+from model.metrics import PlanningMetrics
+from model.multistart import MultiStartPlanner
+from model.packagedelta import PackageDelta
+from model.plancache import PlanCache
+from model.routedecomposer import RouteDecomposer
+from model.routeplan import RoutePlan
+from planning_service import PlanningService
 from user_interface import UserInterface
+import argparse
+import asyncio
+import json
+import sys
 
 
 def main():
     """*main*
-        Create a facility object which has all package and distance data loaded, fix the bad
-        address package, preload special packages, then load the remaining packages based on
-        the nearest neighbor algorithm. After loading, run the package delivery routine.
+        Create a facility object which has all package and distance data loaded, plan the day's
+        deliveries, repair the plan when the bad address package's correction arrives, then run
+        the menu. The command line flags choose how the plan is made and what is done with it;
+        each is described in its --help text:
+            1) planning: --starts, --workers, --seed, --fleet, --shortest-paths, --decompose and
+               --plan-cache
+            2) output: --batch, --format and --output answer queries instead of running the menu,
+               and --metrics, --profile and --trace-memory record how the planning went
+            3) service: --serve or --socket run the planning service instead, until interrupted
 
         TIME: O(f(x)) = n^2
 
@@ -15,34 +34,121 @@ def main():
 
     :return: None
     """
-    facility = Facility()
-    # Manually reassign the wrong package to have the correct information
-    wrong_address_package = facility.all_packages.lookup(9)
-    wrong_address_package.address = "410 S State St"
-    wrong_address_package.city = "Salt Lake City"
-    wrong_address_package.zipcode = 84111
-    facility.all_packages.remove(9)
-    facility.all_packages.insert(wrong_address_package.package_id, wrong_address_package)
-    # Preload the packages into trucks
-    facility.preload()
-    package_list = facility.unassigned_packages
-    # Assign remaining packages to trucks
-    package_list = facility.loader(facility.all_trucks[2], package_list)
-    package_list = facility.loader(facility.all_trucks[0], package_list)
-    facility.loader(facility.all_trucks[1], package_list)
-    # Deliver packages and modify the start time of the 2nd truck so that it
-    # only leaves the facility after another truck returns
-    facility.delivery(facility.all_trucks[0])
-    facility.delivery(facility.all_trucks[2])
-    if facility.all_trucks[0].current_time < facility.all_trucks[2].current_time:
-        facility.all_trucks[1].current_time = facility.all_trucks[0].current_time
-        facility.all_trucks[1].departure_time = facility.all_trucks[0].current_time
-    else:
-        facility.all_trucks[1].current_time = facility.all_trucks[2].current_time
-        facility.all_trucks[1].departure_time = facility.all_trucks[2].current_time
-    facility.delivery(facility.all_trucks[1])
+    parser = argparse.ArgumentParser(description="Plan the day's deliveries and browse the results.")
+    parser.add_argument("--starts", type=int, default=1,
+                        help="number of randomized planning runs to choose the best plan from (default: 1)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes for --starts (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the randomized planning runs (default: 0)")
+    parser.add_argument("--fleet", metavar="TYPE", type=VehicleType.parse, nargs="+", default=None,
+                        help="plan for these vehicle types instead of the three trucks, each written as "
+                             "COUNTxPACKAGES[/KG][@HH:MM-HH:MM], e.g. '3x16' or '20x40/800@07:00-17:30'")
+    parser.add_argument("--shortest-paths", action="store_true",
+                        help="replace every chart distance by the shortest route along the chart, filling in blank "
+                             "pairs; the result is cached beside the chart")
+    parser.add_argument("--decompose", action="store_true",
+                        help="improve long routes cluster by cluster in parallel, using --workers processes")
+    parser.add_argument("--plan-cache", metavar="DIR", nargs="?", const=PlanCache.DEFAULT_DIRECTORY, default=None,
+                        help="reuse plans kept in DIR for the same packages, distances and options, and keep new ones "
+                             f"there (default DIR: {PlanCache.DEFAULT_DIRECTORY})")
+    parser.add_argument("--plan-cache-mb", type=int, default=PlanCache.DEFAULT_MAX_BYTES >> 20,
+                        help="megabytes of plans to keep before the least recently used are removed "
+                             f"(default: {PlanCache.DEFAULT_MAX_BYTES >> 20})")
+    parser.add_argument("--serve", metavar="PORT", type=int, default=None,
+                        help="run the planning service on this local TCP port, using --workers processes")
+    parser.add_argument("--socket", metavar="PATH", default=None,
+                        help="run the planning service on this Unix socket instead of a TCP port")
+    parser.add_argument("--batch", metavar="FILE", default=None,
+                        help="answer the queries in FILE ('-' for stdin) instead of running the menu")
+    parser.add_argument("--format", choices=[BatchQueries.JSONL, BatchQueries.CSV], default=BatchQueries.JSONL,
+                        help="output format for --batch (default: jsonl)")
+    parser.add_argument("--output", metavar="FILE", default=None,
+                        help="where to write the --batch results (default: stdout)")
+    parser.add_argument("--page-size", type=int, default=None,
+                        help="lines per page of the menu's all package reports (default: unpaged)")
+    parser.add_argument("--metrics", metavar="FILE", default=None,
+                        help="time and count the planning phases and write the metrics as JSON to FILE ('-' for "
+                             "stderr)")
+    parser.add_argument("--profile", action="store_true", help="include a cProfile report in the metrics")
+    parser.add_argument("--trace-memory", action="store_true", help="include tracemalloc's peak memory in the metrics")
+    arguments = parser.parse_args()
+    if arguments.serve is not None or arguments.socket is not None:
+        # Keep one facility's distances warm and plan each request in the worker pool
+        service = PlanningService(Facility(shortest_paths=arguments.shortest_paths), arguments.workers)
+        try:
+            asyncio.run(service.serve(arguments.serve, path=arguments.socket))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+        return
+    metrics = None
+    if arguments.metrics is not None or arguments.profile or arguments.trace_memory:
+        metrics = PlanningMetrics(profile=arguments.profile, trace_memory=arguments.trace_memory)
+        metrics.start()
+    facility = Facility(metrics=metrics, shortest_paths=arguments.shortest_paths)
+    if arguments.decompose:
+        facility.route_decomposer = RouteDecomposer(facility.all_distances, arguments.workers, seed=arguments.seed)
+    # Replay a kept plan for the same inputs when there is one
+    plan_cache = None
+    restored = False
+    if arguments.plan_cache is not None:
+        plan_cache = PlanCache(arguments.plan_cache, arguments.plan_cache_mb << 20)
+        fleet = None if arguments.fleet is None else \
+            [[vehicle_type.count, vehicle_type.package_capacity, vehicle_type.weight_capacity,
+              vehicle_type.available_from.strftime("%H:%M"),
+              None if vehicle_type.available_until is None else vehicle_type.available_until.strftime("%H:%M")]
+             for vehicle_type in arguments.fleet]
+        starts = 1 if arguments.fleet is not None else arguments.starts
+        plan_key = PlanCache.key(facility, {"fleet": fleet, "starts": starts,
+                                            "seed": arguments.seed if starts > 1 else None,
+                                            "decompose": arguments.decompose,
+                                            "time_budget": Facility.ROUTE_IMPROVEMENT_SECONDS})
+        with facility.metrics.phase("plan_cache"):
+            restored = plan_cache.restore(plan_key, facility) is not None
+    # Plan the deliveries
+    if not restored:
+        if arguments.fleet is not None:
+            facility.plan_fleet(arguments.fleet)
+        elif arguments.starts > 1:
+            # The counting wrappers cannot be sent to the worker processes, so only the parent's time is measured
+            facility.metrics.detach()
+            with facility.metrics.phase("multistart"):
+                MultiStartPlanner(arguments.starts, arguments.workers, arguments.seed).plan(facility)
+            facility.metrics.attach(facility)
+        else:
+            facility.plan()
+        if plan_cache is not None:
+            try:
+                plan_cache.store(plan_key, RoutePlan.from_facility(facility), facility)
+            except OSError:
+                pass
+    # The wrong package's correct information arrives during the day; repair the plan around it
+    facility.apply_delta(PackageDelta.change_address(9, "410 S State St", "Salt Lake City", 84111),
+                         Facility.ADDRESS_CORRECTION_TIME)
+    if metrics is not None:
+        metrics.stop()
+        if arguments.metrics is None or arguments.metrics == "-":
+            json.dump(metrics.to_dict(), sys.stderr, indent=2)
+            sys.stderr.write("\n")
+        else:
+            metrics.dump(arguments.metrics)
+    if arguments.batch is not None:
+        # Answer the queries, writing every record through one buffered stream
+        queries = BatchQueries(facility, arguments.format)
+        query_file = sys.stdin if arguments.batch == "-" else open(arguments.batch)
+        output = sys.stdout if arguments.output is None else \
+            open(arguments.output, "w", newline="", buffering=BatchQueries.BUFFER_SIZE)
+        try:
+            queries.run(query_file, output)
+        finally:
+            if query_file is not sys.stdin:
+                query_file.close()
+            if output is not sys.stdout:
+                output.close()
+        return
     # Run the UI
-    UserInterface.menu(facility)
+    UserInterface.menu(facility, arguments.page_size)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,243 @@
+from model.package import Package
+import datetime
+import re
+
+
+class PackageConstraints:
+    """A class used to hold the delivery constraints of one package, as parsed from its note.
+
+    **Instance Attributes**
+        *package_id* (int):
+            The ID of the package.
+        *truck_index* (int or None):
+            The index into Facility.all_trucks of the only truck that may carry the package, or None for any truck.
+        *available_at* (datetime or None):
+            The earliest time the package can leave the hub, or None if it is available from the start of the day.
+        *together_with* ({int}):
+            The IDs of the packages the note says must be delivered with this one.
+        *awaiting_correction* (bool):
+            Whether the package's address is known to be wrong until a correction arrives.
+    """
+
+    __slots__ = ("package_id", "truck_index", "available_at", "together_with", "awaiting_correction")
+
+    def __init__(self, package_id: int) -> None:
+        self.package_id = package_id
+        self.truck_index = None
+        self.available_at = None
+        self.together_with = set()
+        self.awaiting_correction = False
+
+
+class ConstraintParser:
+    """A class used to turn free-text package notes into PackageConstraints. The recognized notes are:
+        1) "Can only be on truck N"
+        2) "Delayed on flight---will not arrive to depot until H:MM am/pm"
+        3) "Must be delivered with A, B and C"
+        4) "Wrong address listed", which holds the package at the hub until the correction time
+
+    **Class Attributes**
+        *TRUCK_PATTERN* (Pattern):
+            Matches a truck restriction and captures the truck number.
+        *DELAY_PATTERN* (Pattern):
+            Matches a late arrival and captures the hour, minute and AM/PM.
+        *TOGETHER_PATTERN* (Pattern):
+            Matches a co-delivery requirement and captures the list of package IDs.
+        *WRONG_ADDRESS_PATTERN* (Pattern):
+            Matches a wrong address notice.
+
+    **Instance Attributes**
+        *correction_time* (datetime):
+            When corrected addresses become known.
+
+    **Methods**
+        *__init__* (correction_time (datetime)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *parse* (package (Package)) -> PackageConstraints
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *parse_all* (packages ([Package])) -> ConstraintSet
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+    """
+
+    TRUCK_PATTERN = re.compile(r"can only be on truck\s+(\d+)", re.IGNORECASE)
+    DELAY_PATTERN = re.compile(r"delayed.*until\s+(\d{1,2}):(\d{2})\s*([ap]m)", re.IGNORECASE)
+    TOGETHER_PATTERN = re.compile(r"must be delivered with\s+([\d\s,and]+)", re.IGNORECASE)
+    WRONG_ADDRESS_PATTERN = re.compile(r"wrong address", re.IGNORECASE)
+
+    def __init__(self, correction_time: datetime.datetime) -> None:
+        """*__init__*
+            Creates a parser.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param correction_time: (datetime) When corrected addresses become known; also fixes the day of parsed times
+        :return: None
+        """
+        self.correction_time = correction_time
+
+    def parse(self, package: Package) -> PackageConstraints:
+        """*parse*
+            Reads the constraints out of one package's note. Notes that are not recognized add no constraints.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package: (Package) The package to read
+        :return: (PackageConstraints) The package's constraints
+        """
+        constraints = PackageConstraints(package.package_id)
+        note = package.note
+        truck_match = ConstraintParser.TRUCK_PATTERN.search(note)
+        if truck_match is not None:
+            constraints.truck_index = int(truck_match.group(1)) - 1
+        delay_match = ConstraintParser.DELAY_PATTERN.search(note)
+        if delay_match is not None:
+            hours = int(delay_match.group(1))
+            if delay_match.group(3).lower() == "pm" and hours != 12:
+                hours += 12
+            constraints.available_at = self.correction_time.replace(hour=hours, minute=int(delay_match.group(2)),
+                                                                    second=0)
+        together_match = ConstraintParser.TOGETHER_PATTERN.search(note)
+        if together_match is not None:
+            constraints.together_with = {int(package_id) for package_id in re.findall(r"\d+", together_match.group(1))}
+        if ConstraintParser.WRONG_ADDRESS_PATTERN.search(note) is not None:
+            constraints.awaiting_correction = True
+            if constraints.available_at is None or constraints.available_at < self.correction_time:
+                constraints.available_at = self.correction_time
+        return constraints
+
+    def parse_all(self, packages: [Package]) -> "ConstraintSet":
+        """*parse_all*
+            Reads the constraints of every package and links the co-delivery groups.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param packages: ([Package]) The packages to read
+        :return: (ConstraintSet) The constraints of every package
+        """
+        return ConstraintSet([self.parse(package) for package in packages])
+
+
+class ConstraintSet:
+    """A class used to hold the constraints of every package and the groups of packages that must travel together.
+    "Must be delivered with" is treated as symmetric and transitive, so each group is the connected component of the
+    notes that mention each other, found with a union-find.
+
+    **Methods**
+        *__init__* (constraints ([PackageConstraints])) -> None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *lookup* (package_id (int)) -> PackageConstraints
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *group_of* (package_id (int)) -> [int]
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *groups* () -> [[int]]
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *check_trucks* (truck_count (int)) -> None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+    """
+
+    def __init__(self, constraints: [PackageConstraints]) -> None:
+        """*__init__*
+            Stores the constraints and builds the co-delivery groups.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param constraints: ([PackageConstraints]) The constraints of every package
+        :return: None
+        """
+        self._constraints = {constraint.package_id: constraint for constraint in constraints}
+        parents = {}
+
+        def find(package_id: int) -> int:
+            root = parents.setdefault(package_id, package_id)
+            while root != parents[root]:
+                parents[root] = parents[parents[root]]
+                root = parents[root]
+            return root
+
+        for constraint in constraints:
+            for other_id in constraint.together_with:
+                parents[find(constraint.package_id)] = find(other_id)
+        members = {}
+        for package_id in parents:
+            members.setdefault(find(package_id), []).append(package_id)
+        self._groups = {}
+        for group in members.values():
+            group.sort()
+            for package_id in group:
+                self._groups[package_id] = group
+
+    def lookup(self, package_id: int) -> PackageConstraints:
+        """*lookup*
+            Returns the constraints of a package. A package with no recorded constraints gets an empty set of them.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package
+        :return: (PackageConstraints) The package's constraints
+        """
+        constraints = self._constraints.get(package_id)
+        if constraints is None:
+            constraints = PackageConstraints(package_id)
+            self._constraints[package_id] = constraints
+        return constraints
+
+    def group_of(self, package_id: int) -> [int]:
+        """*group_of*
+            Returns every package that must travel with a package, including the package itself.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package
+        :return: ([int]) The IDs of the group, sorted
+        """
+        return self._groups.get(package_id, [package_id])
+
+    def groups(self) -> [[int]]:
+        """*groups*
+            Lists every co-delivery group of two or more packages.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :return: ([[int]]) The groups, each sorted by ID
+        """
+        unique_groups = {id(group): group for group in self._groups.values()}
+        return sorted(unique_groups.values())
+
+    def check_trucks(self, truck_count: int) -> None:
+        """*check_trucks*
+            Checks that every truck restriction names one of the trucks, raising a ValueError that names the first
+            package restricted to a truck that does not exist.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param truck_count: (int) The number of trucks
+        :return: None
+        """
+        for constraints in self._constraints.values():
+            if constraints.truck_index is not None and not 0 <= constraints.truck_index < truck_count:
+                raise ValueError(f"Package {constraints.package_id} can only be on truck "
+                                 f"{constraints.truck_index + 1}, but there are {truck_count} trucks")
@@ -1,7 +1,25 @@
+from dataStructures.distancematrix import DistanceMatrix
 from dataStructures.hashtable import HashTable
+from dataStructures.neighborindex import NeighborIndex
+from dataStructures.shortestpaths import ShortestPaths
+from model.constraints import ConstraintParser, ConstraintSet
+from model.fleet import FleetLoader, VehicleType
+from model.insertionplanner import InsertionPlanner, InsertionUnit, TruckRoute, clock_miles
+from model.manifest import ManifestReader
+from model.metrics import PlanningMetrics
+from model.packagedelta import PackageDelta
+from model.routedecomposer import RouteDecomposer
+from model.routeevaluator import RouteEvaluator
+from model.routeimprover import RouteImprover
+from model.simulation import DispatchSimulation
+from model.snapshot import FacilitySnapshot
+from model.statustimeline import StatusTimeline
 from model.truck import Truck
 from model.package import Package
+import bisect
 import datetime
+import heapq
+import random
 
 
 class Facility:
@@ -10,224 +28,1045 @@ class Facility:
     **Class Attributes**
         *DEFAULT_EOD* (datetime):
             The default timestamp for the end of the day.
+        *DEFAULT_PACKAGE_FILE* (str):
+            The default path of the package manifest.
+        *DEFAULT_DISTANCE_FILE* (str):
+            The default path of the location distance chart.
+        *ROUTE_IMPROVEMENT_SECONDS* (float):
+            The default time budget for improving each truck's route by local search.
+        *ADDRESS_CORRECTION_TIME* (datetime):
+            When corrections for packages listed with a wrong address become known.
+        *DRIVER_COUNT* (int):
+            The number of drivers. Trucks beyond this many wait at the hub for a driver to return.
+        *ROUTE_REPAIR_SECONDS* (float):
+            The default time budget for improving a route repaired after a late change.
 
     **Instance Attributes**
+        *metrics* (PlanningMetrics):
+            The timings and counts of this facility's planning; disabled unless supplied.
         *all_trucks* ([Truck]):
             The list of all trucks.
         *all_packages* (HashTable(Packages)):
             The list of all packages.
         *all_addresses* ([str]):
             The list of all addresses. Indices match to all_distances.
-        *all_distances* ([[float]]):
-            The list of all distances. Indices match to all_addresses.
+        *all_distances* (DistanceMatrix):
+            The float32 matrix of all distances, with an address to index map. Indices match to all_addresses.
+        *neighbor_index* (NeighborIndex):
+            The sorted nearest neighbor lists used by loader and delivery to pick the next stop.
+        *route_evaluator* (RouteEvaluator):
+            Scores routes over all_distances without stepping through datetimes.
+        *address_packages* ({int: [Package]}):
+            Every package, grouped by the index of its address.
         *unassigned_packages* ([Packages]):
             The list of all packages that have yet to be assigned to a truck.
+        *package_index* (HashTable((Package, Truck or None))):
+            Every package and the truck it is loaded on, or None, by package ID. Kept up to date by assign_package and
+            unassign_package.
+        *package_ids* ([int]):
+            The IDs of all packages, sorted.
+        *driver_count* (int):
+            The number of drivers the trucks were last simulated with; DRIVER_COUNT until then.
+        *route_decomposer* (RouteDecomposer or None):
+            If set, routes long enough to decompose are improved cluster by cluster instead of whole.
+        *shortest_paths* (ShortestPaths or None):
+            If the chart was closed over shortest paths, the closure, whose next hops rebuild the locations driven
+            through between two stops. all_distances is then its closed matrix.
     **Methods**
-        *__init__* () -> (None)
-            - TIME: O(f(x))= n^2
-            - SPACE: O(f(x))= n^2
-        *preload* () -> (None)
-            - TIME: O(f(x))= n^2
+        *__init__* (package_file (str, optional), distance_file (str, optional), use_snapshot (bool, optional),
+            metrics (PlanningMetrics, optional), shortest_paths (bool, optional)) -> (None)
+            - TIME: O(f(x))= n^2, plus closing the chart the first time with shortest_paths
             - SPACE: O(f(x))= n^2
-        *loader* (truck (Truck), remaining_packages ([Package])) -> [Package]
-            - TIME: O(f(x))= n^2
-            - SPACE: O(f(x))= n^2
-        *delivery* (truck: Truck) -> (None)
+        *load_packages* (packages (iterable of Package)) -> (None)
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *read_distances* (distance_file (str)) -> (DistanceMatrix)
             - TIME: O(f(x))= n^2
             - SPACE: O(f(x))= n^2
-        *nearest_location* (current_address_index (int), target_address_indices ([int])) -> (int)
+        *package_constraints* () -> (ConstraintSet)
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *preload* (constraints (ConstraintSet, optional)) -> (None)
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *plan* (rng (Random, optional), time_budget (float, optional)) -> (None)
+            - TIME: O(f(x))= n * t * (k + m), plus the local search bounded by time_budget
+            - SPACE: O(f(x))= n
+        *plan_greedy* (rng (Random, optional), time_budget (float, optional)) -> (None)
+            - TIME: O(f(x))= n^2 log n
+            - SPACE: O(f(x))= n
+        *plan_fleet* (vehicle_types ([VehicleType]), rng (Random, optional), time_budget (float, optional)) -> (None)
+            - TIME: O(f(x))= n log n + n * p to load, plus routing each wave
+            - SPACE: O(f(x))= n
+        *loader* (truck (Truck), remaining_packages ([Package]), rng (Random, optional)) -> [Package]
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *simulate* (trucks ([Truck], optional), route_provider (callable, optional), driver_count (int, optional))
+            -> (datetime or None)
+            - TIME: O(f(x))= (s + p) log t
+            - SPACE: O(f(x))= t
+        *delivery* (truck: Truck, time_budget (float, optional), rng (Random, optional), route ([int], optional))
+            -> (None)
+            - TIME: O(f(x))= n^2 log n
+            - SPACE: O(f(x))= n
+        *plan_route* (truck: Truck, time_budget (float, optional), rng (Random, optional), route ([int], optional))
+            -> ([int])
+            - TIME: O(f(x))= n^2 log n
+            - SPACE: O(f(x))= n
+        *greedy_route* (truck: Truck, rng (Random, optional)) -> ([int])
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *route_deadlines* (truck: Truck) -> ({int: float})
             - TIME: O(f(x))= n
             - SPACE: O(f(x))= n
+        *deliver_route* (truck: Truck, route ([int]), start_position (int, optional), package_ids ({int}, optional))
+            -> (None)
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *assign_package* (truck (Truck), package (Package)) -> (None)
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *unassign_package* (package_id (int)) -> (None)
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *clear_truck* (truck (Truck)) -> (None)
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *find_package* (package_id (int)) -> ((Package, Truck or None) or None)
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *package_truck* (package_id (int)) -> (Truck or None)
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *truck_packages* () -> ([[Package]])
+            - TIME: O(f(x))= n + t
+            - SPACE: O(f(x))= n
+        *status_timeline* () -> (StatusTimeline)
+            - TIME: First call after the trucks are driven: O(f(x))= n log n
+            - TIME: Otherwise: O(f(x))= 1
+            - SPACE: O(f(x))= n
+        *apply_delta* (delta (PackageDelta), at_time (datetime), time_budget (float, optional))
+            -> ({int: (datetime or None, datetime or None)})
+            - TIME: O(f(x))= m * k, for m stops on the affected truck, plus the local search bounded by time_budget
+            - SPACE: O(f(x))= m
+        *update_package_address* (package_id (int), address (str), city (str), zipcode (int)) -> (Package or None)
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *nearest_location* (current_address_index (int), target_address_indices ([int])) -> (int)
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
     """
 
     DEFAULT_EOD: datetime.datetime = datetime.datetime.now().replace(hour=23, minute=59, second=0)
+    DEFAULT_PACKAGE_FILE: str = "dataFiles/PackageInfo.csv"
+    DEFAULT_DISTANCE_FILE: str = "dataFiles/LocationDistanceChart.csv"
+    ROUTE_IMPROVEMENT_SECONDS: float = 1.0
+    ADDRESS_CORRECTION_TIME: datetime.datetime = DEFAULT_EOD.replace(hour=10, minute=20)
+    DRIVER_COUNT: int = 2
+    ROUTE_REPAIR_SECONDS: float = 0.1
 
-    def __init__(self) -> None:
+    def __init__(self, package_file: str = DEFAULT_PACKAGE_FILE, distance_file: str = DEFAULT_DISTANCE_FILE,
+                 use_snapshot: bool = True, metrics: PlanningMetrics = None, shortest_paths: bool = False) -> None:
         """*__init__*
             Parses data from the data files to provide storage for packages, addresses, lists of distances, and trucks.
-            The trucks are not loaded as of yet.
+            The trucks are not loaded as of yet. The parsed data is cached in a binary snapshot beside the distance
+            chart, which later runs load instead of the CSVs until either source file changes. With shortest_paths, the
+            chart is closed over shortest paths before anything is built from it, and the closure is cached beside the
+            chart as well.
 
-            TIME: O(f(x))= n^2
+            TIME: O(f(x))= n^2, plus closing the chart the first time with shortest_paths (see ShortestPaths)
 
             SPACE: O(f(x))= n^2
 
+        :param package_file: (str, optional) The path of the package manifest CSV
+        :param distance_file: (str, optional) The path of the location distance chart CSV
+        :param use_snapshot: (bool, optional) Whether to load from and write to the binary snapshot, and the cached
+            shortest paths
+        :param metrics: (PlanningMetrics, optional) Where to record timings and counts; nothing is recorded if None
+        :param shortest_paths: (bool, optional) Whether to replace every distance by the shortest route along the
+            chart, filling in pairs the chart leaves blank
         :return: (None)
         """
+        self.metrics = PlanningMetrics(enabled=False) if metrics is None else metrics
         # Create the trucks.
         self.all_trucks = []
         count = 0
         while count < 3:
             self.all_trucks.append(Truck())
             count += 1
-        # Read in the package data and create the all_packages HashTable
-        with open("dataFiles/PackageInfo.csv") as source_csv_file:
-            line_count = 0
+        # Load the packages and distances from the binary snapshot when it is still current, otherwise parse the CSVs
+        # and write a new snapshot for the next run
+        with self.metrics.phase("load_files"):
+            snapshot = FacilitySnapshot.open(package_file, distance_file) if use_snapshot else None
+            if snapshot is not None:
+                package_chunks = [snapshot.packages(Facility.DEFAULT_EOD)]
+                self.all_distances = snapshot.distances
+            else:
+                package_chunks = ManifestReader(package_file, Facility.DEFAULT_EOD).chunks()
+                self.all_distances = Facility.read_distances(distance_file)
+            # Insert the package data into the all_packages HashTable a chunk at a time
             self.unassigned_packages = []
+            self.all_packages = HashTable()
+            for package_chunk in package_chunks:
+                for package in package_chunk:
+                    self.all_packages.insert(package.package_id, package)
+                self.unassigned_packages.extend(package_chunk)
+            if use_snapshot and snapshot is None:
+                try:
+                    FacilitySnapshot.save(package_file, distance_file, self.unassigned_packages, self.all_distances)
+                except OSError:
+                    pass
+        self.shortest_paths = None
+        if shortest_paths:
+            with self.metrics.phase("shortest_paths"):
+                cache_path = ShortestPaths.path_for(distance_file) if use_snapshot else None
+                self.shortest_paths = ShortestPaths.load(self.all_distances, cache_path)
+                self.all_distances = self.shortest_paths.distances
+        with self.metrics.phase("build_indexes"):
+            self.all_addresses = self.all_distances.addresses
+            self.neighbor_index = NeighborIndex(self.all_distances)
+            self.route_evaluator = RouteEvaluator(self.all_distances)
+            self._index_packages()
+        self.driver_count = Facility.DRIVER_COUNT
+        self.route_decomposer = None
+        # Built on first use, and dropped whenever a truck is driven again
+        self._status_timeline = None
+        self.metrics.attach(self)
+        return
+
+    def load_packages(self, packages) -> None:
+        """*load_packages*
+            Replaces the facility's packages with another manifest over the same distance chart, so a facility whose
+            distances and neighbor lists are already built can plan a different day. The facility must not have been
+            planned yet.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param packages: (iterable of Package) The packages of the new manifest
+        :return: (None)
+        """
+        self.unassigned_packages = list(packages)
+        self.all_packages = HashTable(len(self.unassigned_packages))
+        for package in self.unassigned_packages:
+            self.all_packages.insert(package.package_id, package)
+        self._index_packages()
+        self._status_timeline = None
+
+    def _index_packages(self) -> None:
+        """*_index_packages*
+            Builds address_packages, package_index and package_ids from unassigned_packages.
+
+            TIME: O(f(x))= n log n
+
+            SPACE: O(f(x))= n
+
+        :return: (None)
+        """
+        # Group the packages by address so that a stop only touches the packages delivered there
+        self.address_packages = {}
+        for package in self.all_packages.values():
+            address_index = self.all_distances.index_of(package.address)
+            self.address_packages.setdefault(address_index, []).append(package)
+        # Index every package by ID with the truck it is on, so lookups and listings never scan the trucks
+        self.package_index = HashTable(len(self.unassigned_packages))
+        for package in self.unassigned_packages:
+            self.package_index.insert(package.package_id, (package, None))
+        self.package_ids = sorted(self.package_index.keys())
+
+    @staticmethod
+    def read_distances(distance_file: str) -> DistanceMatrix:
+        """*read_distances*
+            Parses a location distance chart into a distance matrix. Blank cells are left as None so the matrix can
+            fill them in from the other half of the chart.
+
+            TIME: O(f(x))= n^2
+
+            SPACE: O(f(x))= n^2
+
+        :param distance_file: (str) The path of the distance chart CSV
+        :return: (DistanceMatrix) The matrix of distances between every pair of addresses
+        """
+        with open(distance_file) as source_csv_file:
+            addresses = []
+            rows = []
             for line in source_csv_file:
-                line_count += 1
-                package_data = line.split(",")
-                new_package_id = int(package_data[0])
-                new_package_address = package_data[1]
-                new_package_city = package_data[2]
-                # Skipped state as it is not needed
-                new_package_zipcode = int(package_data[4])
-                # Parse delivery deadline data
-                if package_data[5] != "EOD":
-                    string_time_split_1: [str] = package_data[5].split(':')
-                    string_time_split_2: [str] = string_time_split_1[1].split()
-                    hours = int(string_time_split_1[0])
-                    if string_time_split_2[1] == "PM" and hours != 12:
-                        hours += 12
-                    minutes = int(string_time_split_2[0])
-                    new_package_time_clock = datetime.datetime.now().replace(hour=hours, minute=minutes, second=0)
-                else:
-                    new_package_time_clock = Facility.DEFAULT_EOD
-                # Continue with assignments
-                new_package_weight = float(package_data[6])
-                new_package_note = package_data[7]
-                new_package_note = new_package_note.rstrip()
-                new_package = Package(new_package_id,
-                                      new_package_address,
-                                      new_package_city,
-                                      new_package_zipcode,
-                                      new_package_time_clock,
-                                      new_package_weight,
-                                      new_package_note
-                                      )
-                self.unassigned_packages.append(new_package)
-            self.all_packages = HashTable(line_count)
-            for package in self.unassigned_packages:
-                self.all_packages.insert(package.package_id, package)
-        source_csv_file.close()
-        # Read in the distance data and create the addresses and distances lists
-        with open("dataFiles/LocationDistanceChart.csv") as source_csv_file:
-            self.all_addresses = []
-            self.all_distances = []
-            line_count = 0
-            for line in source_csv_file:
-                line_count += 1
                 line = line.rstrip()
                 split_line = line.split(',')
-                self.all_addresses.append(split_line[0])
+                addresses.append(split_line[0])
                 split_line.pop(0)
                 distances = []
                 for distance in split_line:
-                    distances.append(float(distance))
-                self.all_distances.append(distances)
-        return
+                    distances.append(float(distance) if distance != '' else None)
+                rows.append(distances)
+        return DistanceMatrix.from_rows(addresses, rows)
 
-    def preload(self) -> None:
+    def package_constraints(self) -> ConstraintSet:
+        """*package_constraints*
+            Parses the notes of every package into structured constraints: truck restrictions, co-delivery groups and
+            the earliest time each package can leave the hub.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :return: (ConstraintSet) The constraints of every package
+        """
+        return ConstraintParser(Facility.ADDRESS_CORRECTION_TIME).parse_all(self.all_packages.values())
+
+    def preload(self, constraints: ConstraintSet = None) -> None:
         """*preload*
-            Sifts through the packages and preloads packages into trucks based on:
-                1) package availability (late arrival / wrong address)
-                2) delivery deadline
-                3) notes
+            Sifts through the packages and preloads packages into trucks for the greedy construction, based on:
+                1) co-delivery groups, which go on the first truck unless a member is restricted to another
+                2) truck restrictions
+                3) package availability: packages held for an address correction go on the second truck, which leaves
+                   after a driver returns, and late arriving packages go on the third truck, which waits for them
                 4) addresses matching
+            A ValueError naming the package is raised if a package can only be on a truck that does not exist.
 
-            TIME: 0(f(x))= n^2
+            TIME: 0(f(x))= n
 
-            SPACE: O(f(x))= n^2
+            SPACE: O(f(x))= n
 
+        :param constraints: (ConstraintSet, optional) The parsed package constraints; parsed here if not supplied
         :return: (None)
         """
-        # Preload trucks based on notes and matching addresses
-        delivered_together = [13, 14, 15, 16, 19, 20]
-        for package in self.unassigned_packages.copy():
-            if package.package_id in delivered_together:
-                self.all_trucks[0].package_list.insert(package.package_id, package)
-            elif package.note == "Can only be on truck 2" or package.note == "Wrong address listed":
-                self.all_trucks[1].package_list.insert(package.package_id, package)
-            elif package.note.startswith("Delayed"):
-                self.all_trucks[2].package_list.insert(package.package_id, package)
-                self.all_trucks[2].current_time = datetime.datetime.now().replace(hour=9, minute=5, second=0)
-                self.all_trucks[2].departure_time = self.all_trucks[2].current_time
+        if constraints is None:
+            constraints = self.package_constraints()
+        constraints.check_trucks(len(self.all_trucks))
+        # Preload trucks based on the parsed constraints
+        for package in self.unassigned_packages:
+            package_constraints = constraints.lookup(package.package_id)
+            group = constraints.group_of(package.package_id)
+            group_truck_indices = [constraints.lookup(package_id).truck_index for package_id in group
+                                   if constraints.lookup(package_id).truck_index is not None]
+            if len(group) > 1:
+                truck = self.all_trucks[group_truck_indices[0] if group_truck_indices else 0]
+            elif package_constraints.truck_index is not None:
+                truck = self.all_trucks[package_constraints.truck_index]
+            elif package_constraints.awaiting_correction:
+                truck = self.all_trucks[1]
+            elif package_constraints.available_at is not None:
+                truck = self.all_trucks[2]
+                if truck.departure_time < package_constraints.available_at:
+                    truck.current_time = package_constraints.available_at
+                    truck.departure_time = package_constraints.available_at
+            else:
+                continue
+            self.assign_package(truck, package)
         # Preload packages that match preloaded addresses, but that aren't time restricted
         for truck in self.all_trucks:
-            for loaded_package in truck.package_list.get_values():
-                for unassigned_package in self.unassigned_packages:
-                    if unassigned_package.address == loaded_package.address \
-                            and unassigned_package.deadline == Facility.DEFAULT_EOD \
-                            and truck.package_list.lookup(unassigned_package.package_id) is None:
-                        truck.package_list.insert(unassigned_package.package_id, unassigned_package)
+            loaded_addresses = {loaded_package.address for loaded_package in truck.package_list.values()}
+            for unassigned_package in self.unassigned_packages:
+                if unassigned_package.address in loaded_addresses \
+                        and unassigned_package.deadline == Facility.DEFAULT_EOD \
+                        and unassigned_package.package_id not in truck.package_list \
+                        and constraints.lookup(unassigned_package.package_id).available_at is None:
+                    self.assign_package(truck, unassigned_package)
         # Clear assigned packages from unassigned list
+        self.unassigned_packages[:] = [package for package in self.unassigned_packages
+                                       if self.package_truck(package.package_id) is None]
+
+    def plan(self, rng: random.Random = None, time_budget: float = ROUTE_IMPROVEMENT_SECONDS) -> None:
+        """*plan*
+            Plans the deliveries from the parsed package constraints. The first DRIVER_COUNT trucks are filled by
+            cheapest feasible insertion; the day is then simulated, and each later truck is filled with what did not
+            fit when a driver returns to take it out. A truck's departure is pushed back when that is the cheapest way
+            to carry a late arriving package. Each route is shortened by local search before it is driven. A package
+            that cannot be on time on any truck it may go on is still delivered, late, wherever it adds the fewest
+            miles on the last of those trucks to be planned. Packages that fit on no truck stay in unassigned_packages.
+
+            TIME: O(f(x))= n * t * (k + m), for t trucks, k neighbors and m stops per route, plus the local search
+            bounded by time_budget
+
+            SPACE: O(f(x))= n
+
+        :param rng: (Random, optional) If supplied, packages with the same deadline are inserted in a random order
+        :param time_budget: (float, optional) The most seconds to spend improving each route, 0 to skip it
+        :return: (None)
+        """
+        planner = InsertionPlanner(self.all_distances, self.neighbor_index)
+        pending_units = planner.units(self.unassigned_packages, self.package_constraints(), rng)
+        first_wave = [planner.start(truck, truck_index, truck.departure_time)
+                      for truck_index, truck in enumerate(self.all_trucks[:Facility.DRIVER_COUNT])]
+        pending_units = planner.insert(pending_units, first_wave)
+
+        def insert_late(late_units: [InsertionUnit], routes: [TruckRoute]) -> None:
+            # Units no later truck can take are delivered late rather than not at all
+            nonlocal pending_units
+            late_ids = {id(unit) for unit in late_units}
+            leftover_ids = {id(unit) for unit in planner.insert_late(late_units, routes)}
+            pending_units = [unit for unit in pending_units if id(unit) not in late_ids or id(unit) in leftover_ids]
+
+        later_trucks = self.all_trucks[Facility.DRIVER_COUNT:]
+        insert_late([unit for unit in pending_units if not later_trucks
+                     or unit.truck_index is not None and unit.truck_index < Facility.DRIVER_COUNT], first_wave)
+        for route in first_wave:
+            route.truck.route = self._load_route(route, time_budget)
+        for truck in later_trucks:
+            truck.route = []
+
+        def plan_at_departure(truck: Truck, departure_time: datetime.datetime) -> [int]:
+            # A later truck takes what did not fit, once a driver is back to take it out
+            nonlocal pending_units
+            truck_index = self.all_trucks.index(truck)
+            routes = [planner.start(truck, truck_index, departure_time)]
+            pending_units = planner.insert(pending_units, routes)
+            last_truck = truck is self.all_trucks[-1]
+            insert_late([unit for unit in pending_units if last_truck or unit.truck_index == truck_index], routes)
+            return self._load_route(routes[0], time_budget)
+
+        self.simulate(self.all_trucks, plan_at_departure)
+        self.unassigned_packages[:] = [package for unit in pending_units for package in unit.packages]
+
+    def plan_greedy(self, rng: random.Random = None, time_budget: float = ROUTE_IMPROVEMENT_SECONDS) -> None:
+        """*plan_greedy*
+            Runs the greedy planning pipeline: preload special packages, load the remaining packages based on the
+            nearest neighbor algorithm, then run the package delivery routine. The 2nd truck only leaves the facility
+            after another truck returns, as there are only two drivers, and not before its packages are available.
+
+            TIME: O(f(x))= n^2 log n
+
+            SPACE: O(f(x))= n
+
+        :param rng: (Random, optional) If supplied, loading and routing pick among the few nearest addresses at random
+        :param time_budget: (float, optional) The most seconds to spend improving each route, 0 to skip it
+        :return: (None)
+        """
+        constraints = self.package_constraints()
+        self.preload(constraints)
+        package_list = self.unassigned_packages
+        # Assign remaining packages to trucks
+        package_list = self.loader(self.all_trucks[2], package_list, rng)
+        package_list = self.loader(self.all_trucks[0], package_list, rng)
+        self.loader(self.all_trucks[1], package_list, rng)
+        # Hold each truck until its packages are available, then simulate the day with the 2nd truck dispatched
+        # last, routing each truck when it leaves
         for truck in self.all_trucks:
-            for package in truck.package_list.get_values():
-                if package in self.unassigned_packages:
-                    self.unassigned_packages.remove(package)
+            for package in truck.package_list.values():
+                available_at = constraints.lookup(package.package_id).available_at
+                if available_at is not None and available_at > truck.departure_time:
+                    truck.departure_time = available_at
+            truck.route = []
+        self.simulate([self.all_trucks[0], self.all_trucks[2], self.all_trucks[1]],
+                      lambda truck, departure_time: self.plan_route(truck, time_budget, rng))
+
+    def plan_fleet(self, vehicle_types: [VehicleType], rng: random.Random = None,
+                   time_budget: float = ROUTE_IMPROVEMENT_SECONDS) -> None:
+        """*plan_fleet*
+            Plans the deliveries for a fleet of any size in place of the three trucks: the packages are split into
+            waves across the vehicles by the fleet loader, respecting each vehicle's package and weight capacities and
+            availability window and the deadlines along each wave's route. The day is then simulated with one driver
+            per vehicle: each wave leaves once its vehicle is back from its previous wave, and its route is shortened
+            by local search when it leaves. all_trucks is replaced by one truck per wave, in order of
+            estimated departure. Packages that fit on no vehicle stay in unassigned_packages.
 
-    def loader(self, truck: Truck, remaining_packages: [Package]) -> [Package]:
+            TIME: O(f(x))= n log n + n * (p + c) to load, for p distinct availability times and restrictions and c
+            packages per vehicle, plus routing each wave
+
+            SPACE: O(f(x))= n
+
+        :param vehicle_types: ([VehicleType]) The vehicles of the fleet, by type
+        :param rng: (Random, optional) If supplied, loading breaks deadline ties at random
+        :param time_budget: (float, optional) The most seconds to spend improving each route, 0 to skip it
+        :return: (None)
+        """
+        for truck in self.all_trucks:
+            self.clear_truck(truck)
+        packages = [self.find_package(package_id)[0] for package_id in self.package_ids]
+        fleet_loader = FleetLoader(self.all_distances, self.neighbor_index, vehicle_types)
+        waves, self.unassigned_packages = fleet_loader.partition(packages, self.package_constraints(), rng)
+        self.all_trucks = []
+        wave_routes = {}
+        for truck, packages, route in waves:
+            for package in packages:
+                self.assign_package(truck, package)
+            truck.route = []
+            wave_routes[id(truck)] = route
+            self.all_trucks.append(truck)
+        self.simulate(self.all_trucks,
+                      lambda truck, departure_time: self.plan_route(truck, time_budget, route=wave_routes[id(truck)]),
+                      len(fleet_loader.vehicles))
+
+    def loader(self, truck: Truck, remaining_packages: [Package], rng: random.Random = None) -> [Package]:
         """*loader*
             Takes a truck and the packages remaining to be assigned and uses the nearest location
             function to selectively load them into the truck, then returns any unassigned packages.
+            Every remaining package at a chosen address is loaded at once, while the truck has room.
 
-            TIME: O(f(x))= n^2
+            TIME: O(f(x))= n
 
-            SPACE: O(f(x))= n^2
+            SPACE: O(f(x))= n
 
         :param truck: (Truck) The truck to be loaded with packages
         :param remaining_packages: ([Package]) The list of packages to be loaded
+        :param rng: (Random, optional) If supplied, each address is picked at random from the few nearest
         :return: ([Package]) Leftover packages that did not get loaded
         """
-        # Start at the hub, with the indices for the remaining packages as the targets for the greedy algorithm
+        # Start at the hub, with the addresses of the remaining packages as the targets for the greedy algorithm
         address_index = 0
-        target_address_indices = []
-        for package in truck.package_list.get_values():
-            remaining_packages.append(package)
+        remaining_packages.extend(truck.package_list.values())
+        remaining_package_ids = set()
+        target_address_indices = {}
         for package in remaining_packages:
-            target_address_indices.append(self.all_addresses.index(package.address))
-        # Decide the next stop using a recursive call that either fills the truck or assigns all remaining packages
-        while truck.package_list.item_count < 16 and len(remaining_packages) > 0:
-            address_index = self.nearest_location(address_index, target_address_indices)
-            target_address_indices.remove(address_index)
-            address = self.all_addresses[address_index]
-            for package in remaining_packages:
-                if package.address == address:
-                    if truck.package_list.lookup(package.package_id) is None:
-                        truck.package_list.insert(package.package_id, package)
-                    remaining_packages.remove(package)
-                    break
+            remaining_package_ids.add(package.package_id)
+            target_address_indices[self.all_distances.index_of(package.address)] = None
+        # Visit the nearest address until the truck is full or every remaining package is assigned
+        tour = self.neighbor_index.tour(target_address_indices)
+        while truck.package_list.item_count < truck.package_capacity and len(tour) > 0:
+            address_index = tour.nearest(address_index, rng)
+            tour.remove(address_index)
+            for package in self.address_packages[address_index]:
+                if package.package_id not in remaining_package_ids:
+                    continue
+                if package.package_id not in truck.package_list:
+                    if not truck.has_room(1, package.weight):
+                        break
+                    self.assign_package(truck, package)
+                remaining_package_ids.remove(package.package_id)
         # Remove assigned packages from the remaining packages list and return.
-        for package in truck.package_list.get_values():
-            if package in remaining_packages:
-                remaining_packages.remove(package)
+        remaining_packages[:] = [package for package in remaining_packages
+                                 if package.package_id in remaining_package_ids
+                                 and package.package_id not in truck.package_list]
         return remaining_packages
 
-    def delivery(self, truck: Truck) -> None:
+    def simulate(self, trucks: [Truck] = None, route_provider=None,
+                 driver_count: int = DRIVER_COUNT) -> datetime.datetime or None:
+        """*simulate*
+            Runs the day as a discrete-event simulation with driver_count drivers, stamping every delivery. Each truck
+            is ready at its departure_time and leaves once a driver is free and every truck before it has left.
+
+            TIME: O(f(x))= (s + p) log t, for s stops, p packages and t trucks, plus any route planning
+
+            SPACE: O(f(x))= t
+
+        :param trucks: ([Truck], optional) The trucks in dispatch order; all_trucks by default
+        :param route_provider: (callable, optional) Called as route_provider(truck, departure_time) to route a truck
+            that has no route when it leaves
+        :param driver_count: (int, optional) The number of drivers, DRIVER_COUNT by default
+        :return: (datetime or None) When the last truck returned, or None if no truck left the hub
+        """
+        self._status_timeline = None
+        self.driver_count = driver_count
+        simulation = DispatchSimulation(self.all_distances, self.address_packages, driver_count, route_provider)
+        return simulation.run(self.all_trucks if trucks is None else trucks)
+
+    def _load_route(self, route: TruckRoute, time_budget: float) -> [int]:
+        """*_load_route*
+            Loads the packages of a route built by insertion onto its truck, sets the truck's departure, and returns
+            the route shortened by local search.
+
+            TIME: O(f(x))= n, plus the local search bounded by time_budget
+
+            SPACE: O(f(x))= n
+
+        :param route: (TruckRoute) The route built by insertion
+        :param time_budget: (float) The most seconds to spend improving the route
+        :return: ([int]) The route to drive
+        """
+        truck = route.truck
+        for package in route.packages:
+            self.assign_package(truck, package)
+        truck.departure_time = route.departure_time
+        truck.current_time = route.departure_time
+        return self.plan_route(truck, time_budget, route=route.route())
+
+    def delivery(self, truck: Truck, time_budget: float = ROUTE_IMPROVEMENT_SECONDS,
+                 rng: random.Random = None, route: [int] = None) -> None:
         """*delivery*
-            Iterates through packages on a truck, marks packages as delivered, and issues a timestamp.
+            Plans the route for a truck's packages, then drives it, marking packages as delivered and issuing
+            timestamps.
 
-            TIME: O(f(x))= n^2
+            TIME: O(f(x))= n^2 log n, with the local search bounded by time_budget
 
-            SPACE: O(f(x))= n^2
+            SPACE: O(f(x))= n
 
         :param truck: (Truck) The truck to deliver packages
+        :param time_budget: (float, optional) The most seconds to spend improving the route, 0 to skip it
+        :param rng: (Random, optional) If supplied, the greedy route picks each address at random from the few nearest
+        :param route: ([int], optional) The route to improve and drive instead of the greedy route
         :return: (None)
         """
+        self.deliver_route(truck, self.plan_route(truck, time_budget, rng, route))
+
+    def plan_route(self, truck: Truck, time_budget: float = ROUTE_IMPROVEMENT_SECONDS, rng: random.Random = None,
+                   route: [int] = None) -> [int]:
+        """*plan_route*
+            Plans the route for a truck's packages with the greedy algorithm, unless a route is supplied, and shortens
+            it by local search, with the deadlines measured from the truck's current time. With a route_decomposer,
+            long routes are shortened cluster by cluster in parallel.
+
+            TIME: O(f(x))= n^2 log n, with the local search bounded by time_budget
+
+            SPACE: O(f(x))= n
+
+        :param truck: (Truck) The truck to route
+        :param time_budget: (float, optional) The most seconds to spend improving the route, 0 to skip it
+        :param rng: (Random, optional) If supplied, the greedy route picks each address at random from the few nearest
+        :param route: ([int], optional) The route to improve instead of the greedy route
+        :return: ([int]) The address indices in visiting order, starting and ending at the hub
+        """
+        if route is None:
+            route = self.greedy_route(truck, rng)
+        if time_budget > 0:
+            with self.metrics.phase("improve_route"):
+                improver = RouteImprover(self.all_distances) if self.route_decomposer is None \
+                    else self.route_decomposer
+                route = improver.improve(route, self.route_deadlines(truck), time_budget)
+        return route
+
+    def greedy_route(self, truck: Truck, rng: random.Random = None) -> [int]:
+        """*greedy_route*
+            Orders the addresses of a truck's packages by repeatedly driving to the nearest address not yet visited.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param truck: (Truck) The truck whose packages are to be routed
+        :param rng: (Random, optional) If supplied, each address is picked at random from the few nearest
+        :return: ([int]) The address indices in visiting order, starting and ending at the hub
+        """
         # Set the current index to the hub and determine the next address, then launch a while loop that ends when the
-        # truck is out of boxes. Mark delivery time and delivery status as well.
+        # truck has visited every address it holds packages for.
         current_address_index = 0
-        target_address_list = []
-        for package in truck.package_list.get_values():
-            target_address_list.append(self.all_addresses.index(package.address))
-        count = 0
-        while count < truck.package_list.item_count:
-            count += 1
-            next_address_index = self.nearest_location(current_address_index, target_address_list)
-            distance = self.all_distances[current_address_index][next_address_index]
-            seconds_travelling = distance / (Truck.MILES_PER_HOUR / 60 / 60)
-            truck.miles_traveled += distance
-            truck.current_time = truck.current_time + datetime.timedelta(seconds=seconds_travelling)
-            current_address_index = next_address_index
-            target_address_list.remove(next_address_index)
-            for package in truck.package_list.get_values():
-                if package.address == self.all_addresses[current_address_index]:
-                    package.delivery_time_stamp = truck.current_time
+        route = [current_address_index]
+        target_address_list = {}
+        for package in truck.package_list.values():
+            target_address_list[self.all_distances.index_of(package.address)] = None
+        tour = self.neighbor_index.tour(target_address_list)
+        while len(tour) > 0:
+            current_address_index = tour.nearest(current_address_index, rng)
+            tour.remove(current_address_index)
+            route.append(current_address_index)
+        route.append(0)
+        return route
+
+    def route_deadlines(self, truck: Truck) -> {int: float}:
+        """*route_deadlines*
+            Converts the deadlines of a truck's packages into the most miles the truck may drive, from its current time,
+            before reaching each address. An address with several packages takes the earliest deadline.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param truck: (Truck) The truck whose packages are to be routed
+        :return: ({int: float}) The mileage deadline of each address index
+        """
+        deadlines = {}
+        for package in truck.package_list.values():
+            address_index = self.all_distances.index_of(package.address)
+            miles = (package.deadline - truck.current_time).total_seconds() * Truck.MILES_PER_HOUR / 60 / 60
+            if miles < deadlines.get(address_index, miles + 1):
+                deadlines[address_index] = miles
+        return deadlines
+
+    def deliver_route(self, truck: Truck, route: [int], start_position: int = 0, package_ids: {int} = None) -> None:
+        """*deliver_route*
+            Drives a truck along a route, marking each package delivered with a timestamp as its address is reached.
+            A route that has been repaired on the road is driven again from the start, but only the stops after
+            start_position, and only the packages in package_ids, get new timestamps. Each package is stamped at the
+            first stop at its address.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param truck: (Truck) The truck to deliver packages
+        :param route: ([int]) The address indices in visiting order, starting and ending at the hub
+        :param start_position: (int, optional) The position in the route after which packages are stamped
+        :param package_ids: ({int}, optional) The packages to stamp; every package on the truck if not supplied
+        :return: (None)
+        """
+        truck.route = route
+        self._status_timeline = None
+        if len(route) < 2:
+            return
+        # Score the whole route in one pass, then only convert to datetimes at the stops
+        evaluation = self.route_evaluator.evaluate([route])
+        departure_time = truck.current_time
+        stamped_package_ids = set()
+        for position in range(start_position + 1, len(route) - 1):
+            arrival_time = departure_time + datetime.timedelta(minutes=evaluation.arrival_minutes[0][position - 1])
+            for package in self.address_packages.get(route[position], ()):
+                if package.package_id in truck.package_list and package.package_id not in stamped_package_ids \
+                        and (package_ids is None or package.package_id in package_ids):
+                    package.delivery_time_stamp = arrival_time
                     package.delivery_status = True
-        # Add in returning to the hub from the last address.
-        distance = self.all_distances[current_address_index][0]
-        seconds_travelling = distance / (Truck.MILES_PER_HOUR / 60 / 60)
-        truck.miles_traveled += distance
-        truck.current_time = truck.current_time + datetime.timedelta(seconds=seconds_travelling)
+                    stamped_package_ids.add(package.package_id)
+        truck.miles_traveled += evaluation.total_miles[0]
+        truck.current_time = departure_time + datetime.timedelta(minutes=evaluation.arrival_minutes[0][-1])
+
+    def assign_package(self, truck: Truck, package: Package) -> None:
+        """*assign_package*
+            Loads a package onto a truck and records it in package_index.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param truck: (Truck) The truck to load
+        :param package: (Package) The package to load
+        :return: (None)
+        """
+        truck.package_list.insert(package.package_id, package)
+        self.package_index.insert(package.package_id, (package, truck))
+
+    def unassign_package(self, package_id: int) -> None:
+        """*unassign_package*
+            Takes a package off the truck it is loaded on, if any, and records that in package_index.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package
+        :return: (None)
+        """
+        entry = self.package_index.lookup(package_id)
+        if entry is None or entry[1] is None:
+            return
+        entry[1].package_list.remove(package_id)
+        self.package_index.insert(package_id, (entry[0], None))
+
+    def clear_truck(self, truck: Truck) -> None:
+        """*clear_truck*
+            Takes every package off a truck.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param truck: (Truck) The truck to empty
+        :return: (None)
+        """
+        for package in truck.package_list.get_values():
+            self.unassign_package(package.package_id)
+
+    def find_package(self, package_id: int) -> (Package, Truck or None) or None:
+        """*find_package*
+            Finds a package and the truck it is loaded on.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package
+        :return: ((Package, Truck or None) or None) The package and its truck, or None if there is no such package
+        """
+        return self.package_index.lookup(package_id)
+
+    def package_truck(self, package_id: int) -> Truck or None:
+        """*package_truck*
+            Finds the truck a package is loaded on.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package
+        :return: (Truck or None) The truck, or None if the package is not on a truck
+        """
+        entry = self.package_index.lookup(package_id)
+        return None if entry is None else entry[1]
+
+    def truck_packages(self) -> [[Package]]:
+        """*truck_packages*
+            Lists the packages on each truck in order of package ID, in one pass over package_ids.
+
+            TIME: O(f(x))= n + t, for n packages and t trucks
+
+            SPACE: O(f(x))= n
+
+        :return: ([[Package]]) The packages on each truck, in the order of all_trucks
+        """
+        truck_positions = {id(truck): position for position, truck in enumerate(self.all_trucks)}
+        packages = [[] for _ in self.all_trucks]
+        for package_id in self.package_ids:
+            package, truck = self.package_index.lookup(package_id)
+            if truck is not None:
+                packages[truck_positions[id(truck)]].append(package)
+        return packages
+
+    def status_timeline(self) -> StatusTimeline:
+        """*status_timeline*
+            Returns the status timeline of the trucks as they were last driven, building it if a truck has been driven
+            since it was last built.
+
+            TIME:
+                - First call after the trucks are driven: O(f(x))= n log n
+                - Otherwise: O(f(x))= 1
+
+            SPACE: O(f(x))= n
+
+        :return: (StatusTimeline) The departure and delivery instants of every package on a truck
+        """
+        if self._status_timeline is None:
+            self._status_timeline = StatusTimeline(self.all_trucks)
+        return self._status_timeline
+
+    def apply_delta(self, delta: PackageDelta, at_time: datetime.datetime,
+                    time_budget: float = ROUTE_REPAIR_SECONDS) -> {int: (datetime.datetime, datetime.datetime)}:
+        """*apply_delta*
+            Applies a late change to an existing plan. Only the truck carrying the package is replanned, and only the
+            part of its route it has not driven yet at at_time: the stop it is at or headed to stays fixed and the rest
+            is repaired. A new package goes on the truck, not yet departed, where it adds the fewest miles, or stays
+            unassigned if there is none. A truck that was waiting for the replanned truck's driver leaves later if the
+            driver is back later, and so on down the chain.
+
+            TIME: O(f(x))= m * k, for m stops on the affected truck, plus the local search bounded by time_budget
+
+            SPACE: O(f(x))= m
+
+        :param delta: (PackageDelta) The change
+        :param at_time: (datetime) When the change becomes known
+        :param time_budget: (float, optional) The most seconds to spend improving the repaired route, 0 to skip it
+        :return: ({int: (datetime or None, datetime or None)}) The old and new delivery time of every package whose
+            delivery time changed, with None for a package that was or is no longer going to be delivered
+        """
+        package = self.all_packages.lookup(delta.package_id)
+        if delta.kind == PackageDelta.ADD:
+            if package is not None:
+                raise ValueError(f"Package {delta.package_id} already exists")
+            package = delta.package
+            # An unknown address raises before anything is changed
+            address_index = self.all_distances.index_of(package.address)
+            self.all_packages.insert(package.package_id, package)
+            self.address_packages.setdefault(address_index, []).append(package)
+            self.package_index.insert(package.package_id, (package, None))
+            bisect.insort(self.package_ids, package.package_id)
+            truck = self._truck_for_new_package(package, at_time)
+            if truck is None:
+                self.unassigned_packages.append(package)
+                return {package.package_id: (None, None)}
+            self.assign_package(truck, package)
+            return self._repair_route(truck, at_time, package, time_budget)
+        if package is None:
+            raise ValueError(f"There is no package {delta.package_id}")
+        truck = self.package_truck(package.package_id)
+        if truck is not None and Facility._delivered_by(package, at_time):
+            raise ValueError(f"Package {package.package_id} was delivered at {package.delivery_time_stamp:%H:%M}")
+        if delta.kind == PackageDelta.REMOVE:
+            self.all_packages.remove(package.package_id)
+            self.address_packages[self.all_distances.index_of(package.address)].remove(package)
+            package.delivery_status = False
+            if truck is not None:
+                self.unassign_package(package.package_id)
+            self.package_index.remove(package.package_id)
+            del self.package_ids[bisect.bisect_left(self.package_ids, package.package_id)]
+            if truck is None:
+                self.unassigned_packages.remove(package)
+                return {}
+            old_time_stamp = package.delivery_time_stamp
+            changes = self._repair_route(truck, at_time, None, time_budget)
+            changes[package.package_id] = (old_time_stamp, None)
+            return changes
+        if delta.kind == PackageDelta.CHANGE_ADDRESS:
+            self.update_package_address(package.package_id, delta.address, delta.city, delta.zipcode)
+        elif delta.kind == PackageDelta.CHANGE_DEADLINE:
+            package.deadline = delta.deadline
+        else:
+            raise ValueError(f"Unknown delta kind {delta.kind!r}")
+        if truck is None:
+            return {}
+        return self._repair_route(truck, at_time, package, time_budget)
+
+    def _truck_for_new_package(self, package: Package, at_time: datetime.datetime) -> Truck or None:
+        """*_truck_for_new_package*
+            Picks the truck for a package that arrives during the day: among the trucks still at the hub with room
+            for it, and allowed by its note, the one whose route it lengthens the least.
+
+            TIME: O(f(x))= n, for n stops on all trucks
+
+            SPACE: O(f(x))= 1
+
+        :param package: (Package) The new package
+        :param at_time: (datetime) When the package arrives
+        :return: (Truck or None) The truck, or None if no truck can take it
+        """
+        constraints = ConstraintParser(Facility.ADDRESS_CORRECTION_TIME).parse(package)
+        address_index = self.all_distances.index_of(package.address)
+        best_truck = None
+        best_detour = None
+        for truck_index, truck in enumerate(self.all_trucks):
+            if truck.departure_time < at_time or not truck.has_room(1, package.weight):
+                continue
+            if constraints.truck_index is not None and constraints.truck_index != truck_index:
+                continue
+            if constraints.available_at is not None and constraints.available_at > truck.departure_time:
+                continue
+            route = truck.route if len(truck.route) >= 2 else [0, 0]
+            detour = min(self.all_distances.distance(route[position - 1], address_index)
+                         + self.all_distances.distance(address_index, route[position])
+                         - self.all_distances.distance(route[position - 1], route[position])
+                         for position in range(1, len(route)))
+            if best_detour is None or detour < best_detour:
+                best_truck = truck
+                best_detour = detour
+        return best_truck
+
+    def _repair_route(self, truck: Truck, at_time: datetime.datetime, changed_package: Package or None,
+                      time_budget: float) -> {int: (datetime.datetime, datetime.datetime)}:
+        """*_repair_route*
+            Rebuilds the part of a truck's route that is still ahead of it at at_time. The stops still to be visited
+            keep their order, the changed package is put in by cheapest feasible insertion, the result is improved by
+            local search, and the truck's packages are stamped again from the fixed stop on.
+
+            TIME: O(f(x))= m * k, for m stops on the truck, plus the local search bounded by time_budget
+
+            SPACE: O(f(x))= m
+
+        :param truck: (Truck) The truck to repair
+        :param at_time: (datetime) When the change becomes known
+        :param changed_package: (Package or None) The package that was added or changed, or None for a removal
+        :param time_budget: (float) The most seconds to spend improving the repaired route
+        :return: ({int: (datetime or None, datetime or None)}) The old and new delivery time of every changed package
+        """
+        route = truck.route if len(truck.route) >= 2 else [0, 0]
+        # Find the stop the truck is at or headed to; before departure that is the hub
+        anchor_position = 0
+        anchor_time = truck.departure_time
+        if at_time > truck.departure_time:
+            arrival_minutes = self.route_evaluator.evaluate([route]).arrival_minutes[0]
+            anchor_position = len(route) - 2
+            for position in range(1, len(route) - 1):
+                if truck.departure_time + datetime.timedelta(minutes=arrival_minutes[position - 1]) > at_time:
+                    anchor_position = position
+                    break
+            if anchor_position > 0:
+                anchor_time = truck.departure_time + datetime.timedelta(minutes=arrival_minutes[anchor_position - 1])
+        anchor_index = route[anchor_position]
+        old_time_stamps = {package.package_id: package.delivery_time_stamp if package.delivery_status else None
+                           for package in truck.package_list.values()}
+        # The packages still to deliver past the fixed stop
+        pending_package_ids = set()
+        for package in truck.package_list.values():
+            if package is changed_package or (not Facility._delivered_by(package, at_time) and
+                                              (anchor_position == 0
+                                               or self.all_distances.index_of(package.address) != anchor_index)):
+                pending_package_ids.add(package.package_id)
+        # Keep the remaining stops in their current order, then insert the changed package's stop, earliest deadline
+        # first
+        changed_index = self.all_distances.index_of(changed_package.address) if changed_package is not None else -1
+        planner = InsertionPlanner(self.all_distances, self.neighbor_index)
+        repair = planner.start(truck, self.all_trucks.index(truck), anchor_time, anchor_index)
+        placed_package_ids = set()
+        for stop in route[anchor_position + 1:-1]:
+            if stop == changed_index:
+                continue
+            for package in self.address_packages.get(stop, ()):
+                if package.package_id in pending_package_ids and package is not changed_package:
+                    position = repair.positions.get(stop, len(repair.stops))
+                    repair.insert(package, stop, clock_miles(package.deadline), position, 0.0)
+                    placed_package_ids.add(package.package_id)
+        unplaced_packages = [self.all_packages.lookup(package_id)
+                             for package_id in pending_package_ids - placed_package_ids]
+        for package in sorted(unplaced_packages, key=lambda unplaced_package: unplaced_package.deadline):
+            address_index = self.all_distances.index_of(package.address)
+            deadline = clock_miles(package.deadline)
+            insertion = repair.evaluate(address_index, deadline, 0.0, range(len(repair.stops) + 1))
+            if insertion is None:
+                # The deadline cannot be met, so deliver as early as the other stops' deadlines allow
+                insertion = next(filter(None, (repair.evaluate(address_index, float("inf"), 0.0, [position])
+                                               for position in range(len(repair.stops) + 1))),
+                                 (0.0, len(repair.stops), 0.0))
+            repair.insert(package, address_index, deadline, insertion[1], 0.0)
+        suffix = repair.route()
+        if time_budget > 0:
+            deadlines = {stop: deadline - repair.start for stop, deadline in zip(repair.stops, repair.deadlines)}
+            suffix = RouteImprover(self.all_distances).improve(suffix, deadlines, time_budget)
+        # Drive the repaired route, stamping only the packages past the fixed stop
+        truck.current_time = truck.departure_time
+        truck.miles_traveled = 0.0
+        self.deliver_route(truck, route[:anchor_position + 1] + suffix[1:], anchor_position, pending_package_ids)
+        changes = {}
+        for package in truck.package_list.values():
+            old_time_stamp = old_time_stamps.get(package.package_id)
+            if old_time_stamp != package.delivery_time_stamp:
+                changes[package.package_id] = (old_time_stamp, package.delivery_time_stamp)
+        changes.update(self._delay_dependents(at_time))
+        return changes
+
+    def _delay_dependents(self, at_time: datetime.datetime) -> {int: (datetime.datetime, datetime.datetime)}:
+        """*_delay_dependents*
+            Hands out the drivers again after a route was repaired, in the order the trucks left the hub. A truck still
+            at the hub at at_time leaves once a driver is back, and for a fleet once its vehicle is back from its
+            previous load, but never earlier than it was to leave; a truck that is held back is driven again, and its
+            later return may hold back the next one.
+
+            TIME: O(f(x))= t log t + m, for t trucks and m stops on the trucks held back
+
+            SPACE: O(f(x))= t
+
+        :param at_time: (datetime) When the change becomes known; trucks that left by then are not held back
+        :return: ({int: (datetime, datetime)}) The old and new delivery time of every package that was held back
+        """
+        trucks = sorted((truck for truck in self.all_trucks if len(truck.route) >= 3),
+                        key=lambda truck: truck.departure_time)
+        if not trucks:
+            return {}
+        free_drivers = [trucks[0].departure_time] * self.driver_count
+        vehicle_returns = {}
+        changes = {}
+        for truck in trucks:
+            departure_time = max(heapq.heappop(free_drivers),
+                                 vehicle_returns.get(truck.vehicle_index, truck.departure_time))
+            if truck.departure_time > at_time and departure_time > truck.departure_time:
+                old_time_stamps = {package.package_id: package.delivery_time_stamp
+                                   for package in truck.package_list.values()}
+                truck.departure_time = departure_time
+                truck.current_time = departure_time
+                truck.miles_traveled = 0.0
+                self.deliver_route(truck, truck.route)
+                for package in truck.package_list.values():
+                    changes[package.package_id] = (old_time_stamps[package.package_id], package.delivery_time_stamp)
+            heapq.heappush(free_drivers, truck.current_time)
+            if truck.vehicle_index is not None:
+                vehicle_returns[truck.vehicle_index] = truck.current_time
+        return changes
+
+    @staticmethod
+    def _delivered_by(package: Package, at_time: datetime.datetime) -> bool:
+        """*_delivered_by*
+            Checks whether a package has been delivered by a time. A package on a truck that has not been driven keeps
+            its default time stamp, so only a package marked delivered counts.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package: (Package) The package
+        :param at_time: (datetime) The time to check
+        :return: (bool) True if the package was delivered at or before at_time
+        """
+        return package.delivery_status and package.delivery_time_stamp <= at_time
+
+    def update_package_address(self, package_id: int, address: str, city: str, zipcode: int) -> Package or None:
+        """*update_package_address*
+            Corrects the address of a package and moves it to the matching address group.
+
+            TIME: O(f(x))= n, where n is the number of packages at the old address
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package to correct
+        :param address: (str) The corrected street address
+        :param city: (str) The corrected city
+        :param zipcode: (int) The corrected zipcode
+        :return: (Package or None) The corrected package, or None if no package has that ID
+        """
+        package = self.all_packages.lookup(package_id)
+        if package is None:
+            return None
+        new_address_index = self.all_distances.index_of(address)
+        self.address_packages[self.all_distances.index_of(package.address)].remove(package)
+        self.address_packages.setdefault(new_address_index, []).append(package)
+        package.address = address
+        package.city = city
+        package.zipcode = zipcode
+        return package
 
     def nearest_location(self, current_address_index: int, target_address_indices: [int]) -> int:
         """*nearest_location*
@@ -235,18 +1074,11 @@ class Facility:
 
             TIME: O(f(x))= n
 
-            SPACE: O(f(x))= n
+            SPACE: O(f(x))= 1
 
         :param current_address_index: (int) The index which of the current address
         :param target_address_indices: ([int]) The list of indices which are valid targets for the next node
         :return: (int) The index of the next node
         """
-        # Simple greedy algorithm.
-        lowest_distance = 999.9
-        lowest_distance_index = -1
-        for index in target_address_indices:
-            if self.all_distances[current_address_index][index] < lowest_distance:
-                lowest_distance = self.all_distances[current_address_index][index]
-                lowest_distance_index = index
-        return lowest_distance_index
-
+        # Simple greedy algorithm, with the minimum taken over the matrix row.
+        return self.all_distances.nearest(current_address_index, target_address_indices)
@@ -0,0 +1,479 @@
+from collections import deque
+from dataStructures.distancematrix import DistanceMatrix
+from dataStructures.neighborindex import NeighborIndex
+from model.constraints import ConstraintSet
+from model.insertionplanner import InsertionPlanner, InsertionUnit, TruckRoute, clock_miles
+from model.package import Package
+from model.routeimprover import RouteImprover
+from model.truck import Truck
+import datetime
+import heapq
+import math
+import random
+
+
+class VehicleType:
+    """A class used to describe a group of identical vehicles in a fleet: how many there are, what each one carries and
+    when it can be on the road. A type is written on the command line as COUNTxPACKAGES[/KG][@HH:MM-HH:MM], e.g. "3x16"
+    for three 16 package trucks, or "20x40/800@07:00-17:30" for twenty vans of 40 packages and 800 kg that leave no
+    earlier than 7:00 and are back by 5:30 pm.
+
+    **Instance Attributes**
+        *count* (int):
+            The number of vehicles of this type.
+        *package_capacity* (int):
+            The number of packages each vehicle carries.
+        *weight_capacity* (float or None):
+            The total package weight each vehicle carries, in kg, or None for no limit.
+        *available_from* (datetime):
+            The earliest time a vehicle can leave the hub.
+        *available_until* (datetime or None):
+            The time a vehicle must be back at the hub, or None for no limit.
+
+    **Methods**
+        *__init__* (count (int), package_capacity (int, optional), weight_capacity (float, optional),
+            available_from (datetime, optional), available_until (datetime, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *parse* (spec (str)) -> VehicleType
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+    """
+
+    __slots__ = ("count", "package_capacity", "weight_capacity", "available_from", "available_until")
+
+    def __init__(self, count: int, package_capacity: int = Truck.MAX_PACKAGES, weight_capacity: float = None,
+                 available_from: datetime.datetime = Truck.DEPARTURE_TIME,
+                 available_until: datetime.datetime = None) -> None:
+        """*__init__*
+            Creates a vehicle type.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param count: (int) The number of vehicles of this type
+        :param package_capacity: (int, optional) The number of packages each vehicle carries
+        :param weight_capacity: (float, optional) The total package weight each vehicle carries, no limit if None
+        :param available_from: (datetime, optional) The earliest time a vehicle can leave the hub
+        :param available_until: (datetime, optional) The time a vehicle must be back at the hub, no limit if None
+        :return: None
+        """
+        if count < 1 or package_capacity < 1:
+            raise ValueError("A vehicle type needs at least one vehicle with room for at least one package")
+        if available_until is not None and available_until <= available_from:
+            raise ValueError("A vehicle's availability window must end after it starts")
+        self.count = count
+        self.package_capacity = package_capacity
+        self.weight_capacity = weight_capacity
+        self.available_from = available_from
+        self.available_until = available_until
+
+    @staticmethod
+    def parse(spec: str) -> "VehicleType":
+        """*parse*
+            Parses a vehicle type written as COUNTxPACKAGES[/KG][@HH:MM-HH:MM], with the times on a 24 hour clock.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param spec: (str) The vehicle type
+        :return: (VehicleType) The parsed vehicle type
+        """
+        sizes, _, window = spec.strip().partition("@")
+        sizes, _, weight = sizes.partition("/")
+        count, _, packages = sizes.lower().partition("x")
+        try:
+            available_from = Truck.DEPARTURE_TIME
+            available_until = None
+            if window:
+                start, end = window.split("-")
+                available_from = VehicleType._time_of_day(start)
+                available_until = VehicleType._time_of_day(end)
+            return VehicleType(int(count), int(packages) if packages else Truck.MAX_PACKAGES,
+                               float(weight) if weight else None, available_from, available_until)
+        except ValueError as error:
+            raise ValueError(f"Invalid vehicle type {spec!r}: {error}") from None
+
+    @staticmethod
+    def _time_of_day(text: str) -> datetime.datetime:
+        """*_time_of_day*
+            Parses a time written as HH:MM on a 24 hour clock into a time on the day being planned.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param text: (str) The time
+        :return: (datetime) The time on the day being planned
+        """
+        time = datetime.datetime.strptime(text.strip(), "%H:%M")
+        return Truck.DEPARTURE_TIME.replace(hour=time.hour, minute=time.minute)
+
+
+class _UnitPool:
+    """The units that share one availability time and truck restriction, most urgent first, with a nearest neighbor tour
+    over their first addresses and, for each address, the units waiting there in insertion order."""
+
+    __slots__ = ("available", "truck_index", "queue", "tour", "waiting")
+
+    def __init__(self, available: float, truck_index: int or None, units: [InsertionUnit],
+                 neighbor_index: NeighborIndex) -> None:
+        self.available = available
+        self.truck_index = truck_index
+        self.queue = deque(units)
+        self.waiting = {}
+        for unit in units:
+            self.waiting.setdefault(unit.address_indices[0], deque()).append(unit)
+        self.tour = neighbor_index.tour([unit.address_indices[0] for unit in units])
+
+    def pending(self, loaded: set):
+        # The units not yet loaded, most urgent first; loaded units at the front are dropped for good
+        while self.queue and id(self.queue[0]) in loaded:
+            self.queue.popleft()
+        return (unit for unit in self.queue if id(unit) not in loaded)
+
+    def take(self, unit: InsertionUnit) -> None:
+        address_index = unit.address_indices[0]
+        self.tour.remove(address_index)
+        waiting = self.waiting[address_index]
+        if waiting[0] is unit:
+            waiting.popleft()
+        else:
+            waiting.remove(unit)
+
+
+class _Wave:
+    """One trip of one vehicle while its load is being gathered: the route its units have been inserted into so far, the
+    address of the unit added last, which the wave grows from, and once it is loaded, the shortened route it is handed
+    over with."""
+
+    __slots__ = ("vehicle_index", "route", "units", "last_index", "path")
+
+    def __init__(self, vehicle_index: int, route: TruckRoute) -> None:
+        self.vehicle_index = vehicle_index
+        self.route = route
+        self.units = []
+        self.last_index = 0
+        self.path = None
+
+
+class FleetLoader:
+    """A class used to split a day's packages across a fleet of vehicles, each of which may return to the hub and go
+    out again in several waves. The packages are grouped into insertion units (see InsertionPlanner.units), so
+    co-delivery groups stay together and every unit knows its deadline, availability and truck restriction. Loading is
+    cluster first, route second, in one pass:
+        1) the vehicle free earliest seeds a wave with the most urgent unit not yet loaded that it may carry and that
+           fits it, out and back within its availability window. Units available by the time the vehicle is free come
+           first, so it does not sit at the hub waiting for a late package while others are ready. The wave leaves
+           once the vehicle is back and the seed is available
+        2) the wave grows from the unit added last to the nearest waiting unit it may carry, found through nearest
+           neighbor tours, which is inserted into the wave's route where it adds the fewest miles; growing stops at
+           the first unit that would pass the vehicle's package or weight capacity, leave a package on the route with
+           no slack to reach its address by its deadline, or bring the vehicle back after its availability window
+           closes. A package that could not be on time even driven straight from the hub does not hold the route back
+        3) the waiting units that would be late if left for the vehicle's next wave are then offered to the wave, most
+           urgent first
+        4) the wave's route is shortened by local search, and the vehicle is free again when the wave is estimated to
+           be back, driving the shortened route from when it leaves
+
+    A vehicle that no unit left fits, by size or by its window, is done for the day, and units no vehicle takes are
+    left over. The tours query the shared neighbor lists, so each unit is found in amortized constant time.
+
+    Each wave is handed over with its shortened route, which never misses a deadline its inserted route met, so the
+    deadlines checked while growing it hold as long as the wave leaves by its estimated departure. The estimate is not
+    when the wave leaves: its truck only carries the earliest it may leave, once the vehicle's window opens and its
+    packages are available, and the simulation holds it until the vehicle's previous wave is back (see
+    Facility.plan_fleet). As the routes are only shortened afterwards, a vehicle is normally back no later than
+    estimated.
+
+    **Class Attributes**
+        *IMPROVEMENT_SECONDS* (float):
+            The most seconds spent shortening each wave's route while loading.
+
+    **Instance Attributes**
+        *distances* (DistanceMatrix):
+            The distances between addresses.
+        *neighbor_index* (NeighborIndex):
+            The nearest neighbor lists the tours query.
+        *vehicles* ([VehicleType]):
+            The type of each vehicle in the fleet; a vehicle's position in this list is its vehicle index.
+
+    **Methods**
+        *__init__* (distances (DistanceMatrix), neighbor_index (NeighborIndex), vehicle_types ([VehicleType])) -> None
+            - TIME: O(f(x))= v, for v vehicles
+            - SPACE: O(f(x))= v
+        *partition* (packages ([Package]), constraints (ConstraintSet), rng (Random, optional))
+            -> ([(Truck, [Package], [int])], [Package])
+            - TIME: O(f(x))= n log n + n * (p + c), for p distinct availability times and restrictions and c packages
+              per vehicle, plus the local search on each wave, bounded by IMPROVEMENT_SECONDS
+            - SPACE: O(f(x))= n
+    """
+
+    IMPROVEMENT_SECONDS: float = 0.05
+
+    def __init__(self, distances: DistanceMatrix, neighbor_index: NeighborIndex, vehicle_types: [VehicleType]) -> None:
+        """*__init__*
+            Creates a loader for a fleet.
+
+            TIME: O(f(x))= v, for v vehicles
+
+            SPACE: O(f(x))= v
+
+        :param distances: (DistanceMatrix) The distances between addresses
+        :param neighbor_index: (NeighborIndex) The nearest neighbor lists of the same matrix
+        :param vehicle_types: ([VehicleType]) The vehicles of the fleet, by type
+        :return: None
+        """
+        self.distances = distances
+        self.neighbor_index = neighbor_index
+        self.vehicles = [vehicle_type for vehicle_type in vehicle_types for _ in range(vehicle_type.count)]
+        self._planner = InsertionPlanner(distances, neighbor_index)
+        self._improver = RouteImprover(distances)
+
+    def partition(self, packages: [Package], constraints: ConstraintSet,
+                  rng: random.Random = None) -> ([(Truck, [Package], [int])], [Package]):
+        """*partition*
+            Splits packages into waves, one Truck per wave with the capacities of its vehicle, its vehicle_index and the
+            earliest time it may leave as its departure_time. A package restricted to truck k goes on waves of vehicle
+            k. The packages are not loaded onto the trucks, so the caller can record where each one goes.
+
+            TIME: O(f(x))= n log n + n * (p + c), for p distinct availability times and restrictions and c packages
+            per vehicle, plus the local search on each wave, bounded by IMPROVEMENT_SECONDS
+
+            SPACE: O(f(x))= n
+
+        :param packages: ([Package]) The packages to load
+        :param constraints: (ConstraintSet) The constraints of the packages
+        :param rng: (Random, optional) If supplied, breaks deadline ties at random
+        :return: (([(Truck, [Package], [int])], [Package])) Each wave's truck, packages and route, in order of
+            estimated departure, and the packages that fit on no vehicle
+        """
+        units = self._planner.units(packages, constraints, rng)
+        ranks = {id(unit): rank for rank, unit in enumerate(units)}
+        pool_units = {}
+        for unit in units:
+            pool_units.setdefault((unit.available, unit.truck_index), []).append(unit)
+        pools = {key: _UnitPool(key[0], key[1], members, self.neighbor_index) for key, members in pool_units.items()}
+        free_vehicles = [(clock_miles(vehicle.available_from), vehicle_index)
+                         for vehicle_index, vehicle in enumerate(self.vehicles)]
+        heapq.heapify(free_vehicles)
+        waves = []
+        loaded = set()
+        while free_vehicles and len(loaded) < len(units):
+            free_time, vehicle_index = heapq.heappop(free_vehicles)
+            wave = self._seed(vehicle_index, free_time, pools, ranks, loaded)
+            if wave is None:
+                # No unit left fits the vehicle, so it is done for the day
+                continue
+            wave_pools = [pool for pool in pools.values()
+                          if pool.available <= wave.route.start and pool.truck_index in (None, vehicle_index)]
+            self._grow(wave, wave_pools, loaded)
+            self._add_urgent(wave, wave_pools, ranks, loaded)
+            heapq.heappush(free_vehicles, (self._shorten(wave), vehicle_index))
+            waves.append(wave)
+        waves.sort(key=lambda loaded_wave: (loaded_wave.route.start, loaded_wave.vehicle_index))
+        return [self._truck(wave) for wave in waves], \
+            [package for unit in units if id(unit) not in loaded for package in unit.packages]
+
+    def _seed(self, vehicle_index: int, free_time: float, pools: {(float, int): _UnitPool}, ranks: {int: int},
+              loaded: set) -> _Wave or None:
+        """*_seed*
+            Starts a wave of a vehicle with the most urgent unit it may carry that fits it, out and back within its
+            availability window. Units available by the time the vehicle is free come first; after them, the units
+            available soonest, so the vehicle waits no longer than it has to.
+
+            TIME: O(f(x))= p log p, for p pools, plus O(f(x))= k per unit that does not fit
+
+            SPACE: O(f(x))= p
+
+        :param vehicle_index: (int) The vehicle
+        :param free_time: (float) When the vehicle is free, in clock miles
+        :param pools: ({(float, int): _UnitPool}) The pools of units, by availability time and truck restriction
+        :param ranks: ({int: int}) The position of each unit in insertion order, by id
+        :param loaded: (set) The ids of the units already loaded; updated in place
+        :return: (_Wave or None) The wave holding its seed, or None if no unit left fits the vehicle
+        """
+        allowed = [pool for pool in pools.values() if pool.truck_index in (None, vehicle_index)]
+        ready = heapq.merge(*(pool.pending(loaded) for pool in allowed if pool.available <= free_time),
+                            key=lambda unit: ranks[id(unit)])
+        later = heapq.merge(*(pool.pending(loaded) for pool in allowed if pool.available > free_time),
+                            key=lambda unit: (unit.available, ranks[id(unit)]))
+        for units in (ready, later):
+            for unit in units:
+                wave = self._start(vehicle_index, max(free_time, unit.available))
+                if self._add(wave, unit):
+                    pools[(unit.available, unit.truck_index)].take(unit)
+                    loaded.add(id(unit))
+                    return wave
+        return None
+
+    def _start(self, vehicle_index: int, start: float) -> _Wave:
+        """*_start*
+            Starts an empty wave of a vehicle.
+
+            TIME: O(f(x))= c, for a vehicle that carries c packages
+
+            SPACE: O(f(x))= c
+
+        :param vehicle_index: (int) The vehicle
+        :param start: (float) When the wave is estimated to leave, in clock miles
+        :return: (_Wave) The wave
+        """
+        vehicle = self.vehicles[vehicle_index]
+        midnight = Truck.DEPARTURE_TIME.replace(hour=0, minute=0, second=0, microsecond=0)
+        departure_time = midnight + datetime.timedelta(hours=start / Truck.MILES_PER_HOUR)
+        truck = Truck(departure_time, vehicle.package_capacity, vehicle.weight_capacity, vehicle_index)
+        return _Wave(vehicle_index, self._planner.start(truck, vehicle_index, departure_time))
+
+    def _shorten(self, wave: _Wave) -> float:
+        """*_shorten*
+            Shortens a loaded wave's route by local search, without missing a deadline the route met, and estimates
+            when the wave is back at the hub driving it. The shortened route is the one the wave is handed over with.
+
+            TIME: O(f(x))= m^2 log m, for m stops, bounded by IMPROVEMENT_SECONDS
+
+            SPACE: O(f(x))= m
+
+        :param wave: (_Wave) The wave
+        :return: (float) When the wave is back at the hub, in clock miles
+        """
+        route = wave.route
+        deadlines = {stop: deadline - route.start for stop, deadline in zip(route.stops, route.deadlines)
+                     if deadline < math.inf}
+        wave.path = self._improver.improve(route.route(), deadlines, FleetLoader.IMPROVEMENT_SECONDS)
+        return route.start + self._improver.route_length(wave.path)
+
+    def _back_at_hub(self, route: TruckRoute) -> float:
+        """*_back_at_hub*
+            Estimates when a wave is back at the hub, driving its route from its estimated departure.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param route: (TruckRoute) The wave's route
+        :return: (float) The time, in clock miles
+        """
+        if not route.stops:
+            return route.start
+        return route.arrivals[-1] + self.distances.distance(route.stops[-1], 0)
+
+    def _add(self, wave: _Wave, unit: InsertionUnit) -> bool:
+        """*_add*
+            Inserts a unit into a wave's route where it adds the fewest miles, if the vehicle has room for it, every
+            package on the route stays on time and the vehicle is still back before its availability window closes. A
+            package that could not be on time even driven straight to when the wave leaves does not hold the route to
+            its deadline. The wave is left unchanged if the unit does not fit.
+
+            TIME: O(f(x))= k + m, for k neighbors and m stops on the route, O(f(x))= m per package for a group
+
+            SPACE: O(f(x))= m
+
+        :param wave: (_Wave) The wave
+        :param unit: (InsertionUnit) The unit
+        :return: (bool) True if the unit was added, otherwise False
+        """
+        vehicle = self.vehicles[wave.vehicle_index]
+        routes = [wave.route if vehicle.available_until is None else wave.route.copy()]
+        hub_row = self.distances.row(0)
+        start = wave.route.start
+        deadlines = [deadline if start + hub_row[address_index] <= deadline else math.inf
+                     for address_index, deadline in zip(unit.address_indices, unit.deadlines)]
+        if deadlines != unit.deadlines:
+            unit = unit.relaxed(deadlines)
+        if self._planner.insert([unit], routes):
+            return False
+        if vehicle.available_until is not None and \
+                self._back_at_hub(routes[0]) > clock_miles(vehicle.available_until):
+            return False
+        wave.route = routes[0]
+        wave.units.append(unit)
+        wave.last_index = unit.address_indices[-1]
+        return True
+
+    def _grow(self, wave: _Wave, pools: [_UnitPool], loaded: set) -> None:
+        """*_grow*
+            Adds the nearest waiting unit from any of the pools to a wave, from the unit added last, until the nearest
+            one does not fit or none are left.
+
+            TIME: O(f(x))= k * p + m per unit added, amortized, for p pools and m stops on the route
+
+            SPACE: O(f(x))= p + m
+
+        :param wave: (_Wave) The wave
+        :param pools: ([_UnitPool]) The pools the wave may take units from
+        :param loaded: (set) The ids of the units already loaded; updated in place
+        :return: None
+        """
+        while True:
+            nearest = None
+            for pool in pools:
+                if len(pool.tour) == 0:
+                    continue
+                address_index = pool.tour.nearest(wave.last_index)
+                if address_index < 0:
+                    continue
+                distance = self.distances.distance(wave.last_index, address_index)
+                if nearest is None or distance < nearest[0]:
+                    nearest = (distance, address_index, pool)
+            if nearest is None:
+                return
+            _, address_index, pool = nearest
+            unit = pool.waiting[address_index][0]
+            if not self._add(wave, unit):
+                return
+            pool.take(unit)
+            loaded.add(id(unit))
+
+    def _add_urgent(self, wave: _Wave, pools: [_UnitPool], ranks: {int: int}, loaded: set) -> None:
+        """*_add_urgent*
+            Offers a grown wave the waiting units, most urgent first, that would be late if they were left for the
+            vehicle's next wave, as growing stops at the first nearest unit that does not fit.
+
+            TIME: O(f(x))= p log p + u * (k + m), for p pools, u units offered and m stops on the route
+
+            SPACE: O(f(x))= p
+
+        :param wave: (_Wave) The wave
+        :param pools: ([_UnitPool]) The pools the wave may take units from
+        :param ranks: ({int: int}) The position of each unit in insertion order, by id
+        :param loaded: (set) The ids of the units already loaded; updated in place
+        :return: None
+        """
+        hub_row = self.distances.row(0)
+        farthest = max(distance for distance in hub_row if distance < DistanceMatrix.UNREACHABLE)
+        back_at_hub = self._back_at_hub(wave.route)
+        pools_by_key = {(pool.available, pool.truck_index): pool for pool in pools}
+        for unit in heapq.merge(*(pool.pending(loaded) for pool in pools), key=lambda pending: ranks[id(pending)]):
+            if unit.deadlines[0] >= back_at_hub + farthest:
+                # Every unit from here on can still be on time on the next wave
+                return
+            if all(back_at_hub + hub_row[address_index] <= deadline
+                   for address_index, deadline in zip(unit.address_indices, unit.deadlines)):
+                continue
+            if self._add(wave, unit):
+                pools_by_key[(unit.available, unit.truck_index)].take(unit)
+                loaded.add(id(unit))
+                back_at_hub = self._back_at_hub(wave.route)
+
+    def _truck(self, wave: _Wave) -> (Truck, [Package], [int]):
+        """*_truck*
+            Hands over the truck that drives a wave, made ready to leave as soon as the vehicle's window opens and every
+            one of its packages is available.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param wave: (_Wave) The wave
+        :return: ((Truck, [Package], [int])) The truck, the wave's packages, and its route from the hub back to the hub
+        """
+        vehicle = self.vehicles[wave.vehicle_index]
+        ready = max([clock_miles(vehicle.available_from)] + [unit.available for unit in wave.units])
+        truck = wave.route.truck
+        midnight = Truck.DEPARTURE_TIME.replace(hour=0, minute=0, second=0, microsecond=0)
+        truck.departure_time = midnight + datetime.timedelta(hours=ready / Truck.MILES_PER_HOUR)
+        truck.current_time = truck.departure_time
+        return truck, list(wave.route.packages), wave.path
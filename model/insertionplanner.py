@@ -0,0 +1,521 @@
+from dataStructures.distancematrix import DistanceMatrix
+from dataStructures.neighborindex import NeighborIndex
+from model.constraints import ConstraintSet
+from model.package import Package
+from model.truck import Truck
+import datetime
+import math
+import random
+
+
+def clock_miles(time: datetime.datetime) -> float:
+    """*clock_miles*
+        Converts a time of day into the miles a truck could have driven since midnight, so that times and distances can
+        be compared directly.
+
+        TIME: O(f(x))= 1
+
+        SPACE: O(f(x))= 1
+
+    :param time: (datetime) The time of day
+    :return: (float) The time as miles since midnight
+    """
+    midnight = time.replace(hour=0, minute=0, second=0, microsecond=0)
+    return (time - midnight).total_seconds() * Truck.MILES_PER_HOUR / 60 / 60
+
+
+class InsertionUnit:
+    """A class used to hold packages that must be inserted into the same truck: a co-delivery group, or a single
+    package. The unit's times are kept in clock miles (see clock_miles).
+
+    **Instance Attributes**
+        *packages* ([Package]):
+            The packages of the unit, earliest deadline first.
+        *address_indices* ([int]):
+            The address index of each package.
+        *deadlines* ([float]):
+            The deadline of each package, in clock miles.
+        *available* (float):
+            The earliest time the whole unit can leave the hub, in clock miles.
+        *available_at* (datetime or None):
+            The same time as a datetime, or None if the unit is available from the start of the day.
+        *truck_index* (int or None):
+            The only truck the unit may go on, or None for any truck.
+        *weight* (float):
+            The total weight of the packages, in kg.
+
+    **Methods**
+        *relaxed* (deadlines ([float])) -> InsertionUnit
+            - TIME: O(f(x))= g, for g packages in the unit
+            - SPACE: O(f(x))= g
+    """
+
+    __slots__ = ("packages", "address_indices", "deadlines", "available", "available_at", "truck_index", "weight")
+
+    def __init__(self, packages: [Package], address_indices: [int], available_at: datetime.datetime or None,
+                 truck_index: int or None) -> None:
+        self.packages = packages
+        self.address_indices = address_indices
+        self.deadlines = [clock_miles(package.deadline) for package in packages]
+        self.available_at = available_at
+        self.available = clock_miles(available_at) if available_at is not None else 0.0
+        self.truck_index = truck_index
+        self.weight = sum(package.weight for package in packages)
+
+    def relaxed(self, deadlines: [float]) -> "InsertionUnit":
+        """*relaxed*
+            Copies the unit with different deadlines to route it by, e.g. math.inf for a package that is late anyway.
+            The packages keep their own deadlines.
+
+            TIME: O(f(x))= g, for g packages in the unit
+
+            SPACE: O(f(x))= g
+
+        :param deadlines: ([float]) The deadline of each package, in clock miles
+        :return: (InsertionUnit) The copy
+        """
+        unit = InsertionUnit(self.packages, self.address_indices, self.available_at, self.truck_index)
+        unit.deadlines = deadlines
+        return unit
+
+
+class TruckRoute:
+    """A class used to hold a truck's route while it is being built by insertion. Besides the stops it keeps, for every
+    stop, the arrival time and the deadline in clock miles, and the slack: the most the arrival at that stop and every
+    later stop can still be delayed without missing a deadline. With the slack, whether an insertion keeps the route on
+    time is a constant-time check.
+
+    **Instance Attributes**
+        *truck* (Truck):
+            The truck being routed.
+        *truck_index* (int):
+            The index of the truck in Facility.all_trucks.
+        *origin* (int):
+            The address index the route starts from: the hub, or where a truck already on the road is headed.
+        *departure_time* (datetime):
+            When the truck leaves the origin. Inserting a package that is not yet available pushes it later.
+        *start* (float):
+            The departure time in clock miles.
+        *stops* ([int]):
+            The address indices visited, in order, not counting the hub at either end.
+        *arrivals* ([float]):
+            The arrival time at each stop, in clock miles.
+        *deadlines* ([float]):
+            The earliest deadline of the packages at each stop, in clock miles.
+        *slack* ([float]):
+            The smallest margin between deadline and arrival at each stop and every later stop.
+        *positions* ({int: int}):
+            The position of each address index in stops.
+        *packages* ([Package]):
+            The packages inserted so far.
+        *weight* (float):
+            The total weight of the packages inserted so far, in kg.
+
+    **Methods**
+        *__init__* (truck (Truck), truck_index (int), departure_time (datetime), distances (DistanceMatrix),
+            origin (int, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *copy* () -> TruckRoute
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *evaluate* (address_index (int), deadline (float), available (float), candidate_positions ([int]))
+            -> (float, int, float) or None
+            - TIME: O(f(x))= k, for k candidate positions
+            - SPACE: O(f(x))= 1
+        *insert* (package (Package), address_index (int), deadline (float), position (int), shift (float)) -> None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *route* () -> [int]
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+    """
+
+    __slots__ = ("truck", "truck_index", "origin", "departure_time", "start", "stops", "arrivals", "deadlines",
+                 "slack", "positions", "packages", "weight", "_distances")
+
+    def __init__(self, truck: Truck, truck_index: int, departure_time: datetime.datetime,
+                 distances: DistanceMatrix, origin: int = 0) -> None:
+        """*__init__*
+            Creates an empty route for a truck.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param truck: (Truck) The truck to route
+        :param truck_index: (int) The index of the truck in Facility.all_trucks
+        :param departure_time: (datetime) The earliest time the truck can leave the origin
+        :param distances: (DistanceMatrix) The distances between addresses
+        :param origin: (int, optional) The address index the route starts from, the hub by default
+        :return: None
+        """
+        self.truck = truck
+        self.truck_index = truck_index
+        self.origin = origin
+        self.departure_time = departure_time
+        self.start = clock_miles(departure_time)
+        self.stops = []
+        self.arrivals = []
+        self.deadlines = []
+        self.slack = []
+        self.positions = {}
+        self.packages = []
+        self.weight = 0.0
+        self._distances = distances
+
+    def copy(self) -> "TruckRoute":
+        """*copy*
+            Copies the route so that insertions can be tried without changing it.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :return: (TruckRoute) The copy
+        """
+        duplicate = TruckRoute(self.truck, self.truck_index, self.departure_time, self._distances, self.origin)
+        duplicate.start = self.start
+        duplicate.stops = list(self.stops)
+        duplicate.arrivals = list(self.arrivals)
+        duplicate.deadlines = list(self.deadlines)
+        duplicate.slack = list(self.slack)
+        duplicate.positions = dict(self.positions)
+        duplicate.packages = list(self.packages)
+        duplicate.weight = self.weight
+        return duplicate
+
+    def evaluate(self, address_index: int, deadline: float, available: float,
+                 candidate_positions: [int]) -> (float, int, float) or None:
+        """*evaluate*
+            Finds the cheapest on-time insertion of a stop among the candidate positions. A position p puts the stop
+            between stops[p - 1] and stops[p], with the origin standing in at the start and the hub at the end. If the
+            stop is not yet available the truck's departure is pushed back, which delays every stop. An address the
+            route already visits costs nothing extra, as long as the stop is reached by the new deadline.
+
+            TIME: O(f(x))= k, for k candidate positions
+
+            SPACE: O(f(x))= 1
+
+        :param address_index: (int) The address index of the stop
+        :param deadline: (float) The deadline of the stop, in clock miles
+        :param available: (float) The earliest time the package can leave the hub, in clock miles
+        :param candidate_positions: ([int]) The positions to try
+        :return: ((float, int, float) or None) The added miles, the position and the departure delay in miles, or
+            None if no candidate keeps every stop on time
+        """
+        shift = available - self.start if available > self.start else 0.0
+        if self.stops and shift > self.slack[0]:
+            return None
+        position = self.positions.get(address_index)
+        if position is not None:
+            if self.arrivals[position] + shift > deadline:
+                return None
+            return 0.0, position, shift
+        distances = self._distances
+        stop_count = len(self.stops)
+        best = None
+        for position in candidate_positions:
+            previous_index = self.stops[position - 1] if position > 0 else self.origin
+            next_index = self.stops[position] if position < stop_count else 0
+            to_stop = distances.distance(previous_index, address_index)
+            detour = to_stop + distances.distance(address_index, next_index) \
+                - distances.distance(previous_index, next_index)
+            if best is not None and detour >= best[0]:
+                continue
+            arrival = (self.arrivals[position - 1] if position > 0 else self.start) + to_stop + shift
+            if arrival > deadline or to_stop >= DistanceMatrix.UNREACHABLE:
+                continue
+            if position < stop_count and detour + shift > self.slack[position]:
+                continue
+            best = (detour, position, shift)
+        return best
+
+    def insert(self, package: Package, address_index: int, deadline: float, position: int, shift: float) -> None:
+        """*insert*
+            Applies an insertion found by evaluate, then brings the arrivals and the slack up to date.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param package: (Package) The package being inserted
+        :param address_index: (int) The address index of the package
+        :param deadline: (float) The deadline of the package, in clock miles
+        :param position: (int) The position returned by evaluate
+        :param shift: (float) The departure delay returned by evaluate
+        :return: None
+        """
+        self.packages.append(package)
+        self.weight += package.weight
+        if shift > 0:
+            self.start += shift
+            self.departure_time += datetime.timedelta(seconds=round(shift / Truck.MILES_PER_HOUR * 60 * 60))
+            for stop_position in range(len(self.arrivals)):
+                self.arrivals[stop_position] += shift
+        if self.positions.get(address_index) == position:
+            if deadline < self.deadlines[position]:
+                self.deadlines[position] = deadline
+        else:
+            distances = self._distances
+            previous_index = self.stops[position - 1] if position > 0 else self.origin
+            arrival = (self.arrivals[position - 1] if position > 0 else self.start) \
+                + distances.distance(previous_index, address_index)
+            if position < len(self.stops):
+                next_index = self.stops[position]
+                delay = arrival + distances.distance(address_index, next_index) - self.arrivals[position]
+                for stop_position in range(position, len(self.arrivals)):
+                    self.arrivals[stop_position] += delay
+            self.stops.insert(position, address_index)
+            self.arrivals.insert(position, arrival)
+            self.deadlines.insert(position, deadline)
+            self.slack.insert(position, 0.0)
+            for stop_position in range(position, len(self.stops)):
+                self.positions[self.stops[stop_position]] = stop_position
+        # Rebuild the suffix minimum of the margins from the back
+        margin = float("inf")
+        for stop_position in range(len(self.stops) - 1, -1, -1):
+            stop_margin = self.deadlines[stop_position] - self.arrivals[stop_position]
+            if stop_margin < margin:
+                margin = stop_margin
+            self.slack[stop_position] = margin
+
+    def route(self) -> [int]:
+        """*route*
+            Returns the route in the form Facility.deliver_route drives.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :return: ([int]) The address indices in visiting order, starting at the origin and ending at the hub
+        """
+        return [self.origin] + self.stops + [0]
+
+
+class InsertionPlanner:
+    """A class used to assign packages to trucks and order each truck's stops by cheapest feasible insertion. Units are
+    inserted most urgent first. Each unit goes where it adds the fewest miles while keeping every package on time, with
+    its truck restriction, its availability and the truck's package and weight capacities respected. Only positions
+    next to the address's nearest neighbors on a route are tried (plus both ends), and each try is a constant-time
+    slack check, so a unit costs O(f(x))= k per truck to place and O(f(x))= n to commit.
+
+    **Class Attributes**
+        *WAIT_WEIGHT* (float):
+            How much a mile of pushing back a truck's departure costs, compared to a mile of driving.
+        *RANDOM_SPREAD* (float):
+            The most a randomized ordering scales a unit's distance from the hub down by, as a fraction.
+
+    **Instance Attributes**
+        *distances* (DistanceMatrix):
+            The distances between addresses.
+        *neighbor_index* (NeighborIndex):
+            The nearest neighbor lists used to pick candidate positions.
+
+    **Methods**
+        *__init__* (distances (DistanceMatrix), neighbor_index (NeighborIndex)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *start* (truck (Truck), truck_index (int), departure_time (datetime), origin (int, optional)) -> TruckRoute
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *units* (packages ([Package]), constraints (ConstraintSet), rng (Random, optional)) -> [InsertionUnit]
+            - TIME: O(f(x))= n log n
+            - SPACE: O(f(x))= n
+        *insert* (units ([InsertionUnit]), routes ([TruckRoute])) -> [InsertionUnit]
+            - TIME: O(f(x))= n * t * (k + m), for t trucks and m stops per route
+            - SPACE: O(f(x))= n
+        *insert_late* (units ([InsertionUnit]), routes ([TruckRoute])) -> [InsertionUnit]
+            - TIME: O(f(x))= n * t * (k + m), for t trucks and m stops per route
+            - SPACE: O(f(x))= n
+    """
+
+    WAIT_WEIGHT: float = 0.5
+    RANDOM_SPREAD: float = 0.3
+
+    def __init__(self, distances: DistanceMatrix, neighbor_index: NeighborIndex) -> None:
+        """*__init__*
+            Creates a planner over a distance matrix.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param distances: (DistanceMatrix) The distances between addresses
+        :param neighbor_index: (NeighborIndex) The nearest neighbor lists of the same matrix
+        :return: None
+        """
+        self.distances = distances
+        self.neighbor_index = neighbor_index
+
+    def start(self, truck: Truck, truck_index: int, departure_time: datetime.datetime, origin: int = 0) -> TruckRoute:
+        """*start*
+            Creates an empty route for a truck.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param truck: (Truck) The truck to route
+        :param truck_index: (int) The index of the truck in Facility.all_trucks
+        :param departure_time: (datetime) The earliest time the truck can leave the origin
+        :param origin: (int, optional) The address index the route starts from, the hub by default
+        :return: (TruckRoute) The empty route
+        """
+        return TruckRoute(truck, truck_index, departure_time, self.distances, origin)
+
+    def units(self, packages: [Package], constraints: ConstraintSet, rng: random.Random = None) -> [InsertionUnit]:
+        """*units*
+            Groups packages into insertion units and orders them most urgent first: earliest deadline, then units
+            restricted to one truck, then latest availability, then farthest from the hub. When a random number
+            generator is supplied, each distance from the hub is scaled down by a random factor first.
+
+            TIME: O(f(x))= n log n
+
+            SPACE: O(f(x))= n
+
+        :param packages: ([Package]) The packages to plan
+        :param constraints: (ConstraintSet) The constraints of the packages
+        :param rng: (Random, optional) If supplied, breaks deadline ties at random
+        :return: ([InsertionUnit]) The units, in insertion order
+        """
+        packages_by_id = {package.package_id: package for package in packages}
+        units = []
+        grouped_ids = set()
+        for package in packages:
+            if package.package_id in grouped_ids:
+                continue
+            members = [packages_by_id[package_id] for package_id in constraints.group_of(package.package_id)
+                       if package_id in packages_by_id]
+            members.sort(key=lambda member: member.deadline)
+            available_at = None
+            truck_index = None
+            for member in members:
+                grouped_ids.add(member.package_id)
+                member_constraints = constraints.lookup(member.package_id)
+                if member_constraints.available_at is not None \
+                        and (available_at is None or member_constraints.available_at > available_at):
+                    available_at = member_constraints.available_at
+                if member_constraints.truck_index is not None:
+                    truck_index = member_constraints.truck_index
+            address_indices = [self.distances.index_of(member.address) for member in members]
+            units.append(InsertionUnit(members, address_indices, available_at, truck_index))
+        hub_row = self.distances.row(0)
+        hub_distances = {id(unit): hub_row[unit.address_indices[0]] for unit in units}
+        if rng is not None:
+            for unit_id in hub_distances:
+                hub_distances[unit_id] *= rng.uniform(1 - InsertionPlanner.RANDOM_SPREAD, 1)
+        units.sort(key=lambda unit: (unit.deadlines[0], unit.truck_index is None, -unit.available,
+                                     -hub_distances[id(unit)]))
+        return units
+
+    def insert(self, units: [InsertionUnit], routes: [TruckRoute]) -> [InsertionUnit]:
+        """*insert*
+            Inserts each unit, in order, wherever it adds the least cost. A unit of several packages is tried on a copy
+            of each route and the winning copy replaces the route in the routes list.
+
+            TIME: O(f(x))= n * t * (k + m), for t trucks and m stops per route
+
+            SPACE: O(f(x))= n
+
+        :param units: ([InsertionUnit]) The units to insert, most urgent first
+        :param routes: ([TruckRoute]) The routes to insert into; updated in place
+        :return: ([InsertionUnit]) The units that fit on no route, in their original order
+        """
+        leftover_units = []
+        for unit in units:
+            best = self._best_insertion(unit, routes)
+            if best is None:
+                leftover_units.append(unit)
+            elif len(unit.packages) == 1:
+                self._try_insert(routes[best[1]], unit, 0, True)
+            else:
+                routes[best[1]] = best[2]
+        return leftover_units
+
+    def insert_late(self, units: [InsertionUnit], routes: [TruckRoute]) -> [InsertionUnit]:
+        """*insert_late*
+            Inserts units that could not be placed on time, with their own deadlines ignored, wherever they add the
+            least cost while every other package on the route stays on time. Their packages are delivered late rather
+            than not at all.
+
+            TIME: O(f(x))= n * t * (k + m), for t trucks and m stops per route
+
+            SPACE: O(f(x))= n
+
+        :param units: ([InsertionUnit]) The units to insert, most urgent first
+        :param routes: ([TruckRoute]) The routes to insert into; updated in place
+        :return: ([InsertionUnit]) The units that fit on no route even late, in their original order
+        """
+        relaxed_units = {}
+        for unit in units:
+            relaxed_units[id(unit)] = unit.relaxed([math.inf] * len(unit.packages))
+        leftover_ids = {id(unit) for unit in self.insert(list(relaxed_units.values()), routes)}
+        return [unit for unit in units if id(relaxed_units[id(unit)]) in leftover_ids]
+
+    def _best_insertion(self, unit: InsertionUnit, routes: [TruckRoute]) -> (float, int, TruckRoute) or None:
+        """*_best_insertion*
+            Prices a unit on every route it is allowed on and returns the cheapest.
+
+            TIME: O(f(x))= t * k for a single package, O(f(x))= t * m for a group
+
+            SPACE: O(f(x))= m
+
+        :param unit: (InsertionUnit) The unit to price
+        :param routes: ([TruckRoute]) The routes to try
+        :return: ((float, int, TruckRoute) or None) The cost, the position of the route in routes and, for a group, the
+            route copy holding the group; or None if the unit fits on no route
+        """
+        best = None
+        for route_position, route in enumerate(routes):
+            if unit.truck_index is not None and unit.truck_index != route.truck_index:
+                continue
+            truck = route.truck
+            if len(route.packages) + len(unit.packages) > truck.package_capacity \
+                    or truck.weight_capacity is not None and route.weight + unit.weight > truck.weight_capacity:
+                continue
+            if len(unit.packages) == 1:
+                cost = self._try_insert(route, unit, 0, False)
+                trial_route = route
+            else:
+                trial_route = route.copy()
+                cost = 0.0
+                for member_position in range(len(unit.packages)):
+                    member_cost = self._try_insert(trial_route, unit, member_position, True)
+                    if member_cost is None:
+                        cost = None
+                        break
+                    cost += member_cost
+            if cost is not None and (best is None or cost < best[0]):
+                best = (cost, route_position, trial_route)
+        return best
+
+    def _try_insert(self, route: TruckRoute, unit: InsertionUnit, member_position: int, commit: bool) -> float or None:
+        """*_try_insert*
+            Evaluates, and optionally applies, the cheapest insertion of one package of a unit into a route.
+
+            TIME: O(f(x))= k to evaluate, O(f(x))= n to apply
+
+            SPACE: O(f(x))= k
+
+        :param route: (TruckRoute) The route to insert into
+        :param unit: (InsertionUnit) The unit the package belongs to
+        :param member_position: (int) The position of the package in the unit
+        :param commit: (bool) Whether to apply the insertion
+        :return: (float or None) The cost of the insertion, or None if the package cannot be delivered on time
+        """
+        address_index = unit.address_indices[member_position]
+        deadline = unit.deadlines[member_position]
+        candidate_positions = {0, len(route.stops)}
+        for neighbor_index in self.neighbor_index.neighbors(address_index):
+            position = route.positions.get(neighbor_index)
+            if position is not None:
+                candidate_positions.add(position)
+                candidate_positions.add(position + 1)
+        result = route.evaluate(address_index, deadline, unit.available, candidate_positions)
+        if result is None:
+            return None
+        detour, position, shift = result
+        if commit:
+            route.insert(unit.packages[member_position], address_index, deadline, position, shift)
+        return detour + shift * InsertionPlanner.WAIT_WEIGHT
@@ -0,0 +1,142 @@
+from model.package import Package
+import csv
+import datetime
+import io
+import itertools
+
+
+class ManifestReader:
+    """A class used to stream packages out of a PackageInfo style CSV manifest. Rows are tokenized by the csv module,
+    so quoted fields may contain commas, and are turned into Package objects one at a time, so memory use does not
+    grow with the size of the file. Deadlines are parsed once per distinct string and reused.
+
+    **Class Attributes**
+        *DEFAULT_CHUNK_SIZE* (int):
+            The default number of packages per chunk.
+
+    **Instance Attributes**
+        *path* (str or None):
+            The path of the manifest file, or None for a manifest read from text.
+        *end_of_day* (datetime):
+            The deadline used for "EOD", and the day every other deadline falls on.
+
+    **Methods**
+        *__init__* (path (str), end_of_day (datetime)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *from_text* (text (str), end_of_day (datetime)) -> ManifestReader
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *parse_deadline* (raw_deadline (str)) -> datetime
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *packages* () -> Iterator[Package]
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *chunks* (chunk_size (int, optional)) -> Iterator[[Package]]
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= chunk_size
+    """
+
+    DEFAULT_CHUNK_SIZE: int = 4096
+
+    def __init__(self, path: str, end_of_day: datetime.datetime) -> None:
+        """*__init__*
+            Creates a reader for a manifest file. The file is not opened until packages are requested.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param path: (str) The path of the manifest file
+        :param end_of_day: (datetime) The deadline used for "EOD", and the day every other deadline falls on
+        :return: None
+        """
+        self.path = path
+        self.end_of_day = end_of_day
+        self._deadlines = {"EOD": end_of_day}
+        self._text = None
+
+    @staticmethod
+    def from_text(text: str, end_of_day: datetime.datetime) -> "ManifestReader":
+        """*from_text*
+            Creates a reader for a manifest that is already in memory, such as one sent to the planning service.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param text: (str) The manifest CSV
+        :param end_of_day: (datetime) The deadline used for "EOD", and the day every other deadline falls on
+        :return: (ManifestReader) The reader
+        """
+        reader = ManifestReader(None, end_of_day)
+        reader._text = text
+        return reader
+
+    def parse_deadline(self, raw_deadline: str) -> datetime.datetime:
+        """*parse_deadline*
+            Converts a deadline such as "10:30 AM" or "EOD" into a datetime on the end_of_day's date. Each distinct
+            string is parsed once; later calls return the same datetime object.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param raw_deadline: (str) The deadline as written in the manifest
+        :return: (datetime) The deadline
+        """
+        deadline = self._deadlines.get(raw_deadline)
+        if deadline is None:
+            string_time_split_1 = raw_deadline.split(':')
+            string_time_split_2 = string_time_split_1[1].split()
+            hours = int(string_time_split_1[0])
+            if string_time_split_2[1].upper() == "PM" and hours != 12:
+                hours += 12
+            minutes = int(string_time_split_2[0])
+            deadline = self.end_of_day.replace(hour=hours, minute=minutes, second=0)
+            self._deadlines[raw_deadline] = deadline
+        return deadline
+
+    def packages(self):
+        """*packages*
+            Lazily reads the manifest, yielding one Package per non-blank row. The state column is skipped as it is
+            not needed, and a missing note is read as an empty string.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :return: (Iterator[Package]) The packages, in file order
+        """
+        with open(self.path, newline='') if self._text is None else io.StringIO(self._text, newline='') \
+                as source_csv_file:
+            for package_data in csv.reader(source_csv_file):
+                if not package_data:
+                    continue
+                yield Package(int(package_data[0]),
+                              package_data[1],
+                              package_data[2],
+                              int(package_data[4]),
+                              self.parse_deadline(package_data[5]),
+                              float(package_data[6]),
+                              package_data[7].rstrip() if len(package_data) > 7 else ""
+                              )
+
+    def chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """*chunks*
+            Lazily reads the manifest in lists of up to chunk_size packages.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= chunk_size
+
+        :param chunk_size: (int, optional) The largest number of packages in one chunk
+        :return: (Iterator[[Package]]) The chunks, in file order
+        """
+        packages = self.packages()
+        while True:
+            chunk = list(itertools.islice(packages, chunk_size))
+            if not chunk:
+                return
+            yield chunk
@@ -0,0 +1,354 @@
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+
+# Handed out by a disabled PlanningMetrics for every phase, so timing costs one attribute check when switched off
+_NO_PHASE = contextlib.nullcontext()
+
+
+class _PhaseTimer:
+    """A context manager that adds the time spent inside it to one of a PlanningMetrics' timers."""
+
+    __slots__ = ("timers", "name", "start")
+
+    def __init__(self, timers: dict, name: str) -> None:
+        self.timers = timers
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exception) -> None:
+        timer = self.timers.get(self.name)
+        if timer is None:
+            timer = self.timers[self.name] = [0.0, 0]
+        timer[0] += time.perf_counter() - self.start
+        timer[1] += 1
+
+
+class PlanningMetrics:
+    """A class used to measure where a planning run spends its time. Metrics are opt-in: a Facility made without them
+    gets a disabled instance, whose phases are a shared no-op context manager and which attaches nothing, so the cost
+    when switched off is an attribute check per phase. When enabled it collects:
+        1) timers: the seconds and calls of each named phase, inclusive of any phases nested inside it
+        2) counters: distance lookups, nearest neighbor scans and queries, and route evaluations, counted by wrapping
+           the methods of one facility's distance matrix, neighbor index and route evaluator while attached; the
+           facility's planning methods are timed the same way, each under its own name
+        3) hash tables: the probe lengths and clusters of the facility's hash tables, measured from their layout
+        4) optionally, a cProfile capture and tracemalloc's peak memory and top allocation sites between start and stop
+    A copied or pickled instance, such as the one a worker process of a multi-start run gets with its facility, is
+    disabled, so only the process that made the metrics records into them.
+
+    **Class Attributes**
+        *TIMED_METHODS* ([str]):
+            The Facility methods timed while attached.
+        *PROFILE_LIMIT* (int):
+            The number of functions kept in the profile report.
+        *MEMORY_SITE_LIMIT* (int):
+            The number of top allocation sites kept from the memory trace.
+
+    **Instance Attributes**
+        *enabled* (bool):
+            Whether anything is measured.
+        *profile* (bool):
+            Whether start and stop capture a cProfile profile.
+        *trace_memory* (bool):
+            Whether start and stop trace memory allocations.
+        *timers* ({str: [float, int]}):
+            The total seconds and number of calls of each phase.
+        *counters* ({str: int}):
+            The count of each counted operation.
+
+    **Methods**
+        *__init__* (enabled (bool, optional), profile (bool, optional), trace_memory (bool, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *phase* (name (str)) -> context manager
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *count* (name (str), amount (int, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *attach* (facility (Facility)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *detach* () -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *start* () -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *stop* () -> None
+            - TIME: O(f(x))= n, for n profiled functions or allocation sites
+            - SPACE: O(f(x))= n
+        *profile_report* () -> str or None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *to_dict* () -> dict
+            - TIME: O(f(x))= n, for n items in the facility's hash tables
+            - SPACE: O(f(x))= 1
+        *dump* (path (str)) -> None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+    """
+
+    TIMED_METHODS: [str] = ["preload", "loader", "plan", "plan_greedy", "plan_fleet", "simulate", "plan_route",
+                            "greedy_route", "deliver_route", "apply_delta", "package_constraints"]
+    PROFILE_LIMIT: int = 25
+    MEMORY_SITE_LIMIT: int = 10
+
+    def __init__(self, enabled: bool = True, profile: bool = False, trace_memory: bool = False) -> None:
+        """*__init__*
+            Creates a set of metrics.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param enabled: (bool, optional) Whether anything is measured
+        :param profile: (bool, optional) Whether start and stop capture a cProfile profile
+        :param trace_memory: (bool, optional) Whether start and stop trace memory allocations
+        :return: None
+        """
+        self.enabled = enabled
+        self.profile = enabled and profile
+        self.trace_memory = enabled and trace_memory
+        self.timers = {}
+        self.counters = {}
+        self._facility = None
+        self._wrapped = []
+        self._profiler = None
+        self._profile_report = None
+        self._memory = None
+
+    def __reduce__(self):
+        return PlanningMetrics, (False,)
+
+    def phase(self, name: str):
+        """*phase*
+            Times a phase: use as "with metrics.phase(name):".
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param name: (str) The name of the phase
+        :return: (context manager) Adds the time spent inside it to the phase's timer
+        """
+        if not self.enabled:
+            return _NO_PHASE
+        return _PhaseTimer(self.timers, name)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """*count*
+            Adds to a counter.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param name: (str) The name of the counter
+        :param amount: (int, optional) How much to add
+        :return: None
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _wrap(self, owner: object, method_name: str, counter_name: str, result_wrapper=None) -> None:
+        """*_wrap*
+            Shadows a method on one object with a version that counts its calls, so other objects of the same class
+            are not slowed down.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param owner: (object) The object whose method is counted
+        :param method_name: (str) The name of the method
+        :param counter_name: (str) The counter to add to
+        :param result_wrapper: (callable, optional) Applied to every result, to count calls on returned objects
+        :return: None
+        """
+        method = getattr(owner, method_name)
+        counters = self.counters
+        counters.setdefault(counter_name, 0)
+
+        def counted(*arguments, **keywords):
+            counters[counter_name] += 1
+            result = method(*arguments, **keywords)
+            return result if result_wrapper is None else result_wrapper(result)
+
+        setattr(owner, method_name, counted)
+        self._wrapped.append((owner, method_name))
+
+    def _time(self, owner: object, method_name: str) -> None:
+        """*_time*
+            Shadows a method on one object with a version that adds its running time to the timer of the same name.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param owner: (object) The object whose method is timed
+        :param method_name: (str) The name of the method, used as the timer name
+        :return: None
+        """
+        method = getattr(owner, method_name)
+        timers = self.timers
+
+        def timed(*arguments, **keywords):
+            with _PhaseTimer(timers, method_name):
+                return method(*arguments, **keywords)
+
+        setattr(owner, method_name, timed)
+        self._wrapped.append((owner, method_name))
+
+    def attach(self, facility) -> None:
+        """*attach*
+            Starts counting the distance lookups, nearest neighbor scans and queries, and route evaluations of a
+            facility, and timing its planning methods. Does nothing when disabled.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param facility: (Facility) The facility to count
+        :return: None
+        """
+        if not self.enabled:
+            return
+        self.detach()
+        self._facility = facility
+
+        counters = self.counters
+        counters.setdefault("neighbor_queries", 0)
+
+        def count_tour(tour):
+            # Each tour is new, so its nearest is shadowed without being recorded for detach
+            nearest = tour.nearest
+
+            def counted_nearest(*arguments, **keywords):
+                counters["neighbor_queries"] += 1
+                return nearest(*arguments, **keywords)
+
+            tour.nearest = counted_nearest
+            return tour
+
+        self._wrap(facility.all_distances, "distance", "distance_lookups")
+        self._wrap(facility.all_distances, "row", "distance_row_lookups")
+        self._wrap(facility.all_distances, "nearest", "nearest_scans")
+        self._wrap(facility.neighbor_index, "tour", "neighbor_tours", count_tour)
+        self._wrap(facility.route_evaluator, "evaluate", "route_evaluations")
+        for method_name in PlanningMetrics.TIMED_METHODS:
+            self._time(facility, method_name)
+
+    def detach(self) -> None:
+        """*detach*
+            Stops counting, restoring every wrapped method. The facility's hash tables are still measured by to_dict.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :return: None
+        """
+        for owner, method_name in self._wrapped:
+            owner.__dict__.pop(method_name, None)
+        self._wrapped = []
+
+    def start(self) -> None:
+        """*start*
+            Starts the cProfile and tracemalloc captures that are switched on.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :return: None
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        """*stop*
+            Stops the captures started by start and keeps their results.
+
+            TIME: O(f(x))= n, for n profiled functions or allocation sites
+
+            SPACE: O(f(x))= n
+
+        :return: None
+        """
+        if self._profiler is not None:
+            self._profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(self._profiler, stream=report).sort_stats("cumulative").print_stats(
+                PlanningMetrics.PROFILE_LIMIT)
+            self._profile_report = report.getvalue()
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            sites = tracemalloc.take_snapshot().statistics("lineno")[:PlanningMetrics.MEMORY_SITE_LIMIT]
+            tracemalloc.stop()
+            self._memory = {"current_bytes": current,
+                            "peak_bytes": peak,
+                            "top_sites": [{"site": str(site.traceback), "bytes": site.size, "blocks": site.count}
+                                          for site in sites]}
+
+    def profile_report(self) -> str or None:
+        """*profile_report*
+            Returns the cProfile report of the last capture, sorted by cumulative time.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :return: (str or None) The report, or None if nothing was profiled
+        """
+        return self._profile_report
+
+    def to_dict(self) -> dict:
+        """*to_dict*
+            Gathers every metric into plain data that can be written as JSON.
+
+            TIME: O(f(x))= n, for n items in the facility's hash tables
+
+            SPACE: O(f(x))= 1
+
+        :return: (dict) The timers, counters, hash table probe statistics and captures
+        """
+        metrics = {"timers": {name: {"seconds": round(seconds, 6), "calls": calls}
+                              for name, (seconds, calls) in self.timers.items()},
+                   "counters": dict(self.counters)}
+        if self._facility is not None:
+            metrics["hash_tables"] = {"all_packages": self._facility.all_packages.probe_stats(),
+                                      "package_index": self._facility.package_index.probe_stats(),
+                                      "truck_package_lists": [truck.package_list.probe_stats()
+                                                              for truck in self._facility.all_trucks]}
+        if self._memory is not None:
+            metrics["memory"] = self._memory
+        if self._profile_report is not None:
+            metrics["profile"] = self._profile_report
+        return metrics
+
+    def dump(self, path: str) -> None:
+        """*dump*
+            Writes the metrics to a JSON file.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param path: (str) Where to write the metrics
+        :return: None
+        """
+        with open(path, "w") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2)
@@ -0,0 +1,131 @@
+from concurrent.futures import ProcessPoolExecutor
+from model.facility import Facility
+from model.routeplan import RoutePlan
+import copy
+import itertools
+import random
+
+# The unplanned facility each worker process copies for every start. It is handed over once, when the worker starts.
+_worker_facility = None
+
+
+def _initialize_worker(facility: Facility) -> None:
+    """*_initialize_worker*
+        Stores the unplanned facility in a worker process.
+
+        TIME: O(f(x))= 1
+
+        SPACE: O(f(x))= 1
+
+    :param facility: (Facility) The unplanned facility
+    :return: (None)
+    """
+    global _worker_facility
+    _worker_facility = facility
+
+
+def _plan_start(seed: int or None, time_budget: float) -> RoutePlan:
+    """*_plan_start*
+        Plans one start on a private copy of the worker's facility. The distance matrix and neighbor index are shared by
+        every copy rather than duplicated.
+
+        TIME: O(f(x))= n^2 log n
+
+        SPACE: O(f(x))= n
+
+    :param seed: (int or None) The seed for the randomized construction, or None for the unrandomized construction
+    :param time_budget: (float) The most seconds to spend improving each route
+    :return: (RoutePlan) The resulting plan
+    """
+    facility = copy.deepcopy(_worker_facility)
+    facility.plan(random.Random(seed) if seed is not None else None, time_budget)
+    return RoutePlan.from_facility(facility)
+
+
+class MultiStartPlanner:
+    """A class used to plan a facility many times with randomized constructions and keep the best result. The first
+    start is always the unrandomized construction, so the result is never worse than Facility.plan. Every other start
+    inserts the packages in a randomly perturbed order, then improves the routes by local search. Starts run
+    in a pool of worker processes; on platforms that fork, the workers share the parent's copy of the distance matrix.
+    The best plan has the fewest late packages, then the fewest total miles.
+
+    **Instance Attributes**
+        *starts* (int):
+            The number of constructions to run.
+        *workers* (int or None):
+            The number of worker processes. None uses one per CPU; 1 runs every start in this process.
+        *seed* (int):
+            The seed the per-start seeds are drawn from, so a run can be reproduced.
+        *time_budget* (float):
+            The most seconds each start spends improving each route.
+
+    **Methods**
+        *__init__* (starts (int, optional), workers (int or None, optional), seed (int, optional),
+        time_budget (float, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *start_seeds* () -> [int or None]
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *plan* (facility (Facility)) -> RoutePlan
+            - TIME: O(f(x))= starts * n^2 log n / workers
+            - SPACE: O(f(x))= starts * n
+    """
+
+    def __init__(self, starts: int = 8, workers: int or None = None, seed: int = 0,
+                 time_budget: float = Facility.ROUTE_IMPROVEMENT_SECONDS) -> None:
+        """*__init__*
+            Creates a planner.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param starts: (int, optional) The number of constructions to run
+        :param workers: (int or None, optional) The number of worker processes, None for one per CPU
+        :param seed: (int, optional) The seed the per-start seeds are drawn from
+        :param time_budget: (float, optional) The most seconds each start spends improving each route
+        :return: None
+        """
+        if starts < 1:
+            raise ValueError("starts must be at least 1")
+        self.starts = starts
+        self.workers = workers
+        self.seed = seed
+        self.time_budget = time_budget
+
+    def start_seeds(self) -> [int or None]:
+        """*start_seeds*
+            Lists the seed of every start. The first start is unseeded, meaning the unrandomized construction.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :return: ([int or None]) One seed per start
+        """
+        seed_generator = random.Random(self.seed)
+        return [None] + [seed_generator.getrandbits(63) for _ in range(self.starts - 1)]
+
+    def plan(self, facility: Facility) -> RoutePlan:
+        """*plan*
+            Runs every start and applies the best plan to the facility, which must not have been planned yet.
+
+            TIME: O(f(x))= starts * n^2 log n / workers
+
+            SPACE: O(f(x))= starts * n
+
+        :param facility: (Facility) The unplanned facility
+        :return: (RoutePlan) The best plan, which has been applied to the facility
+        """
+        seeds = self.start_seeds()
+        if self.workers == 1:
+            _initialize_worker(facility)
+            plans = [_plan_start(seed, self.time_budget) for seed in seeds]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_initialize_worker,
+                                     initargs=(facility,)) as pool:
+                plans = list(pool.map(_plan_start, seeds, itertools.repeat(self.time_budget)))
+        best_plan = min(plans, key=RoutePlan.score)
+        best_plan.apply(facility)
+        return best_plan
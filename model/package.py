@@ -2,7 +2,8 @@ import datetime
 
 
 class Package:
-    """A class used to represent a package.
+    """A class used to represent a package. Packages use __slots__ instead of a per-instance __dict__ to keep large
+    manifests small in memory; see PackageStore for a columnar alternative.
 
     **Instance Attributes**
         *package_id* (int):
@@ -31,6 +32,9 @@ class Package:
             - SPACE: O(f(x))= 1
     """
 
+    __slots__ = ("package_id", "address", "city", "zipcode", "deadline", "weight", "note", "delivery_status",
+                 "delivery_time_stamp")
+
     def __init__(self,  package_id: int, address: str, city: str, zipcode: int, deadline: datetime.datetime,
                  weight: float, note: str, delivery_status=False,
                  delivery_time_stamp=datetime.datetime.now().replace(hour=0, minute=0, second=0)) -> None:
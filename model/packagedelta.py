@@ -0,0 +1,139 @@
+from model.package import Package
+import datetime
+
+
+class PackageDelta:
+    """A class used to describe one late change to the day's packages, to be applied with Facility.apply_delta. Build
+    deltas with the static constructors rather than by hand.
+
+    **Class Attributes**
+        *ADD* (str):
+            A new package has arrived at the hub.
+        *REMOVE* (str):
+            A package has been cancelled.
+        *CHANGE_ADDRESS* (str):
+            A package's address has been corrected.
+        *CHANGE_DEADLINE* (str):
+            A package's deadline has changed.
+
+    **Instance Attributes**
+        *kind* (str):
+            One of ADD, REMOVE, CHANGE_ADDRESS or CHANGE_DEADLINE.
+        *package_id* (int):
+            The ID of the package the change is for.
+        *package* (Package or None):
+            The new package, for ADD.
+        *address* (str or None):
+            The corrected street address, for CHANGE_ADDRESS.
+        *city* (str or None):
+            The corrected city, for CHANGE_ADDRESS.
+        *zipcode* (int or None):
+            The corrected zipcode, for CHANGE_ADDRESS.
+        *deadline* (datetime or None):
+            The new deadline, for CHANGE_DEADLINE.
+
+    **Methods**
+        *add* (package (Package)) -> PackageDelta
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *remove* (package_id (int)) -> PackageDelta
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *change_address* (package_id (int), address (str), city (str), zipcode (int)) -> PackageDelta
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *change_deadline* (package_id (int), deadline (datetime)) -> PackageDelta
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+    """
+
+    ADD: str = "add"
+    REMOVE: str = "remove"
+    CHANGE_ADDRESS: str = "change_address"
+    CHANGE_DEADLINE: str = "change_deadline"
+
+    def __init__(self, kind: str, package_id: int, package: Package = None, address: str = None, city: str = None,
+                 zipcode: int = None, deadline: datetime.datetime = None) -> None:
+        """*__init__*
+            Creates a delta from its parts.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param kind: (str) One of ADD, REMOVE, CHANGE_ADDRESS or CHANGE_DEADLINE
+        :param package_id: (int) The ID of the package the change is for
+        :param package: (Package, optional) The new package, for ADD
+        :param address: (str, optional) The corrected street address, for CHANGE_ADDRESS
+        :param city: (str, optional) The corrected city, for CHANGE_ADDRESS
+        :param zipcode: (int, optional) The corrected zipcode, for CHANGE_ADDRESS
+        :param deadline: (datetime, optional) The new deadline, for CHANGE_DEADLINE
+        :return: None
+        """
+        self.kind = kind
+        self.package_id = package_id
+        self.package = package
+        self.address = address
+        self.city = city
+        self.zipcode = zipcode
+        self.deadline = deadline
+
+    @staticmethod
+    def add(package: Package) -> "PackageDelta":
+        """*add*
+            Describes a new package arriving at the hub.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package: (Package) The new package
+        :return: (PackageDelta) The delta
+        """
+        return PackageDelta(PackageDelta.ADD, package.package_id, package=package)
+
+    @staticmethod
+    def remove(package_id: int) -> "PackageDelta":
+        """*remove*
+            Describes a cancelled package.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the cancelled package
+        :return: (PackageDelta) The delta
+        """
+        return PackageDelta(PackageDelta.REMOVE, package_id)
+
+    @staticmethod
+    def change_address(package_id: int, address: str, city: str, zipcode: int) -> "PackageDelta":
+        """*change_address*
+            Describes an address correction.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package to correct
+        :param address: (str) The corrected street address
+        :param city: (str) The corrected city
+        :param zipcode: (int) The corrected zipcode
+        :return: (PackageDelta) The delta
+        """
+        return PackageDelta(PackageDelta.CHANGE_ADDRESS, package_id, address=address, city=city, zipcode=zipcode)
+
+    @staticmethod
+    def change_deadline(package_id: int, deadline: datetime.datetime) -> "PackageDelta":
+        """*change_deadline*
+            Describes a new deadline for a package.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package
+        :param deadline: (datetime) The new deadline
+        :return: (PackageDelta) The delta
+        """
+        return PackageDelta(PackageDelta.CHANGE_DEADLINE, package_id, deadline=deadline)
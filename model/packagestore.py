@@ -0,0 +1,275 @@
+from array import array
+from model.package import Package
+import datetime
+
+
+class PackageStore:
+    """A class used to hold a large number of packages in columns instead of objects. Each field is kept in a typed
+    array, one entry per package, and repeated strings (addresses, cities and notes) are stored once and referred to by
+    index. Deadlines are kept as minutes since midnight and delivery timestamps as seconds since midnight, both on the
+    store's day. Packages are read and written through PackageView objects, which hold nothing but a row number. While
+    package IDs arrive in consecutive order a row is found from its ID arithmetically; an ID to row dictionary is only
+    built once an ID breaks the sequence.
+
+    **Instance Attributes**
+        *day* (date):
+            The day that deadlines and delivery timestamps fall on.
+        *package_ids* (array('l')):
+            The package ID in each row.
+        *address_indices* (array('l')):
+            The index into strings of the address in each row.
+        *city_indices* (array('l')):
+            The index into strings of the city in each row.
+        *zipcodes* (array('l')):
+            The zipcode in each row.
+        *deadline_minutes* (array('H')):
+            The deadline in each row, in minutes since midnight.
+        *weights* (array('f')):
+            The weight in each row, in kilograms.
+        *note_indices* (array('l')):
+            The index into strings of the note in each row.
+        *delivery_statuses* (array('b')):
+            Whether the package in each row has been delivered.
+        *delivery_seconds* (array('d')):
+            The delivery time of the package in each row, in seconds since midnight.
+        *strings* ([str]):
+            The table of distinct address, city and note strings.
+
+    **Methods**
+        *__init__* (day (date, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *append* (package_id (int), address (str), city (str), zipcode (int), deadline (datetime), weight (float),
+        note (str)) -> PackageView
+            - TIME: Amortized: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *add* (package (Package)) -> PackageView
+            - TIME: Amortized: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *lookup* (package_id (int)) -> PackageView or None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *to_package* (row (int)) -> Package
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+    """
+
+    def __init__(self, day: datetime.date = None) -> None:
+        """*__init__*
+            Creates an empty store.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param day: (date, optional) The day that deadlines and timestamps fall on, today by default
+        :return: None
+        """
+        self.day = day if day is not None else datetime.date.today()
+        self.package_ids = array('l')
+        self.address_indices = array('l')
+        self.city_indices = array('l')
+        self.zipcodes = array('l')
+        self.deadline_minutes = array('H')
+        self.weights = array('f')
+        self.note_indices = array('l')
+        self.delivery_statuses = array('b')
+        self.delivery_seconds = array('d')
+        self.strings = []
+        self._string_indices = {}
+        self._rows = None
+        self._midnight = datetime.datetime.combine(self.day, datetime.time())
+
+    def _intern(self, string: str) -> int:
+        """*_intern*
+            Returns the index of a string in the string table, adding it if it is new.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param string: (str) The string to intern
+        :return: (int) The index of the string
+        """
+        index = self._string_indices.get(string)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(string)
+            self._string_indices[string] = index
+        return index
+
+    def append(self, package_id: int, address: str, city: str, zipcode: int, deadline: datetime.datetime,
+               weight: float, note: str) -> "PackageView":
+        """*append*
+            Adds a new, undelivered package to the end of the store.
+
+            TIME: Amortized: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The unique package ID
+        :param address: (str) The street address of the package
+        :param city: (str) The city in which the street address is located
+        :param zipcode: (int) The zipcode of the street address / city combo
+        :param deadline: (datetime) The time of day by which the package must arrive
+        :param weight: (float) The weight of the package in kilograms
+        :param note: (str) A note regarding the package and/or its delivery
+        :return: (PackageView) A view of the new row
+        """
+        if self.lookup(package_id) is not None:
+            raise ValueError(f"Package {package_id} is already in the store")
+        row = len(self.package_ids)
+        if self._rows is None and row > 0 and package_id != self.package_ids[0] + row:
+            self._rows = {existing_id: existing_row for existing_row, existing_id in enumerate(self.package_ids)}
+        self.package_ids.append(package_id)
+        self.address_indices.append(self._intern(address))
+        self.city_indices.append(self._intern(city))
+        self.zipcodes.append(zipcode)
+        self.deadline_minutes.append(deadline.hour * 60 + deadline.minute)
+        self.weights.append(weight)
+        self.note_indices.append(self._intern(note))
+        self.delivery_statuses.append(0)
+        self.delivery_seconds.append(0.0)
+        if self._rows is not None:
+            self._rows[package_id] = row
+        return PackageView(self, row)
+
+    def add(self, package: Package) -> "PackageView":
+        """*add*
+            Copies a Package into the store, including its delivery status and timestamp.
+
+            TIME: Amortized: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package: (Package) The package to copy
+        :return: (PackageView) A view of the new row
+        """
+        view = self.append(package.package_id, package.address, package.city, package.zipcode, package.deadline,
+                           package.weight, package.note)
+        view.delivery_status = package.delivery_status
+        view.delivery_time_stamp = package.delivery_time_stamp
+        return view
+
+    def lookup(self, package_id: int) -> "PackageView" or None:
+        """*lookup*
+            Finds a package by its ID.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package
+        :return: (PackageView or None) A view of the package, or None if it is not in the store
+        """
+        if self._rows is None:
+            row = package_id - self.package_ids[0] if self.package_ids else -1
+            if not 0 <= row < len(self.package_ids):
+                return None
+        else:
+            row = self._rows.get(package_id)
+            if row is None:
+                return None
+        return PackageView(self, row)
+
+    def to_package(self, row: int) -> Package:
+        """*to_package*
+            Builds a standalone Package object from a row.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param row: (int) The row to copy
+        :return: (Package) The package
+        """
+        view = PackageView(self, row)
+        return Package(view.package_id, view.address, view.city, view.zipcode, view.deadline, view.weight, view.note,
+                       view.delivery_status, view.delivery_time_stamp)
+
+    def __len__(self) -> int:
+        return len(self.package_ids)
+
+    def __iter__(self):
+        for row in range(len(self.package_ids)):
+            yield PackageView(self, row)
+
+
+class PackageView:
+    """A class used to read and write one row of a PackageStore through the same attributes as a Package, so a view
+    can be passed anywhere a Package is read.
+
+    **Instance Attributes**
+        *store* (PackageStore):
+            The store holding the package.
+        *row* (int):
+            The row of the package in the store.
+    """
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store: PackageStore, row: int) -> None:
+        self.store = store
+        self.row = row
+
+    @property
+    def package_id(self) -> int:
+        return self.store.package_ids[self.row]
+
+    @property
+    def address(self) -> str:
+        return self.store.strings[self.store.address_indices[self.row]]
+
+    @address.setter
+    def address(self, address: str) -> None:
+        self.store.address_indices[self.row] = self.store._intern(address)
+
+    @property
+    def city(self) -> str:
+        return self.store.strings[self.store.city_indices[self.row]]
+
+    @city.setter
+    def city(self, city: str) -> None:
+        self.store.city_indices[self.row] = self.store._intern(city)
+
+    @property
+    def zipcode(self) -> int:
+        return self.store.zipcodes[self.row]
+
+    @zipcode.setter
+    def zipcode(self, zipcode: int) -> None:
+        self.store.zipcodes[self.row] = zipcode
+
+    @property
+    def deadline(self) -> datetime.datetime:
+        return self.store._midnight + datetime.timedelta(minutes=self.store.deadline_minutes[self.row])
+
+    @deadline.setter
+    def deadline(self, deadline: datetime.datetime) -> None:
+        self.store.deadline_minutes[self.row] = deadline.hour * 60 + deadline.minute
+
+    @property
+    def weight(self) -> float:
+        return self.store.weights[self.row]
+
+    @property
+    def note(self) -> str:
+        return self.store.strings[self.store.note_indices[self.row]]
+
+    @property
+    def delivery_status(self) -> bool:
+        return bool(self.store.delivery_statuses[self.row])
+
+    @delivery_status.setter
+    def delivery_status(self, delivery_status: bool) -> None:
+        self.store.delivery_statuses[self.row] = 1 if delivery_status else 0
+
+    @property
+    def delivery_time_stamp(self) -> datetime.datetime:
+        return self.store._midnight + datetime.timedelta(seconds=self.store.delivery_seconds[self.row])
+
+    @delivery_time_stamp.setter
+    def delivery_time_stamp(self, delivery_time_stamp: datetime.datetime) -> None:
+        self.store.delivery_seconds[self.row] = (delivery_time_stamp.hour * 3600 + delivery_time_stamp.minute * 60
+                                                 + delivery_time_stamp.second
+                                                 + delivery_time_stamp.microsecond / 1000000)
@@ -0,0 +1,163 @@
+from model.routeplan import RoutePlan
+from typing import Optional
+import hashlib
+import json
+import os
+
+
+class PlanCache:
+    """A class used to keep finished plans on disk, so planning the same manifest again costs one file read and a
+    replay of each truck's route instead of the whole planning pipeline. A plan is addressed by a hash of what it was
+    made from: the package rows, the distance chart and the planning options. Any change to one of them gives a
+    different key, so an entry never has to be invalidated, only evicted.
+
+    Each plan is one small JSON file named by its key. Reading an entry touches its modification time, and after each
+    write the least recently used entries are removed until the directory fits in max_bytes again.
+
+    **Class Attributes**
+        *VERSION* (int):
+            Part of every key. Raise it when a change to the planner makes older plans wrong for the same inputs.
+        *DEFAULT_DIRECTORY* (str):
+            Where plans are kept by default, beside the data files.
+        *DEFAULT_MAX_BYTES* (int):
+            The most bytes of plans kept by default.
+
+    **Instance Attributes**
+        *directory* (str):
+            The directory the plans are kept in.
+        *max_bytes* (int):
+            The most bytes of plans kept before the least recently used are removed.
+
+    **Methods**
+        *__init__* (directory (str, optional), max_bytes (int, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *key* (facility (Facility), options (dict)) -> str
+            - TIME: O(f(x))= n + a^2, for n packages and a addresses
+            - SPACE: O(f(x))= n
+        *restore* (key (str), facility (Facility)) -> RoutePlan or None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *store* (key (str), plan (RoutePlan), facility (Facility)) -> None
+            - TIME: O(f(x))= n + e log e, for e entries
+            - SPACE: O(f(x))= n + e
+    """
+
+    VERSION: int = 2
+    DEFAULT_DIRECTORY: str = "dataFiles/.plancache"
+    DEFAULT_MAX_BYTES: int = 64 << 20
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """*__init__*
+            Creates a cache over a directory, which is made on the first write.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param directory: (str, optional) The directory the plans are kept in
+        :param max_bytes: (int, optional) The most bytes of plans to keep
+        :return: None
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(facility, options: dict) -> str:
+        """*key*
+            Hashes what a plan depends on: the facility's packages, sorted by ID with deadlines as times of day, its
+            distance matrix and address list, and the planning options.
+
+            TIME: O(f(x))= n + a^2, for n packages and a addresses
+
+            SPACE: O(f(x))= n
+
+        :param facility: (Facility) The unplanned facility
+        :param options: (dict) The planning options, which must be JSON serializable
+        :return: (str) The key, as hexadecimal
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps({"version": PlanCache.VERSION, "options": options}, sort_keys=True).encode())
+        for package_id in sorted(facility.package_ids):
+            package = facility.all_packages.lookup(package_id)
+            digest.update(json.dumps([package.package_id, package.address, package.city, package.zipcode,
+                                      package.deadline.strftime("%H:%M"), package.weight, package.note]).encode())
+        distances = facility.all_distances
+        digest.update(json.dumps(distances.addresses).encode())
+        digest.update(memoryview(distances.values).cast('B'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        """*_path*
+            Names the file of an entry.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param key: (str) The entry's key
+        :return: (str) The path of the entry's file
+        """
+        return os.path.join(self.directory, f"{key}.json")
+
+    def restore(self, key: str, facility) -> Optional[RoutePlan]:
+        """*restore*
+            Applies a kept plan to an unplanned facility, driving each truck's stored route so every package's
+            delivery time and each truck's mileage are as when it was planned. A missing or unreadable entry is a miss.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param key: (str) The key the plan was stored under
+        :param facility: (Facility) The unplanned facility the key was made from
+        :return: (RoutePlan or None) The plan, or None if it is not kept
+        """
+        path = self._path(key)
+        try:
+            with open(path) as entry_file:
+                plan = RoutePlan.from_dict(json.load(entry_file), facility.DEFAULT_EOD)
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        plan.apply(facility)
+        return plan
+
+    def store(self, key: str, plan: RoutePlan, facility) -> None:
+        """*store*
+            Keeps a plan, then removes the least recently used entries while the cache is over max_bytes. The entry is
+            written under a temporary name and renamed into place, so a reader never sees a partial plan.
+
+            TIME: O(f(x))= n + e log e, for e entries
+
+            SPACE: O(f(x))= n + e
+
+        :param key: (str) The key the plan was made from
+        :param plan: (RoutePlan) The plan
+        :param facility: (Facility) The planned facility, whose end of day the departure times are stored against
+        :return: None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as entry_file:
+            json.dump(plan.to_dict(facility.DEFAULT_EOD), entry_file, separators=(",", ":"))
+        os.replace(temporary_path, path)
+        entries = []
+        total_bytes = 0
+        with os.scandir(self.directory) as directory_entries:
+            for entry in directory_entries:
+                if entry.name.endswith(".json"):
+                    status = entry.stat()
+                    entries.append((status.st_mtime_ns, entry.path, status.st_size))
+                    total_bytes += status.st_size
+        entries.sort()
+        for _, entry_path, size in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if entry_path != path:
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+                total_bytes -= size
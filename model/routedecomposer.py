@@ -0,0 +1,394 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataStructures.distancematrix import DistanceMatrix
+from model.routeimprover import RouteImprover
+import math
+import os
+import random
+
+# The distance matrix each worker process improves clusters over. It is handed over once, when the worker starts.
+_worker_distances = None
+
+
+def _initialize_worker(distances: DistanceMatrix) -> None:
+    """*_initialize_worker*
+        Stores the distance matrix in a worker process.
+
+        TIME: O(f(x))= 1
+
+        SPACE: O(f(x))= 1
+
+    :param distances: (DistanceMatrix) The distances between all addresses
+    :return: (None)
+    """
+    global _worker_distances
+    _worker_distances = distances
+
+
+def _improve_segment(segment: [int], deadlines: {int: float}, time_budget: float) -> [int]:
+    """*_improve_segment*
+        Shortens one segment of a route in a worker process, keeping its first and last stops in place.
+
+        TIME: O(f(x))= m^2 log m, for m stops in the segment, bounded by time_budget
+
+        SPACE: O(f(x))= m
+
+    :param segment: ([int]) The address indices of the segment in visiting order
+    :param deadlines: ({int: float}) The mileage deadline of each stop, measured from the start of the segment
+    :param time_budget: (float) The most seconds to spend improving the segment
+    :return: ([int]) The improved segment
+    """
+    return RouteImprover(_worker_distances).improve(segment, deadlines, time_budget)
+
+
+class RouteDecomposer:
+    """A class used to shorten routes too long to improve as a whole. Local search over a whole route costs
+    O(f(x))= n^2 log n before the first move, so a route of thousands of stops is decomposed, cluster first and route
+    second:
+        1) the stops are split into clusters of about cluster_size by k-medoids over the distance matrix, seeded the
+           k-medoids++ way and refined by a few rounds of assigning each stop to its nearest medoid and moving each
+           medoid to the member closest to a sample of its cluster
+        2) the clusters are visited in the order of a short tour of their medoids, and each is entered at its stop
+           nearest the previous cluster's exit, toured nearest neighbor first and left from its stop nearest the next
+           cluster's medoid
+        3) each cluster's stretch of the route is improved by RouteImprover on its own, with its ends fixed, in a pool
+           of worker processes
+        4) the seams between clusters are repaired by improving a window of stops on either side of each one
+
+    Deadlines are measured from each stretch's estimated start, so, as with RouteImprover, no stop ends up later than
+    both its deadline and its arrival on the route the search started from. If the clustered route would miss a
+    deadline the supplied route met, the supplied route is cut into consecutive stretches instead, a sweep along it,
+    and those are improved the same way. Wall-clock time then grows with the number of stops per worker rather than
+    with the square of the route.
+
+    **Class Attributes**
+        *CLUSTER_SIZE* (int):
+            The default number of stops per cluster.
+        *MIN_STOPS* (int):
+            Routes with fewer stops are improved whole.
+        *MEDOID_ROUNDS* (int):
+            The most rounds of k-medoids refinement.
+        *MEDOID_SAMPLE* (int):
+            The number of cluster members a medoid candidate is measured against.
+        *SEAM_WINDOW* (int):
+            The number of stops on each side of a seam that are repaired together.
+        *SEAM_SHARE* (float):
+            The share of the time budget spent repairing seams.
+        *ORDER_SECONDS* (float):
+            The most seconds spent shortening the tour of the medoids that orders the clusters.
+
+    **Instance Attributes**
+        *distances* (DistanceMatrix):
+            The distances between all addresses.
+        *workers* (int or None):
+            The number of worker processes. None uses one per CPU; 1 improves every cluster in this process.
+        *cluster_size* (int):
+            The number of stops per cluster.
+        *seed* (int):
+            The seed of the k-medoids++ initialization, so a run can be reproduced.
+
+    **Methods**
+        *__init__* (distances (DistanceMatrix), workers (int or None, optional), cluster_size (int, optional),
+            seed (int, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *clusters* (stops ([int])) -> [[int]]
+            - TIME: O(f(x))= n * k, for k clusters
+            - SPACE: O(f(x))= n
+        *improve* (route ([int]), deadlines ({int: float}, optional), time_budget (float, optional)) -> [int]
+            - TIME: O(f(x))= n * (k + c), for c stops per cluster, plus the local search bounded by time_budget
+            - SPACE: O(f(x))= n
+    """
+
+    CLUSTER_SIZE: int = 150
+    MIN_STOPS: int = 300
+    MEDOID_ROUNDS: int = 4
+    MEDOID_SAMPLE: int = 40
+    SEAM_WINDOW: int = 20
+    SEAM_SHARE: float = 0.1
+    ORDER_SECONDS: float = 0.05
+
+    def __init__(self, distances: DistanceMatrix, workers: int or None = None, cluster_size: int = CLUSTER_SIZE,
+                 seed: int = 0) -> None:
+        """*__init__*
+            Creates a decomposer over a distance matrix.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param distances: (DistanceMatrix) The distances between all addresses
+        :param workers: (int or None, optional) The number of worker processes, None for one per CPU
+        :param cluster_size: (int, optional) The number of stops per cluster
+        :param seed: (int, optional) The seed of the k-medoids++ initialization
+        :return: None
+        """
+        if cluster_size < 2 * RouteDecomposer.SEAM_WINDOW:
+            raise ValueError(f"cluster_size must be at least {2 * RouteDecomposer.SEAM_WINDOW}")
+        self.distances = distances
+        self.workers = workers
+        self.cluster_size = cluster_size
+        self.seed = seed
+
+    def __reduce__(self):
+        # A copy sent to a worker process, such as one running a multi-start plan, improves its clusters in place
+        return RouteDecomposer, (self.distances, 1, self.cluster_size, self.seed)
+
+    def clusters(self, stops: [int]) -> [[int]]:
+        """*clusters*
+            Splits stops into about len(stops) / cluster_size clusters of nearby stops by k-medoids.
+
+            TIME: O(f(x))= n * k, for k clusters
+
+            SPACE: O(f(x))= n
+
+        :param stops: ([int]) The distinct address indices to split
+        :return: ([[int]]) The clusters, each starting with its medoid
+        """
+        cluster_count = math.ceil(len(stops) / self.cluster_size)
+        if cluster_count <= 1:
+            return [list(stops)]
+        rng = random.Random(self.seed)
+        # k-medoids++: each further medoid is drawn with odds growing with the square of its distance to the nearest
+        # medoid so far
+        medoids = [rng.choice(stops)]
+        row = self.distances.row(medoids[0])
+        nearest_distances = [row[stop] for stop in stops]
+        while len(medoids) < cluster_count:
+            weights = [distance * distance for distance in nearest_distances]
+            if sum(weights) <= 0:
+                break
+            medoid = rng.choices(stops, weights)[0]
+            medoids.append(medoid)
+            row = self.distances.row(medoid)
+            nearest_distances = [min(distance, row[stop]) for distance, stop in zip(nearest_distances, stops)]
+        members = []
+        for _ in range(RouteDecomposer.MEDOID_ROUNDS):
+            members = self._assign(stops, medoids)
+            new_medoids = [self._medoid(cluster, rng) for cluster in members if cluster]
+            if new_medoids == medoids:
+                break
+            medoids = new_medoids
+        else:
+            members = self._assign(stops, medoids)
+        # A medoid heads its own cluster even if it is as close to another medoid
+        medoid_set = set(medoids)
+        return [[medoid] + [stop for stop in cluster if stop not in medoid_set]
+                for medoid, cluster in zip(medoids, members)]
+
+    def _assign(self, stops: [int], medoids: [int]) -> [[int]]:
+        """*_assign*
+            Assigns every stop to its nearest medoid.
+
+            TIME: O(f(x))= n * k
+
+            SPACE: O(f(x))= n
+
+        :param stops: ([int]) The address indices to assign
+        :param medoids: ([int]) The medoids
+        :return: ([[int]]) The stops nearest each medoid, in the order of medoids
+        """
+        best_distances = [math.inf] * len(stops)
+        best_clusters = [0] * len(stops)
+        for cluster_index, medoid in enumerate(medoids):
+            row = self.distances.row(medoid)
+            for position, stop in enumerate(stops):
+                distance = row[stop]
+                if distance < best_distances[position]:
+                    best_distances[position] = distance
+                    best_clusters[position] = cluster_index
+        members = [[] for _ in medoids]
+        for stop, cluster_index in zip(stops, best_clusters):
+            members[cluster_index].append(stop)
+        return members
+
+    def _medoid(self, cluster: [int], rng: random.Random) -> int:
+        """*_medoid*
+            Finds the member of a cluster with the least total distance to a sample of the cluster.
+
+            TIME: O(f(x))= c, for c members
+
+            SPACE: O(f(x))= 1
+
+        :param cluster: ([int]) The members of the cluster
+        :param rng: (Random) Draws the sample
+        :return: (int) The medoid
+        """
+        sample = cluster if len(cluster) <= RouteDecomposer.MEDOID_SAMPLE \
+            else rng.sample(cluster, RouteDecomposer.MEDOID_SAMPLE)
+        rows = self.distances.row
+        return min(cluster, key=lambda member: sum(rows(member)[other] for other in sample))
+
+    def _clustered_route(self, route: [int]) -> ([int], [int]):
+        """*_clustered_route*
+            Rebuilds a route cluster by cluster: the clusters in the order of a tour of their medoids, built nearest
+            neighbor first and shortened by RouteImprover. Each cluster is toured nearest neighbor first from its stop
+            nearest where the previous cluster ended, and left from its stop nearest the next cluster's medoid.
+
+            TIME: O(f(x))= n * (k + c), for k clusters of c stops
+
+            SPACE: O(f(x))= n
+
+        :param route: ([int]) The route to rebuild, starting at its origin and ending at the hub
+        :return: (([int], [int])) The rebuilt route and the position of each cluster's first stop in it
+        """
+        medoid_clusters = {cluster[0]: cluster for cluster in self.clusters(route[1:-1])}
+        medoid_tour = [route[0]]
+        medoids = list(medoid_clusters)
+        while medoids:
+            medoid = self.distances.nearest(medoid_tour[-1], medoids)
+            medoid = medoid if medoid >= 0 else medoids[0]
+            medoids.remove(medoid)
+            medoid_tour.append(medoid)
+        medoid_tour.append(route[-1])
+        medoid_tour = RouteImprover(self.distances).improve(medoid_tour, None, RouteDecomposer.ORDER_SECONDS)
+        current = route[0]
+        new_route = [current]
+        boundaries = []
+        for position in range(1, len(medoid_tour) - 1):
+            remaining = list(medoid_clusters[medoid_tour[position]])
+            boundaries.append(len(new_route))
+            # Leave the cluster from its stop nearest the next medoid, touring the rest on the way there
+            exit_stop = min(remaining, key=self.distances.row(medoid_tour[position + 1]).__getitem__)
+            if len(remaining) > 1:
+                remaining.remove(exit_stop)
+            while remaining:
+                current = min(remaining, key=self.distances.row(current).__getitem__)
+                remaining.remove(current)
+                new_route.append(current)
+            if current != exit_stop:
+                new_route.append(exit_stop)
+                current = exit_stop
+        new_route.append(route[-1])
+        return new_route, boundaries
+
+    def _arrivals(self, route: [int]) -> [float]:
+        """*_arrivals*
+            Adds up the miles driven on arrival at every position of a route.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param route: ([int]) The address indices in visiting order
+        :return: ([float]) The miles driven on arrival at each position
+        """
+        arrivals = [0.0]
+        for position in range(1, len(route)):
+            arrivals.append(arrivals[-1] + self.distances.distance(route[position - 1], route[position]))
+        return arrivals
+
+    def _late_stops(self, route: [int], deadlines: {int: float}) -> {int}:
+        """*_late_stops*
+            Finds the stops of a route reached after their deadline.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param route: ([int]) The address indices in visiting order
+        :param deadlines: ({int: float}) The mileage deadline of each stop with one
+        :return: ({int}) The late stops
+        """
+        arrivals = self._arrivals(route)
+        return {stop for position, stop in enumerate(route[:-1])
+                if position > 0 and arrivals[position] > deadlines.get(stop, math.inf)}
+
+    @staticmethod
+    def _shifted(stops: [int], deadlines: {int: float}, start_miles: float) -> {int: float}:
+        """*_shifted*
+            Measures the deadlines of some stops from a point partway along a route.
+
+            TIME: O(f(x))= m
+
+            SPACE: O(f(x))= m
+
+        :param stops: ([int]) The stops
+        :param deadlines: ({int: float}) The mileage deadline of each stop with one, from the start of the route
+        :param start_miles: (float) The miles driven on reaching the point
+        :return: ({int: float}) The deadlines of the stops, from the point
+        """
+        return {stop: deadlines[stop] - start_miles for stop in stops if stop in deadlines}
+
+    def improve(self, route: [int], deadlines: {int: float} = None, time_budget: float = 1.0) -> [int]:
+        """*improve*
+            Shortens a route by improving its clusters separately, in parallel, then repairing the seams. Routes with
+            fewer than MIN_STOPS stops are improved whole. The result is never longer than the supplied route, which
+            is returned unchanged when the stitched route is longer.
+
+            TIME: O(f(x))= n * (k + c), for k clusters of c stops, plus the local search bounded by time_budget
+
+            SPACE: O(f(x))= n
+
+        :param route: ([int]) The address indices in visiting order, starting at the origin and ending at the hub
+        :param deadlines: ({int: float}, optional) For each stop with a deadline, the most miles that may be driven
+            before arriving there
+        :param time_budget: (float, optional) The most seconds to spend, wall clock
+        :return: ([int]) The improved route, as a new list
+        """
+        deadlines = deadlines if deadlines is not None else {}
+        if len(route) - 2 < RouteDecomposer.MIN_STOPS or time_budget <= 0:
+            return RouteImprover(self.distances).improve(route, deadlines, time_budget)
+        clustered_route, boundaries = self._clustered_route(route)
+        if deadlines and not self._late_stops(clustered_route, deadlines) <= self._late_stops(route, deadlines):
+            # Sweep along the supplied route instead, so no deadline it met is missed
+            clustered_route = list(route)
+            boundaries = list(range(1, len(route) - 1, self.cluster_size))
+        # Each segment runs from the last stop before its cluster to the cluster's last stop
+        ends = boundaries[1:] + [len(clustered_route)]
+        arrivals = self._arrivals(clustered_route)
+        segments = [clustered_route[start - 1:end] for start, end in zip(boundaries, ends)]
+        segment_deadlines = [self._shifted(segment, deadlines, arrivals[start - 1])
+                             for segment, start in zip(segments, boundaries)]
+        workers = self.workers if self.workers is not None else os.cpu_count() or 1
+        cluster_budget = time_budget * (1 - RouteDecomposer.SEAM_SHARE)
+        segment_budgets = [min(cluster_budget, cluster_budget * min(workers, len(segments)) * len(segment)
+                               / len(clustered_route)) for segment in segments]
+        if workers == 1 or len(segments) == 1:
+            improver = RouteImprover(self.distances)
+            improved = [improver.improve(segment, segment_deadline, budget)
+                        for segment, segment_deadline, budget in zip(segments, segment_deadlines, segment_budgets)]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(segments)), initializer=_initialize_worker,
+                                     initargs=(self.distances,)) as pool:
+                improved = list(pool.map(_improve_segment, segments, segment_deadlines, segment_budgets))
+        new_route = [clustered_route[0]]
+        for segment in improved:
+            new_route.extend(segment[1:])
+        new_route = self._repair_seams(new_route, boundaries[1:], deadlines, time_budget * RouteDecomposer.SEAM_SHARE)
+        # Regrouping a route that is already short can lengthen it more than the search wins back
+        improver = RouteImprover(self.distances)
+        if improver.route_length(new_route) > improver.route_length(route):
+            return list(route)
+        return new_route
+
+    def _repair_seams(self, route: [int], seams: [int], deadlines: {int: float}, time_budget: float) -> [int]:
+        """*_repair_seams*
+            Improves a window of SEAM_WINDOW stops on either side of every seam, one seam after another. A window keeps
+            its stops, so the seams after it stay at the same positions.
+
+            TIME: O(f(x))= n + s * w^2 log w, for s seams and w stops per window, bounded by time_budget
+
+            SPACE: O(f(x))= n
+
+        :param route: ([int]) The stitched route
+        :param seams: ([int]) The position of the first stop of every cluster but the first
+        :param deadlines: ({int: float}) The mileage deadline of each stop with one, from the start of the route
+        :param time_budget: (float) The most seconds to spend on all the seams
+        :return: ([int]) The repaired route
+        """
+        if not seams or time_budget <= 0:
+            return route
+        improver = RouteImprover(self.distances)
+        arrivals = self._arrivals(route)
+        saved_miles = 0.0
+        for seam in seams:
+            start = max(0, seam - 1 - RouteDecomposer.SEAM_WINDOW)
+            end = min(len(route) - 1, seam + RouteDecomposer.SEAM_WINDOW)
+            window = route[start:end + 1]
+            # Earlier windows only shorten the route before this one, bringing every later arrival forward
+            start_miles = arrivals[start] - saved_miles
+            repaired = improver.improve(window, self._shifted(window, deadlines, start_miles),
+                                        time_budget / len(seams))
+            saved_miles += improver.route_length(window) - improver.route_length(repaired)
+            route[start:end + 1] = repaired
+        return route
@@ -0,0 +1,164 @@
+from array import array
+from dataStructures.distancematrix import DistanceMatrix
+from model.truck import Truck
+import itertools
+import operator
+
+
+class RouteEvaluation:
+    """A class used to hold the scores of a batch of routes, one entry per route, in the order they were given.
+
+    **Instance Attributes**
+        *total_miles* (array('d')):
+            The miles driven along each route.
+        *arrival_minutes* ([array('d')]):
+            For each route, the minutes after departure at which every stop after the first is reached. The last entry
+            is the return to the hub.
+        *late_stop_counts* (array('i')):
+            The number of stops on each route reached after their deadline.
+        *max_lateness* (array('d')):
+            The most minutes any stop on each route is reached after its deadline, or 0.0 if none is late.
+
+    **Methods**
+        *best* () -> int
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+    """
+
+    __slots__ = ("total_miles", "arrival_minutes", "late_stop_counts", "max_lateness")
+
+    def __init__(self) -> None:
+        self.total_miles = array('d')
+        self.arrival_minutes = []
+        self.late_stop_counts = array('i')
+        self.max_lateness = array('d')
+
+    def best(self) -> int:
+        """*best*
+            Finds the route with the fewest late stops, then the fewest miles.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :return: (int) The position of the best route in the batch, or -1 if the batch is empty
+        """
+        if not self.total_miles:
+            return -1
+        return min(range(len(self.total_miles)), key=lambda position: (self.late_stop_counts[position],
+                                                                       self.total_miles[position]))
+
+    def __len__(self) -> int:
+        return len(self.total_miles)
+
+
+class RouteEvaluator:
+    """A class used to score many candidate routes at once. A route is a sequence of address indices. For each route
+    the row of every stop is gathered from the distance matrix and indexed by the next stop, and the legs are summed
+    into a running total, all through map and itertools.accumulate, so the per-stop work runs in C rather than in a
+    Python loop. Times are kept as minutes after departure rather than datetimes.
+
+    **Instance Attributes**
+        *distances* (DistanceMatrix):
+            The distances between all addresses.
+        *minutes_per_mile* (float):
+            The minutes taken to drive one mile.
+
+    **Methods**
+        *__init__* (distances (DistanceMatrix), miles_per_hour (float, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *legs* (route ([int])) -> array('d')
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *arrival_miles* (route ([int])) -> array('d')
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *evaluate* (routes ([[int]] or array('i')), deadlines ({int: float}, optional), stride (int, optional))
+            -> RouteEvaluation
+            - TIME: O(f(x))= r * n, for r routes of n stops
+            - SPACE: O(f(x))= r * n
+    """
+
+    def __init__(self, distances: DistanceMatrix, miles_per_hour: float = Truck.MILES_PER_HOUR) -> None:
+        """*__init__*
+            Creates an evaluator over a distance matrix.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param distances: (DistanceMatrix) The distances between all addresses
+        :param miles_per_hour: (float, optional) The driving speed used to turn miles into minutes
+        :return: None
+        """
+        self.distances = distances
+        self.minutes_per_mile = 60 / miles_per_hour
+
+    def legs(self, route: [int]) -> array:
+        """*legs*
+            Gathers the distance of every leg of a route.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param route: ([int]) The address indices in visiting order
+        :return: (array('d')) The miles of each leg, one fewer than the stops
+        """
+        return array('d', map(operator.getitem, map(self.distances.__getitem__, route),
+                              itertools.islice(route, 1, None)))
+
+    def arrival_miles(self, route: [int]) -> array:
+        """*arrival_miles*
+            Returns the miles driven on reaching each stop after the first.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param route: ([int]) The address indices in visiting order
+        :return: (array('d')) The running total of the legs
+        """
+        return array('d', itertools.accumulate(map(operator.getitem, map(self.distances.__getitem__, route),
+                                                   itertools.islice(route, 1, None))))
+
+    def evaluate(self, routes, deadlines: {int: float} = None, stride: int = None) -> RouteEvaluation:
+        """*evaluate*
+            Scores a batch of routes. The routes can be a list of sequences, or a flat integer array of equal-length
+            routes laid end to end, with stride giving the length of each. Deadlines are shared by every route, as
+            candidates are usually orderings of the same stops, and are measured in minutes after departure. A stop
+            with no deadline is never late.
+
+            TIME: O(f(x))= r * n, for r routes of n stops
+
+            SPACE: O(f(x))= r * n
+
+        :param routes: ([[int]] or array('i')) The routes to score
+        :param deadlines: ({int: float}, optional) The deadline of each address index, in minutes after departure
+        :param stride: (int, optional) The length of each route when routes is a flat array
+        :return: (RouteEvaluation) The scores of every route
+        """
+        if stride is not None:
+            flat_routes = memoryview(routes)
+            routes = [flat_routes[offset:offset + stride] for offset in range(0, len(flat_routes), stride)]
+        deadline_minutes = None
+        if deadlines:
+            deadline_minutes = array('d', [float("inf")]) * self.distances.size
+            for address_index, deadline in deadlines.items():
+                deadline_minutes[address_index] = deadline
+        evaluation = RouteEvaluation()
+        for route in routes:
+            miles = self.arrival_miles(route)
+            arrivals = array('d', map(operator.mul, miles, itertools.repeat(self.minutes_per_mile)))
+            evaluation.total_miles.append(miles[-1] if miles else 0.0)
+            evaluation.arrival_minutes.append(arrivals)
+            if deadline_minutes is None:
+                evaluation.late_stop_counts.append(0)
+                evaluation.max_lateness.append(0.0)
+                continue
+            lateness = list(map(operator.sub, arrivals,
+                                map(deadline_minutes.__getitem__, itertools.islice(route, 1, None))))
+            evaluation.late_stop_counts.append(sum(map((0.0).__lt__, lateness)))
+            evaluation.max_lateness.append(max(0.0, max(lateness, default=0.0)))
+        return evaluation
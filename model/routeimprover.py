@@ -0,0 +1,255 @@
+from dataStructures.distancematrix import DistanceMatrix
+import math
+import time
+
+
+class RouteImprover:
+    """A class used to shorten a delivery route by local search. A route is a list of address indices that ends at the
+    hub (index 0) and starts at the hub or, for a truck already on the road, at the stop it is headed to. The first and
+    last entries never move. Two kinds of moves are tried:
+        1) 2-opt: reverse the stretch of route between two edges, replacing those edges with two shorter ones.
+        2) Or-opt: move a run of one to three consecutive stops to a better place in the route.
+
+    Candidate moves come from each stop's nearest neighbors within the route, and each stop carries a don't-look bit
+    that is set once none of its moves improve the route and cleared when a move changes one of its edges, so the
+    search only revisits the part of the route that changed. The distances are treated as symmetric, as
+    DistanceMatrix.complete_triangle makes them.
+
+    A move is only accepted if no stop ends up arriving later than both its deadline and its arrival before the move,
+    so the improved route never misses a deadline the original route met. Deadlines and arrivals are measured in
+    miles driven from the start of the route.
+
+    **Class Attributes**
+        *NEIGHBOR_COUNT* (int):
+            The number of nearest stops considered around each stop.
+        *MAX_SEGMENT_LENGTH* (int):
+            The longest run of stops moved by an Or-opt move.
+
+    **Instance Attributes**
+        *distances* (DistanceMatrix):
+            The distances between all addresses.
+
+    **Methods**
+        *__init__* (distances (DistanceMatrix)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *improve* (route ([int]), deadlines ({int: float}, optional), time_budget (float, optional)) -> [int]
+            - TIME: O(f(x))= n^2 log n, bounded by time_budget
+            - SPACE: O(f(x))= n
+        *route_length* (route ([int])) -> float
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+    """
+
+    NEIGHBOR_COUNT: int = 8
+    MAX_SEGMENT_LENGTH: int = 3
+    _EPSILON: float = 1e-6
+
+    def __init__(self, distances: DistanceMatrix) -> None:
+        """*__init__*
+            Creates an improver for routes over a distance matrix.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param distances: (DistanceMatrix) The distances between all addresses
+        :return: None
+        """
+        self.distances = distances
+
+    def route_length(self, route: [int]) -> float:
+        """*route_length*
+            Adds up the distance driven along a route.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param route: ([int]) The address indices in visiting order
+        :return: (float) The total distance in miles
+        """
+        return sum(self.distances.distance(route[position], route[position + 1]) for position in range(len(route) - 1))
+
+    def improve(self, route: [int], deadlines: {int: float} = None, time_budget: float = 1.0) -> [int]:
+        """*improve*
+            Applies improving 2-opt and Or-opt moves until none are left or the time budget runs out.
+
+            TIME: O(f(x))= n^2 log n, bounded by time_budget
+
+            SPACE: O(f(x))= n
+
+        :param route: ([int]) The address indices in visiting order, ending at the hub
+        :param deadlines: ({int: float}, optional) For each stop with a deadline, the most miles that may be driven
+            before arriving there
+        :param time_budget: (float, optional) The most seconds to spend searching
+        :return: ([int]) The improved route, as a new list
+        """
+        route = list(route)
+        if len(route) < 5 or time_budget <= 0:
+            return route
+        stop_time = time.perf_counter() + time_budget
+        self._route = route
+        self._deadlines = deadlines if deadlines is not None else {}
+        self._index_route()
+        stops = route[1:-1]
+        self._neighbors = {}
+        for stop in stops:
+            row = self.distances.row(stop)
+            nearest = sorted(stops, key=row.__getitem__)
+            self._neighbors[stop] = [other for other in nearest[:RouteImprover.NEIGHBOR_COUNT + 1] if other != stop]
+        active = list(stops)
+        is_active = set(stops)
+        while active and time.perf_counter() < stop_time:
+            stop = active.pop()
+            is_active.discard(stop)
+            touched = self._improve_two_opt(stop) or self._improve_or_opt(stop)
+            if touched:
+                for node in touched:
+                    if node in self._position and node not in is_active:
+                        is_active.add(node)
+                        active.append(node)
+        return self._route
+
+    def _index_route(self) -> None:
+        """*_index_route*
+            Rebuilds the position of every stop and the miles driven on arrival at every position.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :return: None
+        """
+        route = self._route
+        self._position = {stop: position for position, stop in enumerate(route) if 0 < position < len(route) - 1}
+        arrivals = [0.0]
+        for position in range(1, len(route)):
+            arrivals.append(arrivals[-1] + self.distances.distance(route[position - 1], route[position]))
+        self._arrivals = arrivals
+
+    def _respects_deadlines(self, new_route: [int], first_changed: int) -> bool:
+        """*_respects_deadlines*
+            Checks that no stop in a candidate route arrives later than both its deadline and its current arrival.
+            Positions before first_changed are identical in both routes and are not checked.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param new_route: ([int]) The candidate route
+        :param first_changed: (int) The first position whose stop differs from the current route
+        :return: (bool) Whether the candidate may be accepted
+        """
+        if not self._deadlines:
+            return True
+        distance = self.distances.distance
+        miles = self._arrivals[first_changed - 1]
+        for position in range(first_changed, len(new_route) - 1):
+            miles += distance(new_route[position - 1], new_route[position])
+            stop = new_route[position]
+            deadline = self._deadlines.get(stop, math.inf)
+            if miles > deadline + RouteImprover._EPSILON \
+                    and miles > self._arrivals[self._position[stop]] + RouteImprover._EPSILON:
+                return False
+        return True
+
+    def _accept(self, new_route: [int], first_changed: int) -> bool:
+        """*_accept*
+            Replaces the current route with a candidate if it respects the deadlines.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param new_route: ([int]) The candidate route
+        :param first_changed: (int) The first position whose stop differs from the current route
+        :return: (bool) Whether the candidate was accepted
+        """
+        if not self._respects_deadlines(new_route, first_changed):
+            return False
+        self._route = new_route
+        self._index_route()
+        return True
+
+    def _improve_two_opt(self, stop: int) -> [int] or None:
+        """*_improve_two_opt*
+            Looks for an improving 2-opt move that joins stop to one of its neighbors, trying both the edge after the
+            stop and the edge before it.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param stop: (int) The stop to improve around
+        :return: ([int] or None) The endpoints of the changed edges, or None if no move was made
+        """
+        distance = self.distances.distance
+        route = self._route
+        stop_position = self._position[stop]
+        for neighbor in self._neighbors[stop]:
+            neighbor_position = self._position[neighbor]
+            # Edges (stop, next) and (neighbor, next) become (stop, neighbor) and (next, next)
+            first, second = sorted((stop_position, neighbor_position))
+            first_next, second_next = route[first + 1], route[second + 1]
+            gain = distance(route[first], first_next) + distance(route[second], second_next) \
+                - distance(route[first], route[second]) - distance(first_next, second_next)
+            if gain > RouteImprover._EPSILON and second > first + 1:
+                new_route = route[:first + 1] + route[first + 1:second + 1][::-1] + route[second + 1:]
+                if self._accept(new_route, first + 1):
+                    return [route[first], first_next, route[second], second_next]
+            # Edges (previous, stop) and (previous, neighbor) become (stop, neighbor) and (previous, previous)
+            first_previous, second_previous = route[first - 1], route[second - 1]
+            gain = distance(first_previous, route[first]) + distance(second_previous, route[second]) \
+                - distance(route[first], route[second]) - distance(first_previous, second_previous)
+            if gain > RouteImprover._EPSILON and second > first + 1:
+                new_route = route[:first] + route[first:second][::-1] + route[second:]
+                if self._accept(new_route, first):
+                    return [first_previous, route[first], second_previous, route[second]]
+        return None
+
+    def _improve_or_opt(self, stop: int) -> [int] or None:
+        """*_improve_or_opt*
+            Looks for an improving Or-opt move that lifts a run of stops starting at stop and places it, in either
+            orientation, beside one of the run's neighbors.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param stop: (int) The first stop of the run to move
+        :return: ([int] or None) The stops whose edges changed, or None if no move was made
+        """
+        distance = self.distances.distance
+        route = self._route
+        start = self._position[stop]
+        for length in range(1, RouteImprover.MAX_SEGMENT_LENGTH + 1):
+            end = start + length - 1
+            if end >= len(route) - 1:
+                break
+            segment = route[start:end + 1]
+            previous, following = route[start - 1], route[end + 1]
+            removal_gain = distance(previous, route[start]) + distance(route[end], following) \
+                - distance(previous, following)
+            if removal_gain <= RouteImprover._EPSILON:
+                continue
+            for neighbor in self._neighbors[stop]:
+                neighbor_position = self._position[neighbor]
+                if start - 1 <= neighbor_position <= end:
+                    continue
+                # Insert between neighbor and the stop after it, or between the stop before it and neighbor
+                for insert_after in (neighbor_position, neighbor_position - 1):
+                    if start - 1 <= insert_after <= end:
+                        continue
+                    left, right = route[insert_after], route[insert_after + 1]
+                    for oriented in (segment, segment[::-1]):
+                        insertion_cost = distance(left, oriented[0]) + distance(oriented[-1], right) \
+                            - distance(left, right)
+                        if removal_gain - insertion_cost <= RouteImprover._EPSILON:
+                            continue
+                        remaining = route[:start] + route[end + 1:]
+                        insert_position = insert_after + 1 if insert_after < start else insert_after + 1 - length
+                        new_route = remaining[:insert_position] + oriented + remaining[insert_position:]
+                        if self._accept(new_route, min(start, insert_position)):
+                            return [previous, following, left, right] + segment
+        return None
@@ -0,0 +1,199 @@
+from dataStructures.hashtable import HashTable
+from model.truck import Truck
+import datetime
+
+
+class RoutePlan:
+    """A class used to record the outcome of planning a facility's deliveries: which packages went on each truck, the
+    route each truck drove and when it left. A plan holds only IDs, address indices and times, so it is small and can
+    be passed between processes and applied back onto a Facility that was loaded from the same data.
+
+    **Instance Attributes**
+        *truck_package_ids* ([[int]]):
+            The IDs of the packages on each truck.
+        *truck_routes* ([[int]]):
+            The address indices each truck visits in order, starting and ending at the hub.
+        *departure_times* ([datetime]):
+            The time each truck leaves the hub.
+        *total_miles* (float):
+            The miles driven by all trucks.
+        *late_package_ids* ([int]):
+            The IDs of the packages delivered after their deadline.
+        *truck_vehicles* ([(int, float or None, int or None)] or None):
+            The package capacity, weight capacity and vehicle index of each truck, or None for the facility's own
+            trucks.
+        *driver_count* (int or None):
+            The number of drivers the plan was made with, or None if it is not known.
+
+    **Methods**
+        *from_facility* (facility (Facility)) -> RoutePlan
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *apply* (facility (Facility)) -> None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *score* () -> (int, float)
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *to_dict* (day (datetime)) -> dict
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *from_dict* (data (dict), day (datetime)) -> RoutePlan
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+    """
+
+    def __init__(self, truck_package_ids: [[int]], truck_routes: [[int]], departure_times: [datetime.datetime],
+                 total_miles: float, late_package_ids: [int],
+                 truck_vehicles: [(int, float or None, int or None)] = None, driver_count: int = None) -> None:
+        """*__init__*
+            Creates a plan from its parts.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param truck_package_ids: ([[int]]) The IDs of the packages on each truck
+        :param truck_routes: ([[int]]) The address indices each truck visits in order
+        :param departure_times: ([datetime]) The time each truck leaves the hub
+        :param total_miles: (float) The miles driven by all trucks
+        :param late_package_ids: ([int]) The IDs of the packages delivered after their deadline
+        :param truck_vehicles: ([(int, float or None, int or None)], optional) The package capacity, weight capacity
+            and vehicle index of each truck
+        :param driver_count: (int, optional) The number of drivers the plan was made with
+        :return: None
+        """
+        self.truck_package_ids = truck_package_ids
+        self.truck_routes = truck_routes
+        self.departure_times = departure_times
+        self.total_miles = total_miles
+        self.late_package_ids = late_package_ids
+        self.truck_vehicles = truck_vehicles
+        self.driver_count = driver_count
+
+    @staticmethod
+    def from_facility(facility) -> "RoutePlan":
+        """*from_facility*
+            Records the plan of a facility whose trucks have already been loaded and delivered.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param facility: (Facility) The planned facility
+        :return: (RoutePlan) The plan
+        """
+        truck_package_ids = []
+        late_package_ids = []
+        for truck in facility.all_trucks:
+            truck_package_ids.append(sorted(truck.package_list.keys()))
+            for package in truck.package_list.values():
+                if package.delivery_time_stamp > package.deadline:
+                    late_package_ids.append(package.package_id)
+        return RoutePlan(truck_package_ids,
+                         [list(truck.route) for truck in facility.all_trucks],
+                         [truck.departure_time for truck in facility.all_trucks],
+                         sum(truck.miles_traveled for truck in facility.all_trucks),
+                         sorted(late_package_ids),
+                         [(truck.package_capacity, truck.weight_capacity, truck.vehicle_index)
+                          for truck in facility.all_trucks],
+                         facility.driver_count)
+
+    def apply(self, facility) -> None:
+        """*apply*
+            Reloads a facility's trucks with this plan's packages and drives each truck's recorded route, so every
+            package timestamp and truck mileage matches the plan. When the plan records its trucks, the facility gets
+            exactly that many, with their capacities, as after Facility.plan_fleet. The facility also gets the plan's
+            number of drivers, so later changes to the plan are simulated with the drivers it was made with.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param facility: (Facility) A facility loaded from the same data the plan was made from
+        :return: None
+        """
+        if self.truck_vehicles is not None:
+            for truck in facility.all_trucks[len(self.truck_vehicles):]:
+                facility.clear_truck(truck)
+            trucks = facility.all_trucks[:len(self.truck_vehicles)]
+            while len(trucks) < len(self.truck_vehicles):
+                trucks.append(Truck())
+            for truck, (package_capacity, weight_capacity, vehicle_index) in zip(trucks, self.truck_vehicles):
+                truck.package_capacity = package_capacity
+                truck.weight_capacity = weight_capacity
+                truck.vehicle_index = vehicle_index
+            facility.all_trucks = trucks
+        if self.driver_count is not None:
+            facility.driver_count = self.driver_count
+        assigned_package_ids = set()
+        for truck, package_ids, route, departure_time in zip(facility.all_trucks, self.truck_package_ids,
+                                                              self.truck_routes, self.departure_times):
+            facility.clear_truck(truck)
+            truck.package_list = HashTable(len(package_ids))
+            for package_id in package_ids:
+                facility.assign_package(truck, facility.all_packages.lookup(package_id))
+                assigned_package_ids.add(package_id)
+            truck.departure_time = departure_time
+            truck.current_time = departure_time
+            truck.miles_traveled = 0.0
+            facility.deliver_route(truck, list(route))
+        facility.unassigned_packages[:] = [package for package in facility.all_packages.values()
+                                           if package.package_id not in assigned_package_ids]
+
+    def score(self) -> (int, float):
+        """*score*
+            Ranks plans: fewer late packages first, then fewer total miles.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :return: ((int, float)) The number of late packages and the total miles; lower is better
+        """
+        return len(self.late_package_ids), self.total_miles
+
+    def to_dict(self, day: datetime.datetime) -> dict:
+        """*to_dict*
+            Describes the plan with JSON types only. Departure times are stored as seconds after the start of the
+            given day, so a plan saved on one day can be applied on another.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param day: (datetime) The facility's end of day; its date and sub-second part anchor the departure times
+        :return: (dict) The plan, for from_dict
+        """
+        start_of_day = day.replace(hour=0, minute=0, second=0)
+        return {"truck_package_ids": self.truck_package_ids,
+                "truck_routes": self.truck_routes,
+                "departure_seconds": [(departure_time - start_of_day).total_seconds()
+                                      for departure_time in self.departure_times],
+                "total_miles": self.total_miles,
+                "late_package_ids": self.late_package_ids,
+                "truck_vehicles": self.truck_vehicles,
+                "driver_count": self.driver_count}
+
+    @staticmethod
+    def from_dict(data: dict, day: datetime.datetime) -> "RoutePlan":
+        """*from_dict*
+            Rebuilds a plan described by to_dict, with its departures on the given day.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param data: (dict) The plan, as returned by to_dict
+        :param day: (datetime) The end of day of the facility the plan will be applied to
+        :return: (RoutePlan) The plan
+        """
+        start_of_day = day.replace(hour=0, minute=0, second=0)
+        truck_vehicles = data["truck_vehicles"]
+        return RoutePlan(data["truck_package_ids"],
+                         data["truck_routes"],
+                         [start_of_day + datetime.timedelta(seconds=seconds) for seconds in data["departure_seconds"]],
+                         data["total_miles"],
+                         data["late_package_ids"],
+                         None if truck_vehicles is None else [tuple(vehicle) for vehicle in truck_vehicles],
+                         data["driver_count"])
@@ -0,0 +1,229 @@
+from collections import deque
+from dataStructures.distancematrix import DistanceMatrix
+from model.package import Package
+from model.truck import Truck
+import datetime
+import heapq
+
+
+class DispatchSimulation:
+    """A class used to run a day of deliveries as a discrete-event simulation. Events are kept in a heap ordered by
+    time, so any number of trucks and drivers are simulated together in one pass at O(f(x))= log n per event. The
+    events are:
+        1) READY: a truck is loaded and may leave once it has a driver
+        2) DEPART: a driver takes a truck out
+        3) ARRIVE: a truck reaches a stop and delivers the packages it holds for that address
+        4) RETURN: a truck is back at the hub
+        5) DRIVER_FREE: a driver can take another truck
+
+    Trucks are handed to drivers in dispatch order: a truck only leaves once every truck before it in the order has
+    left. A truck with a vehicle_index is one load of a vehicle that makes several trips, so it waits instead for the
+    vehicle's previous load in the order to be back at the hub, and loads of different vehicles do not wait for each
+    other. A truck without a route asks the route provider for one when it departs; the provider may set a later
+    truck.departure_time to hold the truck at the hub. The results are written to the same fields as
+    Facility.deliver_route: truck.route, departure_time, current_time and miles_traveled, and each package's
+    delivery_time_stamp and delivery_status.
+
+    **Class Attributes**
+        *READY*, *DEPART*, *ARRIVE*, *RETURN*, *DRIVER_FREE* (int):
+            The event kinds. At the same time, lower kinds are handled first.
+
+    **Instance Attributes**
+        *distances* (DistanceMatrix):
+            The distances between all addresses.
+        *address_packages* ({int: [Package]}):
+            Every package, grouped by the index of its address.
+        *driver_count* (int):
+            The number of drivers.
+        *route_provider* (callable or None):
+            Called as route_provider(truck, departure_time) for a truck without a route, returning the route.
+        *event_count* (int):
+            The number of events handled by the last run.
+
+    **Methods**
+        *__init__* (distances (DistanceMatrix), address_packages ({int: [Package]}), driver_count (int),
+            route_provider (callable, optional)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *run* (trucks ([Truck])) -> datetime or None
+            - TIME: O(f(x))= (s + p) log t, for s stops, p packages and t trucks
+            - SPACE: O(f(x))= t
+    """
+
+    READY: int = 0
+    DEPART: int = 1
+    ARRIVE: int = 2
+    RETURN: int = 3
+    DRIVER_FREE: int = 4
+
+    def __init__(self, distances: DistanceMatrix, address_packages: {int: [Package]}, driver_count: int,
+                 route_provider=None) -> None:
+        """*__init__*
+            Creates a simulation.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param distances: (DistanceMatrix) The distances between all addresses
+        :param address_packages: ({int: [Package]}) Every package, grouped by the index of its address
+        :param driver_count: (int) The number of drivers
+        :param route_provider: (callable, optional) Plans the route of a truck that has none when it departs
+        :return: None
+        """
+        self.distances = distances
+        self.address_packages = address_packages
+        self.driver_count = driver_count
+        self.route_provider = route_provider
+        self.event_count = 0
+
+    def run(self, trucks: [Truck]) -> datetime.datetime or None:
+        """*run*
+            Simulates the trucks from their ready times, the truck.departure_time each one holds on entry, until every
+            truck that gets a driver is back at the hub. Trucks with nothing to deliver never leave.
+
+            TIME: O(f(x))= (s + p) log t, for s stops, p packages and t trucks
+
+            SPACE: O(f(x))= t
+
+        :param trucks: ([Truck]) The trucks in dispatch order
+        :return: (datetime or None) When the last truck returned, or None if no truck left the hub
+        """
+        events = []
+        sequence = 0
+        queues = {}
+        for truck_index, truck in enumerate(trucks):
+            truck.current_time = truck.departure_time
+            truck.miles_traveled = 0.0
+            self._reset_packages(truck)
+            events.append((truck.departure_time, DispatchSimulation.READY, sequence, truck_index, 0))
+            sequence += 1
+            # Plain trucks share one queue; each vehicle's loads queue on their own
+            queues.setdefault(truck.vehicle_index, deque()).append(truck_index)
+        if not events:
+            return None
+        start_time = min(event[0] for event in events)
+        for _ in range(self.driver_count):
+            events.append((start_time, DispatchSimulation.DRIVER_FREE, sequence, -1, 0))
+            sequence += 1
+        heapq.heapify(events)
+        ready = [False] * len(trucks)
+        # The trucks at the head of their queue that are ready, with their vehicle at the hub, by dispatch order
+        dispatchable = []
+        vehicles_out = set()
+        free_drivers = 0
+        last_return = None
+        self.event_count = 0
+        while events:
+            time, kind, _, truck_index, position = heapq.heappop(events)
+            self.event_count += 1
+            if kind == DispatchSimulation.READY:
+                ready[truck_index] = True
+                vehicle_index = trucks[truck_index].vehicle_index
+                if queues[vehicle_index][0] == truck_index and vehicle_index not in vehicles_out:
+                    heapq.heappush(dispatchable, truck_index)
+            elif kind == DispatchSimulation.DRIVER_FREE:
+                free_drivers += 1
+            elif kind == DispatchSimulation.DEPART:
+                truck = trucks[truck_index]
+                truck.departure_time = time
+                truck.current_time = time
+                if len(truck.route) < 2 and self.route_provider is not None:
+                    truck.route = self.route_provider(truck, time)
+                    self._reset_packages(truck)
+                if len(truck.route) < 3:
+                    # Nothing to deliver, so the driver and the vehicle stay at the hub
+                    truck.route = []
+                    heapq.heappush(events, (time, DispatchSimulation.RETURN, sequence, truck_index, 0))
+                    sequence += 1
+                    continue
+                truck.current_time = truck.departure_time
+                truck.miles_traveled = 0.0
+                heapq.heappush(events, (self._arrival_time(truck, 1), DispatchSimulation.ARRIVE, sequence,
+                                        truck_index, 1))
+                sequence += 1
+            elif kind == DispatchSimulation.ARRIVE:
+                truck = trucks[truck_index]
+                route = truck.route
+                truck.miles_traveled += self.distances.distance(route[position - 1], route[position])
+                truck.current_time = time
+                if position == len(route) - 1:
+                    heapq.heappush(events, (time, DispatchSimulation.RETURN, sequence, truck_index, position))
+                    sequence += 1
+                    continue
+                for package in self.address_packages.get(route[position], ()):
+                    if package.package_id in truck.package_list and not package.delivery_status:
+                        package.delivery_time_stamp = time
+                        package.delivery_status = True
+                heapq.heappush(events, (self._arrival_time(truck, position + 1), DispatchSimulation.ARRIVE, sequence,
+                                        truck_index, position + 1))
+                sequence += 1
+            elif kind == DispatchSimulation.RETURN:
+                if position > 0:
+                    last_return = time
+                heapq.heappush(events, (time, DispatchSimulation.DRIVER_FREE, sequence, -1, 0))
+                sequence += 1
+                vehicle_index = trucks[truck_index].vehicle_index
+                if vehicle_index is not None:
+                    vehicles_out.discard(vehicle_index)
+                    self._release(queues[vehicle_index], ready, dispatchable)
+            # Hand free drivers to the trucks that can leave, in dispatch order
+            while free_drivers > 0 and dispatchable:
+                dispatch = heapq.heappop(dispatchable)
+                heapq.heappush(events, (time, DispatchSimulation.DEPART, sequence, dispatch, 0))
+                sequence += 1
+                free_drivers -= 1
+                vehicle_index = trucks[dispatch].vehicle_index
+                queues[vehicle_index].popleft()
+                if vehicle_index is None:
+                    self._release(queues[vehicle_index], ready, dispatchable)
+                else:
+                    vehicles_out.add(vehicle_index)
+        return last_return
+
+    @staticmethod
+    def _release(queue: deque, ready: [bool], dispatchable: [int]) -> None:
+        """*_release*
+            Lets the truck now at the head of a queue leave, if it is ready.
+
+            TIME: O(f(x))= log t
+
+            SPACE: O(f(x))= 1
+
+        :param queue: (deque) The indices of the trucks still to leave from the queue, in dispatch order
+        :param ready: ([bool]) Whether each truck is ready
+        :param dispatchable: ([int]) The heap of trucks that can leave; updated in place
+        :return: None
+        """
+        if queue and ready[queue[0]]:
+            heapq.heappush(dispatchable, queue[0])
+
+    @staticmethod
+    def _reset_packages(truck: Truck) -> None:
+        """*_reset_packages*
+            Marks a truck's packages undelivered, so each is stamped at the first stop at its address.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param truck: (Truck) The truck being simulated
+        :return: None
+        """
+        for package in truck.package_list.values():
+            package.delivery_status = False
+
+    def _arrival_time(self, truck: Truck, position: int) -> datetime.datetime:
+        """*_arrival_time*
+            Works out when a truck reaches a position in its route, from the miles driven so far.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param truck: (Truck) The truck on the road
+        :param position: (int) The position in truck.route being driven to
+        :return: (datetime) The arrival time
+        """
+        miles = truck.miles_traveled + self.distances.distance(truck.route[position - 1], truck.route[position])
+        return truck.departure_time + datetime.timedelta(hours=miles / Truck.MILES_PER_HOUR)
@@ -0,0 +1,295 @@
+from dataStructures.distancematrix import DistanceMatrix
+from model.package import Package
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+
+class FacilitySnapshot:
+    """A class used to cache the parsed contents of a package manifest and a distance chart in one binary file, so a
+    Facility can start without re-parsing either CSV. The file holds a small JSON header (source file fingerprints,
+    the address list and a string table), the packages as fixed-size packed rows, and the distance matrix as raw
+    float32 values aligned for memory mapping. The matrix is never copied out of the file: the DistanceMatrix reads
+    straight from a read-only mmap, so every process that opens the snapshot shares the same pages.
+
+    A snapshot is only used while it still matches its sources. Each source's size and modification time are checked
+    first; if either differs, the file's SHA-256 is compared before the snapshot is rejected.
+
+    **Class Attributes**
+        *MAGIC* (bytes):
+            The bytes every snapshot file starts with.
+        *VERSION* (int):
+            The snapshot format version. Snapshots written by other versions are ignored.
+        *PACKAGE_ROW* (struct.Struct):
+            The packed layout of one package: ID, address, city, zipcode, deadline in minutes since midnight, weight
+            and note, with strings stored as indices into the string table.
+
+    **Instance Attributes**
+        *path* (str):
+            The path of the snapshot file.
+        *distances* (DistanceMatrix):
+            The distance matrix, backed by the memory-mapped file.
+
+    **Methods**
+        *path_for* (package_file (str), distance_file (str)) -> str
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *open* (package_file (str), distance_file (str)) -> FacilitySnapshot or None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *save* (package_file (str), distance_file (str), packages ([Package]), distances (DistanceMatrix)) -> str
+            - TIME: O(f(x))= n^2
+            - SPACE: O(f(x))= n
+        *packages* (end_of_day (datetime)) -> [Package]
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+    """
+
+    MAGIC: bytes = b"DTRSNAP\0"
+    VERSION: int = 1
+    PACKAGE_ROW: struct.Struct = struct.Struct("<qiiqHdi")
+    _PREAMBLE: struct.Struct = struct.Struct("<8sII")
+    _ALIGNMENT: int = 64
+
+    def __init__(self, path: str, header: dict, rows_offset: int, snapshot_map: mmap.mmap) -> None:
+        """*__init__*
+            Wraps an opened, validated snapshot file. Use open to create one.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param path: (str) The path of the snapshot file
+        :param header: (dict) The decoded JSON header
+        :param rows_offset: (int) The offset of the first packed package row
+        :param snapshot_map: (mmap) The read-only mapping of the whole file
+        :return: None
+        """
+        self.path = path
+        self._header = header
+        self._rows_offset = rows_offset
+        self._map = snapshot_map
+        size = len(header["addresses"])
+        matrix_offset = header["matrix_offset"]
+        matrix_view = memoryview(snapshot_map)[matrix_offset:matrix_offset + size * size * 4].cast('f')
+        self.distances = DistanceMatrix(header["addresses"], matrix_view)
+
+    @staticmethod
+    def path_for(package_file: str, distance_file: str) -> str:
+        """*path_for*
+            Names the snapshot for a pair of source files. It is written next to the distance chart.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param package_file: (str) The path of the package manifest CSV
+        :param distance_file: (str) The path of the distance chart CSV
+        :return: (str) The path of the snapshot file
+        """
+        package_name = os.path.splitext(os.path.basename(package_file))[0]
+        distance_name = os.path.splitext(os.path.basename(distance_file))[0]
+        return os.path.join(os.path.dirname(distance_file), f".{package_name}.{distance_name}.snapshot")
+
+    @staticmethod
+    def _fingerprint(path: str, with_hash: bool) -> dict:
+        """*_fingerprint*
+            Describes a source file by size, modification time and, optionally, content hash.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param path: (str) The path of the source file
+        :param with_hash: (bool) Whether to hash the file contents
+        :return: (dict) The fingerprint
+        """
+        status = os.stat(path)
+        fingerprint = {"size": status.st_size, "mtime_ns": status.st_mtime_ns}
+        if with_hash:
+            digest = hashlib.sha256()
+            with open(path, "rb") as source_file:
+                for block in iter(lambda: source_file.read(1 << 20), b""):
+                    digest.update(block)
+            fingerprint["sha256"] = digest.hexdigest()
+        return fingerprint
+
+    @staticmethod
+    def _matches(stored: dict, path: str) -> bool:
+        """*_matches*
+            Checks a stored fingerprint against a source file, hashing the file only if its size or time changed. When
+            the hash still matches, the stored size and time are updated in place, so the file is not hashed again.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :param stored: (dict) The fingerprint saved in the snapshot; its size and time may be updated
+        :param path: (str) The path of the source file
+        :return: (bool) Whether the source is unchanged
+        """
+        current = FacilitySnapshot._fingerprint(path, False)
+        if current["size"] == stored["size"] and current["mtime_ns"] == stored["mtime_ns"]:
+            return True
+        if FacilitySnapshot._fingerprint(path, True)["sha256"] != stored["sha256"]:
+            return False
+        stored.update(current)
+        return True
+
+    @staticmethod
+    def _rewrite_header(path: str, header: dict, header_length: int) -> None:
+        """*_rewrite_header*
+            Writes an updated header over the old one, padded with spaces to the same length, so nothing after it
+            moves. A header that has grown is not written; the snapshot then stays valid, only slower to check.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param path: (str) The path of the snapshot file
+        :param header: (dict) The updated header
+        :param header_length: (int) The length of the header in the file, in bytes
+        :return: None
+        """
+        encoded_header = json.dumps(header).encode("utf-8")
+        if len(encoded_header) > header_length:
+            return
+        try:
+            with open(path, "r+b") as snapshot_file:
+                snapshot_file.seek(FacilitySnapshot._PREAMBLE.size)
+                snapshot_file.write(encoded_header.ljust(header_length))
+        except OSError:
+            pass
+
+    @staticmethod
+    def open(package_file: str, distance_file: str) -> "FacilitySnapshot" or None:
+        """*open*
+            Opens the snapshot for a pair of source files if it exists, was written by this version, and still matches
+            both sources.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param package_file: (str) The path of the package manifest CSV
+        :param distance_file: (str) The path of the distance chart CSV
+        :return: (FacilitySnapshot or None) The snapshot, or None if it is missing or stale
+        """
+        path = FacilitySnapshot.path_for(package_file, distance_file)
+        try:
+            with open(path, "rb") as snapshot_file:
+                snapshot_map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, header_length = FacilitySnapshot._PREAMBLE.unpack_from(snapshot_map, 0)
+            if magic != FacilitySnapshot.MAGIC or version != FacilitySnapshot.VERSION:
+                raise ValueError("unsupported snapshot")
+            header_start = FacilitySnapshot._PREAMBLE.size
+            header = json.loads(snapshot_map[header_start:header_start + header_length].decode("utf-8"))
+            stored_sources = json.dumps(header["sources"])
+            if header["byteorder"] != sys.byteorder \
+                    or not FacilitySnapshot._matches(header["sources"]["packages"], package_file) \
+                    or not FacilitySnapshot._matches(header["sources"]["distances"], distance_file):
+                raise ValueError("stale snapshot")
+            if json.dumps(header["sources"]) != stored_sources:
+                # A source was touched but not changed; record its new time so later runs skip the hash
+                FacilitySnapshot._rewrite_header(path, header, header_length)
+            return FacilitySnapshot(path, header, header_start + header_length, snapshot_map)
+        except (OSError, ValueError, KeyError, struct.error):
+            snapshot_map.close()
+            return None
+
+    @staticmethod
+    def save(package_file: str, distance_file: str, packages: [Package], distances: DistanceMatrix) -> str:
+        """*save*
+            Writes a snapshot of freshly parsed packages and distances. The file is written under a temporary name and
+            then renamed into place, so a reader never sees a partial snapshot.
+
+            TIME: O(f(x))= n^2
+
+            SPACE: O(f(x))= n
+
+        :param package_file: (str) The path of the package manifest CSV the packages came from
+        :param distance_file: (str) The path of the distance chart CSV the distances came from
+        :param packages: ([Package]) The packages, as parsed and before any changes
+        :param distances: (DistanceMatrix) The distance matrix
+        :return: (str) The path of the snapshot file
+        """
+        strings = []
+        string_indices = {}
+
+        def intern(string: str) -> int:
+            if string not in string_indices:
+                string_indices[string] = len(strings)
+                strings.append(string)
+            return string_indices[string]
+
+        package_rows = bytearray()
+        for package in packages:
+            package_rows += FacilitySnapshot.PACKAGE_ROW.pack(package.package_id,
+                                                              intern(package.address),
+                                                              intern(package.city),
+                                                              package.zipcode,
+                                                              package.deadline.hour * 60 + package.deadline.minute,
+                                                              package.weight,
+                                                              intern(package.note))
+        header = {
+            "byteorder": sys.byteorder,
+            "sources": {"packages": FacilitySnapshot._fingerprint(package_file, True),
+                        "distances": FacilitySnapshot._fingerprint(distance_file, True)},
+            "addresses": distances.addresses,
+            "strings": strings,
+            "package_count": len(packages),
+            "matrix_offset": 0,
+        }
+        # The matrix offset is part of the header, so grow it until the header stops changing length
+        while True:
+            encoded_header = json.dumps(header).encode("utf-8")
+            rows_offset = FacilitySnapshot._PREAMBLE.size + len(encoded_header)
+            matrix_offset = rows_offset + len(package_rows)
+            matrix_offset += -matrix_offset % FacilitySnapshot._ALIGNMENT
+            if matrix_offset == header["matrix_offset"]:
+                break
+            header["matrix_offset"] = matrix_offset
+        path = FacilitySnapshot.path_for(package_file, distance_file)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as snapshot_file:
+            snapshot_file.write(FacilitySnapshot._PREAMBLE.pack(FacilitySnapshot.MAGIC, FacilitySnapshot.VERSION,
+                                                                len(encoded_header)))
+            snapshot_file.write(encoded_header)
+            snapshot_file.write(package_rows)
+            snapshot_file.write(b"\0" * (matrix_offset - rows_offset - len(package_rows)))
+            for index in range(distances.size):
+                snapshot_file.write(distances.row(index))
+        os.replace(temporary_path, path)
+        return path
+
+    def packages(self, end_of_day: datetime.datetime) -> [Package]:
+        """*packages*
+            Unpacks the stored package rows into new Package objects, with deadlines on end_of_day's date.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param end_of_day: (datetime) The deadline used for "EOD", and the day every other deadline falls on
+        :return: ([Package]) The packages, in manifest order
+        """
+        strings = self._header["strings"]
+        deadlines = {}
+        packages = []
+        rows_end = self._rows_offset + self._header["package_count"] * FacilitySnapshot.PACKAGE_ROW.size
+        rows = FacilitySnapshot.PACKAGE_ROW.iter_unpack(self._map[self._rows_offset:rows_end])
+        for package_id, address, city, zipcode, deadline_minutes, weight, note in rows:
+            deadline = deadlines.get(deadline_minutes)
+            if deadline is None:
+                deadline = end_of_day.replace(hour=deadline_minutes // 60, minute=deadline_minutes % 60, second=0)
+                deadlines[deadline_minutes] = deadline
+            packages.append(Package(package_id, strings[address], strings[city], zipcode, deadline, weight,
+                                    strings[note]))
+        return packages
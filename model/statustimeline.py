@@ -0,0 +1,153 @@
+from array import array
+from collections import OrderedDict
+from model.truck import Truck
+import bisect
+import datetime
+import math
+
+
+class StatusTimeline:
+    """A class used to answer "what was the status of the packages at time T" without walking the trucks. It is built
+    once from a planned facility and holds, for every package on a truck, the instant its truck left the hub and the
+    instant it was delivered, as seconds since the start of the day the trucks left in sorted arrays:
+        1) by package ID, so one package's status is a binary search: O(f(x))= log n
+        2) by departure and by delivery, so the packages that have left or been delivered by T are a prefix found by
+           one binary search each
+
+    The status of every package at one time is built once and kept in a least recently used cache, so repeated
+    queries for the same time cost a dictionary lookup.
+
+    **Class Attributes**
+        *AT_HUB*, *EN_ROUTE*, *DELIVERED* (str):
+            The statuses a package can have.
+        *CACHE_SIZE* (int):
+            The number of times whose statuses are kept.
+
+    **Instance Attributes**
+        *start_of_day* (datetime):
+            Midnight before the first truck left. Every instant is kept as seconds since then, so one after the next
+            midnight stays later than those before it.
+        *package_ids* (array('q')):
+            The IDs of the packages on trucks, sorted.
+        *departure_seconds* (array('d')):
+            When each package in package_ids left the hub.
+        *delivery_seconds* (array('d')):
+            When each package in package_ids was delivered.
+
+    **Methods**
+        *__init__* (trucks ([Truck])) -> None
+            - TIME: O(f(x))= n log n
+            - SPACE: O(f(x))= n
+        *status* (package_id (int), at_time (datetime)) -> str or None
+            - TIME: O(f(x))= log n
+            - SPACE: O(f(x))= 1
+        *statuses* (at_time (datetime)) -> {int: str}
+            - TIME: First call for a time: O(f(x))= n
+            - TIME: Cached: O(f(x))= 1
+            - SPACE: O(f(x))= n per cached time
+    """
+
+    AT_HUB: str = "At the Hub"
+    EN_ROUTE: str = "En Route"
+    DELIVERED: str = "Delivered"
+    CACHE_SIZE: int = 128
+
+    def __init__(self, trucks: list) -> None:
+        """*__init__*
+            Builds the timeline from trucks that have been planned and driven. A package whose delivery stamp is
+            before its truck left has not been driven yet; it is treated as never delivered.
+
+            TIME: O(f(x))= n log n
+
+            SPACE: O(f(x))= n
+
+        :param trucks: ([Truck]) The facility's trucks
+        :return: None
+        """
+        first_departure = min((truck.departure_time for truck in trucks), default=Truck.DEPARTURE_TIME)
+        self.start_of_day = first_departure.replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = []
+        for truck in trucks:
+            departure = self._seconds(truck.departure_time)
+            for package in truck.package_list.values():
+                delivery = self._seconds(package.delivery_time_stamp)
+                rows.append((package.package_id, departure, delivery if delivery >= departure else math.inf))
+        rows.sort()
+        self.package_ids = array('q', (row[0] for row in rows))
+        self.departure_seconds = array('d', (row[1] for row in rows))
+        self.delivery_seconds = array('d', (row[2] for row in rows))
+        by_departure = sorted(range(len(rows)), key=self.departure_seconds.__getitem__)
+        self._departure_order = array('q', (self.package_ids[row] for row in by_departure))
+        self._sorted_departures = array('d', (self.departure_seconds[row] for row in by_departure))
+        by_delivery = sorted(range(len(rows)), key=self.delivery_seconds.__getitem__)
+        self._delivery_order = array('q', (self.package_ids[row] for row in by_delivery))
+        self._sorted_deliveries = array('d', (self.delivery_seconds[row] for row in by_delivery))
+        self._snapshots = OrderedDict()
+
+    def _seconds(self, time: datetime.datetime) -> float:
+        """*_seconds*
+            Converts a time into seconds since start_of_day, keeping its date, so a time after midnight is more than
+            a day's seconds rather than wrapping around to the morning.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param time: (datetime) The time
+        :return: (float) The seconds since start_of_day
+        """
+        return (time - self.start_of_day).total_seconds()
+
+    def status(self, package_id: int, at_time: datetime.datetime) -> str or None:
+        """*status*
+            Finds the status of one package at a time. A package has left the hub once its truck left strictly before
+            the time, and is delivered once its delivery time is not after it.
+
+            TIME: O(f(x))= log n
+
+            SPACE: O(f(x))= 1
+
+        :param package_id: (int) The ID of the package
+        :param at_time: (datetime) The time to check
+        :return: (str or None) AT_HUB, EN_ROUTE or DELIVERED, or None if the package is not on a truck
+        """
+        row = bisect.bisect_left(self.package_ids, package_id)
+        if row == len(self.package_ids) or self.package_ids[row] != package_id:
+            return None
+        seconds = self._seconds(at_time)
+        if not self.departure_seconds[row] < seconds:
+            return StatusTimeline.AT_HUB
+        if seconds < self.delivery_seconds[row]:
+            return StatusTimeline.EN_ROUTE
+        return StatusTimeline.DELIVERED
+
+    def statuses(self, at_time: datetime.datetime) -> {int: str}:
+        """*statuses*
+            Finds the status of every package on a truck at a time, with the same precedence as status: a package is
+            only delivered once its truck has left, so one whose truck has not been driven stays at the hub. The
+            result is cached by time and must not be changed by the caller.
+
+            TIME:
+                - First call for a time: O(f(x))= n
+                - Cached: O(f(x))= 1
+
+            SPACE: O(f(x))= n per cached time
+
+        :param at_time: (datetime) The time to check
+        :return: ({int: str}) The status of each package, by package ID
+        """
+        seconds = self._seconds(at_time)
+        snapshot = self._snapshots.get(seconds)
+        if snapshot is not None:
+            self._snapshots.move_to_end(seconds)
+            return snapshot
+        snapshot = dict.fromkeys(self.package_ids, StatusTimeline.AT_HUB)
+        snapshot.update(dict.fromkeys(
+            self._departure_order[:bisect.bisect_left(self._sorted_departures, seconds)], StatusTimeline.EN_ROUTE))
+        delivered = self._delivery_order[:bisect.bisect_right(self._sorted_deliveries, seconds)]
+        snapshot.update((package_id, StatusTimeline.DELIVERED) for package_id in delivered
+                        if snapshot[package_id] == StatusTimeline.EN_ROUTE)
+        self._snapshots[seconds] = snapshot
+        if len(self._snapshots) > StatusTimeline.CACHE_SIZE:
+            self._snapshots.popitem(last=False)
+        return snapshot
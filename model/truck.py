@@ -11,7 +11,7 @@ class Truck:
         *DEPARTURE_TIME* (TimeClock):
             The default time the truck left the hub.
         *MAX_PACKAGES* (int):
-            The max number of packages in a vehicle.
+            The default number of packages a truck can carry.
 
     **Instance Attributes**
         *current_time* (TimeClock):
@@ -20,17 +20,33 @@ class Truck:
             The packages on the truck.
         *miles_traveled* (float):
             The number of miles traveled by the truck.
+        *route* ([int]):
+            The address indices the truck visits in order, starting and ending at the hub. Empty until delivery.
+        *package_capacity* (int):
+            The number of packages the truck can carry.
+        *weight_capacity* (float or None):
+            The total package weight the truck can carry, in kg, or None for no limit.
+        *vehicle_index* (int or None):
+            The vehicle of the fleet that drives this load, when a fleet runs several loads per vehicle.
 
     **Methods**
-        *__init__* (departure_time (TimeClock, optional), number_of_packages (int, optional)) -> None
+        *__init__* (departure_time (TimeClock, optional), number_of_packages (int, optional),
+            weight_capacity (float, optional), vehicle_index (int, optional)) -> None
             - TIME: O(f(x))= n
             - SPACE: O(f(x))= n
+        *loaded_weight* () -> float
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= 1
+        *has_room* (package_count (int, optional), weight (float, optional)) -> bool
+            - TIME: O(f(x))= 1 without a weight limit, O(f(x))= n with one
+            - SPACE: O(f(x))= 1
     """
     MILES_PER_HOUR: int = 18
     DEPARTURE_TIME: datetime.datetime = datetime.datetime.now().replace(hour=8, minute=0, second=0)
     MAX_PACKAGES: int = 16
 
-    def __init__(self, departure_time: datetime = DEPARTURE_TIME, number_of_packages: int = MAX_PACKAGES) -> None:
+    def __init__(self, departure_time: datetime = DEPARTURE_TIME, number_of_packages: int = MAX_PACKAGES,
+                 weight_capacity: float = None, vehicle_index: int = None) -> None:
         """*__init__*
             Creates a truck with the supplied departure time and package load capacity.
 
@@ -39,12 +55,44 @@ class Truck:
             SPACE: O(f(x))= n
 
         :param departure_time: (TimeClock, optional) the time the truck leaves the depot
-        :param number_of_packages: (int, optional) the number of packages the truck will carry, capped at MAX_PACKAGES
+        :param number_of_packages: (int, optional) the number of packages the truck can carry
+        :param weight_capacity: (float, optional) the total package weight the truck can carry, no limit if None
+        :param vehicle_index: (int, optional) the vehicle of the fleet that drives this load
         :return: (None)
         """
-        if number_of_packages > Truck.MAX_PACKAGES:
-            number_of_packages = Truck.MAX_PACKAGES
-        self.package_list: HashTable = HashTable(number_of_packages * 2)
+        self.package_capacity: int = number_of_packages
+        self.weight_capacity: float or None = weight_capacity
+        self.vehicle_index: int or None = vehicle_index
+        self.package_list: HashTable = HashTable(number_of_packages)
         self.current_time: datetime.datetime = departure_time
         self.departure_time: datetime.datetime = departure_time
         self.miles_traveled: float = 0.0
+        self.route: [int] = []
+
+    def loaded_weight(self) -> float:
+        """*loaded_weight*
+            Adds up the weight of the packages on the truck.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= 1
+
+        :return: (float) The total weight, in kg
+        """
+        return sum(package.weight for package in self.package_list.values())
+
+    def has_room(self, package_count: int = 1, weight: float = 0.0) -> bool:
+        """*has_room*
+            Determines whether the truck can take more packages without passing its package or weight capacity.
+
+            TIME: O(f(x))= 1 without a weight limit, O(f(x))= n with one
+
+            SPACE: O(f(x))= 1
+
+        :param package_count: (int, optional) The number of packages to add
+        :param weight: (float, optional) Their total weight, in kg
+        :return: (bool) True if they fit, otherwise False
+        """
+        if self.package_list.item_count + package_count > self.package_capacity:
+            return False
+        return self.weight_capacity is None or self.loaded_weight() + weight <= self.weight_capacity
@@ -0,0 +1,414 @@
+from batch_queries import BatchQueries
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from model.facility import Facility
+from model.fleet import VehicleType
+from model.manifest import ManifestReader
+from model.routeplan import RoutePlan
+from user_interface import UserInterface
+import asyncio
+import copy
+import hashlib
+import json
+import signal
+
+# The unplanned facility each worker process copies for every plan. It is handed over once, when the worker starts.
+_worker_facility = None
+
+
+def _initialize_worker(facility: Facility) -> None:
+    """*_initialize_worker*
+        Stores the unplanned facility in a worker process.
+
+        TIME: O(f(x))= 1
+
+        SPACE: O(f(x))= 1
+
+    :param facility: (Facility) The unplanned facility
+    :return: (None)
+    """
+    global _worker_facility
+    _worker_facility = facility
+
+
+def _plan_manifest(facility: Facility, manifest: str, fleet: [str] or None, time_budget: float) -> RoutePlan:
+    """*_plan_manifest*
+        Plans a manifest on a private copy of an unplanned facility. The distance matrix and neighbor index are shared
+        by the copy rather than duplicated.
+
+        TIME: O(f(x))= n^2 log n
+
+        SPACE: O(f(x))= n
+
+    :param facility: (Facility) The unplanned facility
+    :param manifest: (str) The manifest CSV
+    :param fleet: ([str] or None) The vehicle types to plan for, or None for the facility's three trucks
+    :param time_budget: (float) The most seconds to spend improving each route
+    :return: (RoutePlan) The plan
+    """
+    facility = copy.deepcopy(facility)
+    facility.load_packages(ManifestReader.from_text(manifest, Facility.DEFAULT_EOD).packages())
+    if fleet is None:
+        facility.plan(None, time_budget)
+    else:
+        facility.plan_fleet([VehicleType.parse(spec) for spec in fleet], None, time_budget)
+    return RoutePlan.from_facility(facility)
+
+
+def _plan_in_worker(manifest: str, fleet: [str] or None, time_budget: float) -> RoutePlan:
+    """*_plan_in_worker*
+        Plans a manifest on a copy of the worker's facility.
+
+        TIME: O(f(x))= n^2 log n
+
+        SPACE: O(f(x))= n
+
+    :param manifest: (str) The manifest CSV
+    :param fleet: ([str] or None) The vehicle types to plan for, or None for the facility's three trucks
+    :param time_budget: (float) The most seconds to spend improving each route
+    :return: (RoutePlan) The plan
+    """
+    return _plan_manifest(_worker_facility, manifest, fleet, time_budget)
+
+
+class PlanningService:
+    """A class used to serve plans and queries from one long-lived process, so the distance chart is parsed and its
+    neighbor lists are built once rather than for every request. Requests arrive as JSON lines over a local TCP or
+    Unix socket, and each connection may send many without waiting for the answers, which carry the request's "id":
+        1) {"op": "plan", "manifest": <CSV text>, "fleet": [<vehicle type>, ...], "time_budget": <seconds>}: plans a
+           manifest over the service's distance chart, for the facility's trucks or the given fleet, and answers with
+           the plan's key and summary
+        2) {"op": "query", "plan": <key>, "queries": [<query>, ...]}: answers batch queries (see BatchQueries) against
+           a plan made earlier
+        3) {"op": "stats"}: answers with the service's counters
+
+    Planning is CPU bound, so it runs in a pool of worker processes, keeping the event loop free to accept requests.
+    A plan's key is the SHA-256 of its normalized manifest rows and options. Identical requests that arrive while the
+    first is still being planned are coalesced: they wait on the same computation rather than starting their own. The
+    most recent plans are kept, with their facilities rebuilt on the first query, so repeated requests and queries
+    cost a dictionary lookup.
+
+    **Class Attributes**
+        *PLAN_CACHE_SIZE* (int):
+            The number of recent plans kept.
+        *STREAM_LIMIT* (int):
+            The longest request line accepted, in bytes.
+
+    **Instance Attributes**
+        *facility* (Facility):
+            The unplanned facility holding the distance chart, which every plan copies.
+        *workers* (int or None):
+            The number of worker processes. None uses one per CPU; 0 plans in the event loop's thread pool instead.
+        *time_budget* (float):
+            The default number of seconds spent improving each route.
+        *stats* ({str: int}):
+            The number of requests, plans computed, coalesced requests, plans served from memory and errors.
+
+    **Methods**
+        *__init__* (facility (Facility), workers (int or None, optional), time_budget (float, optional)) -> None
+            - TIME: O(f(x))= n^2 log n, to build the neighbor lists
+            - SPACE: O(f(x))= 1
+        *close* () -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *plan_key* (manifest (str), fleet ([str] or None), time_budget (float)) -> str
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *plan* (manifest (str), fleet ([str], optional), time_budget (float, optional)) -> (str, RoutePlan)
+            - TIME: O(f(x))= n, plus planning unless the plan is kept or in progress
+            - SPACE: O(f(x))= n
+        *query* (key (str), queries ([str])) -> [dict]
+            - TIME: O(f(x))= q, plus n to rebuild the plan's facility on its first query
+            - SPACE: O(f(x))= n
+        *plan_summary* (key (str), plan (RoutePlan)) -> dict
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *handle* (request (dict)) -> dict
+            - TIME: O(f(x))= n, plus planning or queries
+            - SPACE: O(f(x))= n
+        *serve* (port (int, optional), host (str, optional), path (str, optional)) -> None
+            - TIME: Runs until cancelled
+            - SPACE: O(f(x))= c, for c connections, plus the kept plans
+    """
+
+    PLAN_CACHE_SIZE: int = 256
+    STREAM_LIMIT: int = 1 << 24
+
+    def __init__(self, facility: Facility, workers: int or None = None,
+                 time_budget: float = Facility.ROUTE_IMPROVEMENT_SECONDS) -> None:
+        """*__init__*
+            Creates a service over an unplanned facility and starts its worker processes.
+
+            TIME: O(f(x))= n^2 log n, to build the neighbor lists
+
+            SPACE: O(f(x))= 1
+
+        :param facility: (Facility) The unplanned facility holding the distance chart
+        :param workers: (int or None, optional) The number of worker processes, None for one per CPU, 0 for none
+        :param time_budget: (float, optional) The default number of seconds spent improving each route
+        :return: None
+        """
+        self.facility = facility
+        self.workers = workers
+        self.time_budget = time_budget
+        self.stats = {"requests": 0, "plans_computed": 0, "coalesced": 0, "kept": 0, "errors": 0}
+        # Build every neighbor list now, so each worker starts with them instead of building its own
+        facility.neighbor_index.build()
+        self._pool = None if workers == 0 else \
+            ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(facility,))
+        self._in_flight = {}
+        self._plans = OrderedDict()
+
+    def close(self) -> None:
+        """*close*
+            Stops the worker processes.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :return: None
+        """
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def plan_key(manifest: str, fleet: [str] or None, time_budget: float) -> str:
+        """*plan_key*
+            Hashes a plan request. The manifest is normalized first, so line endings, surrounding spaces and blank
+            rows do not change the key.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param manifest: (str) The manifest CSV
+        :param fleet: ([str] or None) The vehicle types, or None for the facility's trucks
+        :param time_budget: (float) The seconds spent improving each route
+        :return: (str) The key, as hexadecimal
+        """
+        rows = "\n".join(line.strip() for line in manifest.splitlines() if line.strip())
+        options = json.dumps({"fleet": fleet, "time_budget": time_budget}, sort_keys=True)
+        return hashlib.sha256((options + "\n" + rows).encode()).hexdigest()
+
+    async def plan(self, manifest: str, fleet: [str] = None, time_budget: float = None) -> (str, RoutePlan):
+        """*plan*
+            Plans a manifest, unless the same plan is kept or already being planned, in which case that plan is
+            awaited instead.
+
+            TIME: O(f(x))= n, plus planning unless the plan is kept or in progress
+
+            SPACE: O(f(x))= n
+
+        :param manifest: (str) The manifest CSV
+        :param fleet: ([str], optional) The vehicle types to plan for, or None for the facility's trucks
+        :param time_budget: (float, optional) The seconds spent improving each route; the service default if None
+        :return: ((str, RoutePlan)) The plan's key and the plan
+        """
+        time_budget = self.time_budget if time_budget is None else time_budget
+        if fleet is not None:
+            # Reject a bad fleet here, rather than in a worker
+            for spec in fleet:
+                VehicleType.parse(spec)
+        key = PlanningService.plan_key(manifest, fleet, time_budget)
+        kept = self._plans.get(key)
+        if kept is not None:
+            self._plans.move_to_end(key)
+            self.stats["kept"] += 1
+            return key, kept[1]
+        future = self._in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if self._pool is None:
+                future = loop.run_in_executor(None, _plan_manifest, self.facility, manifest, fleet, time_budget)
+            else:
+                future = loop.run_in_executor(self._pool, _plan_in_worker, manifest, fleet, time_budget)
+            self._in_flight[key] = future
+            self.stats["plans_computed"] += 1
+            future.add_done_callback(lambda done: self._finish(key, manifest, done))
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded, so a client that disconnects does not cancel the plan for the others waiting on it
+        return key, await asyncio.shield(future)
+
+    def _finish(self, key: str, manifest: str, future: asyncio.Future) -> None:
+        """*_finish*
+            Keeps a finished plan and stops coalescing requests onto it.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param key: (str) The plan's key
+        :param manifest: (str) The manifest the plan was made from
+        :param future: (Future) The finished computation
+        :return: None
+        """
+        self._in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._plans[key] = [manifest, future.result(), None]
+        if len(self._plans) > PlanningService.PLAN_CACHE_SIZE:
+            self._plans.popitem(last=False)
+
+    def _planned_facility(self, key: str) -> Facility or None:
+        """*_planned_facility*
+            Returns the facility of a kept plan, rebuilding it from the plan on first use.
+
+            TIME: First use: O(f(x))= n; later: O(f(x))= 1
+
+            SPACE: O(f(x))= n
+
+        :param key: (str) The plan's key
+        :return: (Facility or None) The planned facility, or None if the plan is not kept
+        """
+        kept = self._plans.get(key)
+        if kept is None:
+            return None
+        self._plans.move_to_end(key)
+        if kept[2] is None:
+            facility = copy.deepcopy(self.facility)
+            facility.load_packages(ManifestReader.from_text(kept[0], Facility.DEFAULT_EOD).packages())
+            kept[1].apply(facility)
+            kept[2] = facility
+        return kept[2]
+
+    def query(self, key: str, queries: [str]) -> [dict]:
+        """*query*
+            Answers batch queries against a kept plan.
+
+            TIME: O(f(x))= q, plus n to rebuild the plan's facility on its first query
+
+            SPACE: O(f(x))= n
+
+        :param key: (str) The plan's key
+        :param queries: ([str]) The queries, one per item
+        :return: ([dict]) The records answering every query, in order
+        """
+        facility = self._planned_facility(key)
+        if facility is None:
+            raise KeyError(f"no plan {key!r}; plan the manifest again")
+        batch = BatchQueries(facility)
+        records = []
+        for line in queries:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                records.extend(batch.answer(line))
+        return records
+
+    @staticmethod
+    def plan_summary(key: str, plan: RoutePlan) -> dict:
+        """*plan_summary*
+            Describes a plan as plain data that can be written as JSON.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param key: (str) The plan's key
+        :param plan: (RoutePlan) The plan
+        :return: (dict) The key, the totals and each truck's departure, packages and route
+        """
+        return {"plan": key,
+                "total_miles": round(plan.total_miles, 2),
+                "late_package_ids": plan.late_package_ids,
+                "trucks": [{"departure": UserInterface.datetime_to_string(departure_time),
+                            "package_ids": package_ids,
+                            "route": route}
+                           for package_ids, route, departure_time in zip(plan.truck_package_ids, plan.truck_routes,
+                                                                         plan.departure_times)]}
+
+    async def handle(self, request: dict) -> dict:
+        """*handle*
+            Answers one request. A request that cannot be answered gets a response with an error.
+
+            TIME: O(f(x))= n, plus planning or queries
+
+            SPACE: O(f(x))= n
+
+        :param request: (dict) The request
+        :return: (dict) The response, with the request's id
+        """
+        self.stats["requests"] += 1
+        response = {"id": request.get("id") if isinstance(request, dict) else None}
+        try:
+            operation = request.get("op")
+            if operation == "plan":
+                key, plan = await self.plan(request["manifest"], request.get("fleet"), request.get("time_budget"))
+                response.update(PlanningService.plan_summary(key, plan))
+            elif operation == "query":
+                response["records"] = self.query(request["plan"], request["queries"])
+            elif operation == "stats":
+                response["stats"] = dict(self.stats, in_flight=len(self._in_flight), kept_plans=len(self._plans))
+            else:
+                raise ValueError(f"unknown op {operation!r}")
+            response["ok"] = True
+        except Exception as error:
+            self.stats["errors"] += 1
+            response["ok"] = False
+            response["error"] = f"{type(error).__name__}: {error}"
+        return response
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """*_connection*
+            Reads the requests of one connection, answering each as soon as it is done.
+
+            TIME: O(f(x))= r, for r requests, plus answering them
+
+            SPACE: O(f(x))= r
+
+        :param reader: (StreamReader) The connection's incoming side
+        :param writer: (StreamWriter) The connection's outgoing side
+        :return: None
+        """
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        tasks = set()
+
+        async def answer(line: bytes) -> None:
+            try:
+                request = json.loads(line)
+            except ValueError as error:
+                self.stats["requests"] += 1
+                self.stats["errors"] += 1
+                response = {"id": None, "ok": False, "error": f"invalid JSON: {error}"}
+            else:
+                response = await self.handle(request)
+            writer.write((encode(response) + "\n").encode())
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, port: int = None, host: str = "127.0.0.1", path: str = None) -> None:
+        """*serve*
+            Accepts connections until cancelled or sent SIGTERM, on a Unix socket if a path is given, otherwise on a TCP
+            port.
+
+            TIME: Runs until stopped
+
+            SPACE: O(f(x))= c, for c connections, plus the kept plans
+
+        :param port: (int, optional) The TCP port to listen on
+        :param host: (str, optional) The address to listen on; the local machine by default
+        :param path: (str, optional) The path of a Unix socket to listen on instead
+        :return: None
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self._connection, path, limit=PlanningService.STREAM_LIMIT)
+        else:
+            server = await asyncio.start_server(self._connection, host, port, limit=PlanningService.STREAM_LIMIT)
+        stopped = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+        async with server:
+            await stopped.wait()
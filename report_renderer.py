@@ -0,0 +1,164 @@
+from model.package import Package
+from model.statustimeline import StatusTimeline
+import datetime
+import sys
+
+
+class ReportRenderer:
+    """A class used to render the all-packages and all-statuses reports as one block of text. The row layouts are
+    compiled into bound str.format methods once, each distinct time is formatted once, and every row of a report is
+    collected in a list and joined, so a report costs one write however many packages it lists. Long reports can be
+    paged for interactive use, one write per page.
+
+    **Class Attributes**
+        *PACKAGE_HEADER*, *STATUS_HEADER* (str):
+            The headings of the two reports.
+        *PACKAGE_ROW*, *STATUS_ROW* (callable):
+            The compiled row layouts.
+        *EOD_STATUS_ROW* (callable):
+            The compiled status row layout for a package whose deadline is shown as EOD_DEADLINE, with a wider ID.
+        *EOD_DEADLINE* (str):
+            The deadline text that selects EOD_STATUS_ROW.
+        *NOT_DELIVERED* (str):
+            Shown as the delivery time of a package that has not been delivered.
+
+    **Instance Attributes**
+        *time_formatter* (callable):
+            Formats a datetime for display.
+
+    **Methods**
+        *__init__* (time_formatter (callable)) -> None
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *time_string* (time (datetime)) -> str
+            - TIME: O(f(x))= 1
+            - SPACE: O(f(x))= 1
+        *package_report* (packages ([Package])) -> str
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *status_report* (truck_packages ([[Package]]), statuses ({int: str})) -> str
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+        *emit* (report (str), output (text stream, optional), page_size (int, optional)) -> None
+            - TIME: O(f(x))= n
+            - SPACE: O(f(x))= n
+    """
+
+    PACKAGE_HEADER: str = (
+        "===================================================================================================================\n"
+        "||                                              Package Information                                              ||\n"
+        "===================================================================================================================\n"
+        " ID | ADDRESS                                | CITY             |ZIPCODE| DEADLINE   | KG    | NOTE\n"
+        "----|----------------------------------------|------------------|-------|------------|-------|---------------------\n")
+    STATUS_HEADER: str = ("\n====================================================\n"
+                          "||         Package Status Data: Truck #{0}          ||\n"
+                          "====================================================\n"
+                          "ID | DEADLINE   | STATUS     | DELIVERY TIME\n"
+                          "---|------------|------------|----------------------\n")
+    PACKAGE_ROW = "{0:3} | {1:38} | {2:16} | {3:5} | {4:10} | {5:5} | {6}\n".format
+    STATUS_ROW = "{0:2} | {1:10} | {2:10} | {3}\n".format
+    EOD_STATUS_ROW = "{0:4} | {1:10} | {2:10} | {3}\n".format
+    EOD_DEADLINE: str = "E.O.D"
+    NOT_DELIVERED: str = "Package not delivered"
+
+    def __init__(self, time_formatter) -> None:
+        """*__init__*
+            Creates a renderer.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param time_formatter: (callable) Formats a datetime for display
+        :return: None
+        """
+        self.time_formatter = time_formatter
+        self._time_strings = {}
+
+    def time_string(self, time: datetime.datetime) -> str:
+        """*time_string*
+            Formats a time, formatting each distinct time once.
+
+            TIME: O(f(x))= 1
+
+            SPACE: O(f(x))= 1
+
+        :param time: (datetime) The time to format
+        :return: (str) The formatted time
+        """
+        time_string = self._time_strings.get(time)
+        if time_string is None:
+            time_string = self._time_strings[time] = self.time_formatter(time)
+        return time_string
+
+    def package_report(self, packages: [Package]) -> str:
+        """*package_report*
+            Renders the details of packages, one row each.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param packages: ([Package]) The packages, in the order to list them
+        :return: (str) The report
+        """
+        row = ReportRenderer.PACKAGE_ROW
+        time_string = self.time_string
+        rows = [ReportRenderer.PACKAGE_HEADER]
+        rows.extend([row(package.package_id, package.address, package.city, package.zipcode,
+                         time_string(package.deadline), package.weight, package.note) for package in packages])
+        return "".join(rows)
+
+    def status_report(self, truck_packages: [[Package]], statuses: {int: str}) -> str:
+        """*status_report*
+            Renders the status of every package, under a heading for each truck.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param truck_packages: ([[Package]]) The packages on each truck, in the order to list them
+        :param statuses: ({int: str}) The status of each package, by package ID
+        :return: (str) The report
+        """
+        time_string = self.time_string
+        rows = []
+        for truck_number, packages in enumerate(truck_packages, 1):
+            rows.append(ReportRenderer.STATUS_HEADER.format(truck_number))
+            for package in packages:
+                status = statuses[package.package_id]
+                delivery_time = time_string(package.delivery_time_stamp) if status == StatusTimeline.DELIVERED \
+                    else ReportRenderer.NOT_DELIVERED
+                deadline = time_string(package.deadline)
+                row = ReportRenderer.EOD_STATUS_ROW if deadline == ReportRenderer.EOD_DEADLINE \
+                    else ReportRenderer.STATUS_ROW
+                rows.append(row(package.package_id, deadline, status, delivery_time))
+        return "".join(rows)
+
+    @staticmethod
+    def emit(report: str, output=None, page_size: int = None) -> None:
+        """*emit*
+            Writes a report. Without a page size the report is written at once; with one, it is written a page of lines
+            at a time, waiting for enter between pages.
+
+            TIME: O(f(x))= n
+
+            SPACE: O(f(x))= n
+
+        :param report: (str) The report
+        :param output: (text stream, optional) Where to write the report; stdout by default
+        :param page_size: (int, optional) The number of lines per page
+        :return: (None)
+        """
+        if output is None:
+            output = sys.stdout
+        if page_size is None or page_size <= 0:
+            output.write(report)
+            output.flush()
+            return
+        lines = report.splitlines(keepends=True)
+        for start in range(0, len(lines), page_size):
+            if start > 0:
+                input("-- more: press enter --")
+            output.write("".join(lines[start:start + page_size]))
+            output.flush()
@@ -0,0 +1,118 @@
+from model.facility import Facility
+from model.multistart import MultiStartPlanner
+from model.package import Package
+from model.packagedelta import PackageDelta
+from model.routeplan import RoutePlan
+import unittest
+
+
+class ApplyDeltaTest(unittest.TestCase):
+    """Checks late changes to a plan: what counts as already delivered, and that trucks waiting for a driver are held
+    back when a repaired route brings the driver back later."""
+
+    def assert_drivers_suffice(self, facility: Facility) -> None:
+        events = []
+        for truck in facility.all_trucks:
+            if len(truck.route) >= 3:
+                events.append((truck.departure_time, 1))
+                events.append((truck.current_time, -1))
+        on_the_road = 0
+        # A driver coming back at the instant another truck leaves can take it
+        for _, change in sorted(events):
+            on_the_road += change
+            self.assertLessEqual(on_the_road, facility.driver_count)
+
+    def test_undriven_truck_is_not_delivered(self):
+        # A package on a truck that has not been driven keeps its default midnight time stamp
+        facility = Facility()
+        truck = facility.all_trucks[0]
+        for package in list(facility.unassigned_packages)[:5]:
+            facility.assign_package(truck, package)
+        noon = truck.departure_time.replace(hour=12)
+        package_id = next(iter(truck.package_list.values())).package_id
+        changes = facility.apply_delta(PackageDelta.change_deadline(package_id, noon.replace(hour=17)), noon, 0)
+        self.assertEqual(set(changes), {package.package_id for package in truck.package_list.values()})
+        for old_time_stamp, new_time_stamp in changes.values():
+            self.assertIsNone(old_time_stamp)
+            self.assertGreater(new_time_stamp, truck.departure_time)
+
+    def test_delivered_package_is_rejected(self):
+        facility = Facility()
+        facility.plan(time_budget=0)
+        truck = facility.all_trucks[0]
+        package = min(truck.package_list.values(), key=lambda delivered: delivered.delivery_time_stamp)
+        with self.assertRaises(ValueError):
+            facility.apply_delta(PackageDelta.remove(package.package_id), package.delivery_time_stamp, 0)
+
+    def test_later_return_holds_back_waiting_truck(self):
+        facility = Facility()
+        facility.plan(time_budget=0)
+        first_truck, _, last_truck = facility.all_trucks
+        self.assertLess(first_truck.current_time, last_truck.departure_time)
+        at_time = first_truck.departure_time.replace(hour=9, minute=0)
+        package = max((pending for pending in first_truck.package_list.values()
+                       if pending.delivery_time_stamp > at_time), key=lambda pending: pending.deadline)
+        farthest_index = max(range(facility.all_distances.size),
+                             key=lambda address_index: facility.all_distances.distance(0, address_index))
+        old_departure = last_truck.departure_time
+        changes = facility.apply_delta(PackageDelta.change_address(
+            package.package_id, facility.all_addresses[farthest_index], package.city, package.zipcode), at_time, 0)
+        self.assertGreater(first_truck.current_time, old_departure)
+        self.assertEqual(last_truck.departure_time, first_truck.current_time)
+        for held_back_package in last_truck.package_list.values():
+            self.assertIn(held_back_package.package_id, changes)
+            self.assertGreater(held_back_package.delivery_time_stamp, last_truck.departure_time)
+        self.assert_drivers_suffice(facility)
+
+    def change_pending_deadline(self, facility: Facility) -> [(int, int)]:
+        first_truck = facility.all_trucks[0]
+        at_time = first_truck.departure_time.replace(hour=8, minute=30)
+        package = max((pending for pending in first_truck.package_list.values()
+                       if pending.delivery_time_stamp > at_time), key=lambda pending: pending.deadline)
+        facility.apply_delta(PackageDelta.change_deadline(package.package_id, at_time.replace(hour=17)), at_time, 0)
+        self.assert_drivers_suffice(facility)
+        return [(truck.departure_time.hour, truck.departure_time.minute) for truck in facility.all_trucks]
+
+    def test_delta_after_applied_plan(self):
+        # A plan applied from a multistart or from its saved form keeps the drivers it was made with
+        facility = Facility()
+        facility.plan(time_budget=0)
+        plan = RoutePlan.from_facility(facility)
+        expected = self.change_pending_deadline(facility)
+        multistart_facility = Facility()
+        MultiStartPlanner(starts=1, workers=1, time_budget=0).plan(multistart_facility)
+        self.assertEqual(multistart_facility.driver_count, Facility.DRIVER_COUNT)
+        self.assertEqual(self.change_pending_deadline(multistart_facility), expected)
+        restored_facility = Facility()
+        RoutePlan.from_dict(plan.to_dict(Facility.DEFAULT_EOD), Facility.DEFAULT_EOD).apply(restored_facility)
+        self.assertEqual(restored_facility.driver_count, Facility.DRIVER_COUNT)
+        self.assertEqual(self.change_pending_deadline(restored_facility), expected)
+
+    def test_add_at_unknown_address(self):
+        facility = Facility()
+        facility.plan(time_budget=0)
+        at_time = facility.all_trucks[0].departure_time.replace(hour=9, minute=0)
+        package_ids = list(facility.package_ids)
+        package_id = max(package_ids) + 1
+        package = Package(package_id, "1 Nowhere Lane", "Salt Lake City", 84101, at_time.replace(hour=17), 1.0, "")
+        with self.assertRaises(ValueError):
+            facility.apply_delta(PackageDelta.add(package), at_time, 0)
+        self.assertIsNone(facility.all_packages.lookup(package_id))
+        self.assertIsNone(facility.find_package(package_id))
+        self.assertEqual(list(facility.package_ids), package_ids)
+
+    def test_remove_package(self):
+        facility = Facility()
+        facility.plan(time_budget=0)
+        truck = facility.all_trucks[1]
+        package = max(truck.package_list.values(), key=lambda pending: pending.delivery_time_stamp)
+        at_time = truck.departure_time
+        changes = facility.apply_delta(PackageDelta.remove(package.package_id), at_time, 0)
+        self.assertEqual(changes[package.package_id][1], None)
+        self.assertNotIn(package.package_id, truck.package_list)
+        self.assertIsNone(facility.find_package(package.package_id))
+        self.assert_drivers_suffice(facility)
+
+
+if __name__ == "__main__":
+    unittest.main()
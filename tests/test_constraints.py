@@ -0,0 +1,27 @@
+from model.constraints import ConstraintParser
+from model.facility import Facility
+from model.package import Package
+import unittest
+
+
+class ConstraintsTest(unittest.TestCase):
+    """Checks that a truck restriction naming a truck that does not exist is reported with its package."""
+
+    def test_truck_past_the_fleet(self):
+        facility = Facility()
+        package = facility.all_packages.lookup(3)
+        package.note = "Can only be on truck 5"
+        with self.assertRaisesRegex(ValueError, "Package 3 can only be on truck 5"):
+            facility.preload()
+
+    def test_trucks_in_range(self):
+        package = Package(1, "195 W Oakland Ave", "Salt Lake City", 84115, Facility.DEFAULT_EOD, 2.0,
+                          "Can only be on truck 3")
+        constraints = ConstraintParser(Facility.ADDRESS_CORRECTION_TIME).parse_all([package])
+        constraints.check_trucks(3)
+        with self.assertRaises(ValueError):
+            constraints.check_trucks(2)
+
+
+if __name__ == "__main__":
+    unittest.main()
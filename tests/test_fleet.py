@@ -0,0 +1,82 @@
+from benchmarks.generators import write_distance_chart, write_manifest
+from model.facility import Facility
+from model.fleet import VehicleType
+from model.truck import Truck
+import datetime
+import os
+import tempfile
+import unittest
+
+
+class FleetTest(unittest.TestCase):
+    """Checks fleet plans: a vehicle never leaves on a wave before it is back from the previous one, and a package is
+    only late if it could not have been on time even driven straight from the hub when its wave left."""
+
+    FLEET_SPECS = ("3x16", "2x16", "4x10", "5x8")
+
+    def assert_fleet_plan(self, facility: Facility) -> None:
+        waves = {}
+        for truck in facility.all_trucks:
+            if len(truck.route) >= 3:
+                waves.setdefault(truck.vehicle_index, []).append(truck)
+            for package in truck.package_list.values():
+                if package.delivery_time_stamp <= package.deadline:
+                    continue
+                miles = facility.all_distances.distance(0, facility.all_distances.index_of(package.address))
+                straight = truck.departure_time + datetime.timedelta(hours=miles / Truck.MILES_PER_HOUR)
+                self.assertGreater(straight, package.deadline, f"package {package.package_id}")
+        for trucks in waves.values():
+            trucks.sort(key=lambda truck: truck.departure_time)
+            for previous, following in zip(trucks, trucks[1:]):
+                self.assertGreaterEqual(following.departure_time, previous.current_time)
+
+    def test_given_packages(self):
+        # With two or three 16 package trucks and one driver each, every package can be on time
+        for spec in ("2x16", "3x16"):
+            facility = Facility()
+            facility.plan_fleet([VehicleType.parse(spec)], time_budget=0)
+            self.assert_fleet_plan(facility)
+            late = [package.package_id for truck in facility.all_trucks for package in truck.package_list.values()
+                    if package.delivery_time_stamp > package.deadline]
+            self.assertEqual(late, [], spec)
+
+    def test_short_window(self):
+        # The most urgent packages cannot be out and back within the hour, but others can
+        for spec in ("10x16@08:00-09:00", "1x4/50@08:00-09:00"):
+            facility = Facility()
+            facility.plan_fleet([VehicleType.parse(spec)], time_budget=0)
+            self.assert_fleet_plan(facility)
+            driven = [truck for truck in facility.all_trucks if len(truck.route) >= 3]
+            self.assertGreater(len(driven), 0, spec)
+            for truck in driven:
+                self.assertLessEqual(truck.current_time, truck.current_time.replace(hour=9, minute=0), spec)
+
+    def test_ready_packages_first(self):
+        # A vehicle free at 8:00 takes packages ready at 8:00 rather than wait for those delayed until 9:05
+        facility = Facility()
+        facility.plan_fleet([VehicleType.parse("3x16@08:00-12:00")], time_budget=0)
+        self.assert_fleet_plan(facility)
+        self.assertEqual(len(facility.unassigned_packages), 0)
+        first_departures = {}
+        for truck in facility.all_trucks:
+            first_departures.setdefault(truck.vehicle_index, truck.departure_time)
+        self.assertEqual(len(first_departures), 3)
+        for departure_time in first_departures.values():
+            self.assertEqual(departure_time, Truck.DEPARTURE_TIME)
+
+    def test_random_packages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            chart = os.path.join(directory, "chart.csv")
+            manifest = os.path.join(directory, "manifest.csv")
+            for seed in range(6):
+                write_manifest(manifest, 80, write_distance_chart(chart, 60, seed), seed)
+                for spec in FleetTest.FLEET_SPECS:
+                    with self.subTest(seed=seed, fleet=spec):
+                        facility = Facility(manifest, chart, use_snapshot=False)
+                        facility.plan_fleet([VehicleType.parse(spec)], time_budget=0)
+                        self.assertEqual(len(facility.unassigned_packages), 0)
+                        self.assert_fleet_plan(facility)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+from dataStructures.hashtable import HashTable
+import pickle
+import random
+import unittest
+
+
+class HashTableTest(unittest.TestCase):
+    """Checks the open addressing HashTable against a dict under random inserts, replacements and removals."""
+
+    def assert_matches(self, table: HashTable, expected: dict) -> None:
+        self.assertEqual(len(table), len(expected))
+        self.assertEqual(table.item_count, len(expected))
+        self.assertEqual(dict(table.items()), expected)
+        self.assertEqual(sorted(table.get_keys()), sorted(expected))
+        self.assertEqual(sorted(table.get_values()), sorted(expected.values()))
+        for key, value in expected.items():
+            self.assertIn(key, table)
+            self.assertEqual(table.lookup(key), value)
+
+    def test_random_operations(self):
+        generator = random.Random(0)
+        table = HashTable()
+        expected = {}
+        for step in range(20000):
+            key = generator.randrange(500)
+            if generator.random() < 0.6:
+                table.insert(key, step)
+                expected[key] = step
+            else:
+                self.assertEqual(table.remove(key), expected.pop(key, None) is not None)
+            if step % 997 == 0:
+                self.assert_matches(table, expected)
+        self.assert_matches(table, expected)
+        for key in range(500, 600):
+            self.assertNotIn(key, table)
+            self.assertIsNone(table.lookup(key))
+
+    def test_tombstones_are_reused_without_growing(self):
+        # Removing and re-inserting keys at a steady size must neither lose keys nor fill every slot
+        table = HashTable(64)
+        for key in range(40):
+            table.insert(key, key)
+        capacity = table.probe_stats()["capacity"]
+        for round_number in range(200):
+            for key in range(40):
+                table.remove(key)
+                table.insert(key + 1000 * round_number, key)
+            for key in range(40):
+                table.remove(key + 1000 * round_number)
+                table.insert(key, key)
+        self.assert_matches(table, {key: key for key in range(40)})
+        self.assertLessEqual(table.probe_stats()["capacity"], capacity * 2)
+
+    def test_growth_from_small_table(self):
+        table = HashTable(1)
+        expected = {key * 7919: str(key) for key in range(5000)}
+        for key, value in expected.items():
+            table.insert(key, value)
+        self.assert_matches(table, expected)
+        self.assertLessEqual(table.probe_stats()["load"], table.load_factor)
+
+    def test_pickle_round_trip(self):
+        table = HashTable()
+        for key in range(100):
+            table.insert(key, key * key)
+        for key in range(0, 100, 3):
+            table.remove(key)
+        copy = pickle.loads(pickle.dumps(table))
+        self.assert_matches(copy, dict(table.items()))
+
+
+if __name__ == "__main__":
+    unittest.main()
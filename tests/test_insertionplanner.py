@@ -0,0 +1,40 @@
+from model.facility import Facility
+from model.insertionplanner import InsertionPlanner
+import unittest
+
+
+class InsertionPlannerTest(unittest.TestCase):
+    """Checks that a package no truck can deliver on time is still delivered, late, without making any other package
+    late."""
+
+    def test_hopeless_deadline_is_delivered_late(self):
+        facility = Facility()
+        package = next(pending for pending in facility.unassigned_packages if pending.package_id == 1)
+        package.deadline = package.deadline.replace(hour=8, minute=1)
+        facility.plan(time_budget=0)
+        self.assertEqual(len(facility.unassigned_packages), 0)
+        self.assertIsNotNone(facility.package_truck(1))
+        late = [delivered.package_id for truck in facility.all_trucks for delivered in truck.package_list.values()
+                if delivered.delivery_time_stamp > delivered.deadline]
+        self.assertEqual(late, [1])
+
+    def test_insert_late(self):
+        facility = Facility()
+        planner = InsertionPlanner(facility.all_distances, facility.neighbor_index)
+        units = planner.units(facility.unassigned_packages, facility.package_constraints())
+        hopeless = next(unit for unit in units if unit.packages[0].package_id == 1)
+        hopeless.deadlines = [0.0]
+        truck = facility.all_trucks[0]
+        routes = [planner.start(truck, 0, truck.departure_time)]
+        on_time = [unit for unit in units
+                   if unit is not hopeless and unit.truck_index is None and unit.available == 0.0][:10]
+        self.assertEqual(planner.insert(on_time, routes), [])
+        self.assertEqual(planner.insert([hopeless], routes), [hopeless])
+        self.assertEqual(planner.insert_late([hopeless], routes), [])
+        route = routes[0]
+        self.assertIn(hopeless.packages[0], route.packages)
+        self.assertGreaterEqual(min(route.slack), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
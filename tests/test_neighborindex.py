@@ -0,0 +1,29 @@
+from dataStructures.distancematrix import DistanceMatrix
+from dataStructures.neighborindex import NeighborIndex
+from array import array
+import math
+import random
+import unittest
+
+
+class NeighborIndexTest(unittest.TestCase):
+    """Checks the neighbor lists against a full sort of each row, with ties and blank (NaN) distances."""
+
+    def test_matches_full_sort(self):
+        rng = random.Random(3)
+        size = 120
+        values = array('f', (float(rng.randint(0, 20)) for _ in range(size * size)))
+        for _ in range(size * 3):
+            values[rng.randrange(size * size)] = math.nan
+        matrix = DistanceMatrix([str(index) for index in range(size)], values)
+        for neighbor_count in (1, 8, NeighborIndex.DEFAULT_NEIGHBOR_COUNT, size):
+            index = NeighborIndex(matrix, neighbor_count)
+            for location in range(size):
+                row = matrix.row(location)
+                expected = sorted((other for other in range(size) if not math.isnan(row[other])),
+                                  key=row.__getitem__)[:neighbor_count]
+                self.assertEqual(list(index.neighbors(location)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
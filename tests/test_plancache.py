@@ -0,0 +1,40 @@
+from model.facility import Facility
+from model.packagedelta import PackageDelta
+from model.plancache import PlanCache
+from model.routeplan import RoutePlan
+import tempfile
+import unittest
+
+
+class PlanCacheTest(unittest.TestCase):
+    """Checks that a plan restored from the cache is the plan that was stored, down to the drivers it was made with, so a
+    late change applied after a restore holds trucks back exactly as it would on the freshly planned facility."""
+
+    def change_pending_deadline(self, facility: Facility) -> [(int, int)]:
+        first_truck = facility.all_trucks[0]
+        at_time = first_truck.departure_time.replace(hour=8, minute=30)
+        package = max((pending for pending in first_truck.package_list.values()
+                       if pending.delivery_time_stamp > at_time), key=lambda pending: pending.deadline)
+        facility.apply_delta(PackageDelta.change_deadline(package.package_id, at_time.replace(hour=17)), at_time, 0)
+        return [(truck.departure_time, truck.current_time) for truck in facility.all_trucks]
+
+    def test_delta_after_restore(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = PlanCache(directory)
+            facility = Facility()
+            key = PlanCache.key(facility, {"time_budget": 0})
+            self.assertIsNone(cache.restore(key, facility))
+            facility.plan(time_budget=0)
+            cache.store(key, RoutePlan.from_facility(facility), facility)
+            restored_facility = Facility()
+            plan = cache.restore(key, restored_facility)
+            self.assertIsNotNone(plan)
+            self.assertEqual(plan.driver_count, Facility.DRIVER_COUNT)
+            self.assertEqual(restored_facility.driver_count, Facility.DRIVER_COUNT)
+            self.assertEqual([truck.miles_traveled for truck in restored_facility.all_trucks],
+                             [truck.miles_traveled for truck in facility.all_trucks])
+            self.assertEqual(self.change_pending_deadline(restored_facility), self.change_pending_deadline(facility))
+
+
+if __name__ == "__main__":
+    unittest.main()
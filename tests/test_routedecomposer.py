@@ -0,0 +1,40 @@
+from benchmarks.generators import random_distance_matrix
+from dataStructures.neighborindex import NeighborIndex
+from model.routedecomposer import RouteDecomposer
+from model.routeimprover import RouteImprover
+import unittest
+
+
+class RouteDecomposerTest(unittest.TestCase):
+    """Checks that improving a long route cluster by cluster keeps its stops and never makes it longer, even when the
+    route is already shorter than what regrouping it into clusters gives."""
+
+    STOPS = RouteDecomposer.MIN_STOPS
+
+    def nearest_neighbor_route(self, index: NeighborIndex) -> [int]:
+        tour = index.tour(range(1, RouteDecomposerTest.STOPS + 1))
+        route = [0]
+        while len(tour) > 0:
+            route.append(tour.nearest(route[-1]))
+            tour.remove(route[-1])
+        route.append(0)
+        return route
+
+    def assert_not_longer(self, decomposer: RouteDecomposer, route: [int]) -> None:
+        improved = decomposer.improve(route, None, 0.5)
+        self.assertEqual(sorted(improved), sorted(route))
+        self.assertEqual((improved[0], improved[-1]), (route[0], route[-1]))
+        improver = RouteImprover(decomposer.distances)
+        self.assertLessEqual(improver.route_length(improved), improver.route_length(route))
+
+    def test_never_longer(self):
+        matrix = random_distance_matrix(RouteDecomposerTest.STOPS + 1, seed=RouteDecomposerTest.STOPS)
+        decomposer = RouteDecomposer(matrix, 1)
+        route = self.nearest_neighbor_route(NeighborIndex(matrix))
+        self.assert_not_longer(decomposer, route)
+        # A route already improved as a whole is shorter than the clustered route
+        self.assert_not_longer(decomposer, RouteImprover(matrix).improve(route, None, 2.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+from model.facility import Facility
+from model.routeimprover import RouteImprover
+import random
+import unittest
+
+
+class RouteImproverTest(unittest.TestCase):
+    """Checks improved routes against the routes they came from: the same stops with the same first and last entries,
+    never longer, and no stop later than both its deadline and its arrival on the original route."""
+
+    def arrivals(self, improver: RouteImprover, route: [int]) -> {int: float}:
+        arrivals = {}
+        miles = 0.0
+        for position in range(1, len(route) - 1):
+            miles += improver.distances.distance(route[position - 1], route[position])
+            arrivals[route[position]] = miles
+        return arrivals
+
+    def assert_improved(self, improver: RouteImprover, route: [int], deadlines: {int: float}) -> None:
+        improved = improver.improve(route, deadlines, time_budget=1.0)
+        self.assertEqual((improved[0], improved[-1]), (route[0], route[-1]))
+        self.assertEqual(sorted(improved), sorted(route))
+        self.assertLessEqual(improver.route_length(improved), improver.route_length(route) + 1e-6)
+        before = self.arrivals(improver, route)
+        after = self.arrivals(improver, improved)
+        for stop, deadline in deadlines.items():
+            self.assertLessEqual(after[stop], max(deadline, before[stop]) + 1e-6, f"stop {stop}")
+
+    def test_random_routes(self):
+        improver = RouteImprover(Facility().all_distances)
+        rng = random.Random(7)
+        addresses = list(range(1, improver.distances.size))
+        for _ in range(200):
+            stops = rng.sample(addresses, rng.randint(3, len(addresses)))
+            # Half the routes belong to a truck already on the road, headed to its first stop
+            route = stops + [0] if rng.random() < 0.5 else [0] + stops + [0]
+            arrivals = self.arrivals(improver, route)
+            # Some deadlines are met on the original route and some are missed
+            deadlines = {stop: arrivals[stop] * rng.uniform(0.5, 1.5) for stop in rng.sample(stops, len(stops) // 3)
+                         if stop in arrivals}
+            self.assert_improved(improver, route, deadlines)
+
+    def test_no_deadlines(self):
+        improver = RouteImprover(Facility().all_distances)
+        route = [0] + list(range(1, improver.distances.size)) + [0]
+        improved = improver.improve(route, time_budget=1.0)
+        self.assertLess(improver.route_length(improved), improver.route_length(route))
+        self.assertEqual(sorted(improved), sorted(route))
+
+
+if __name__ == "__main__":
+    unittest.main()
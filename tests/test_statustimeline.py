@@ -0,0 +1,66 @@
+from model.facility import Facility
+from model.statustimeline import StatusTimeline
+import datetime
+import math
+import unittest
+
+
+class StatusTimelineTest(unittest.TestCase):
+    """Checks that the status of every package at once agrees with the status of each package on its own."""
+
+    def assert_agree(self, facility: Facility) -> None:
+        timeline = StatusTimeline(facility.all_trucks)
+        midnight = Facility.DEFAULT_EOD.replace(hour=0, minute=0, second=0, microsecond=0)
+        # Every minute of the day, plus each departure and delivery instant and the seconds either side of it
+        times = [midnight + datetime.timedelta(minutes=minute) for minute in range(24 * 60)]
+        for seconds in (set(timeline.departure_seconds) | set(timeline.delivery_seconds)) - {math.inf}:
+            for offset in (-1, 0, 1):
+                times.append(midnight + datetime.timedelta(seconds=seconds + offset))
+        for at_time in times:
+            statuses = timeline.statuses(at_time)
+            for package_id in timeline.package_ids:
+                self.assertEqual(statuses[package_id], timeline.status(package_id, at_time),
+                                 f"package {package_id} at {at_time.time()}")
+
+    def test_planned_day(self):
+        facility = Facility()
+        facility.plan(time_budget=0)
+        self.assert_agree(facility)
+
+    def test_truck_not_driven(self):
+        # Loaded packages keep their default midnight delivery stamp until their truck is driven
+        facility = Facility()
+        truck = facility.all_trucks[0]
+        for package in list(facility.unassigned_packages)[:5]:
+            facility.assign_package(truck, package)
+        self.assert_agree(facility)
+        timeline = StatusTimeline(facility.all_trucks)
+        noon = Facility.DEFAULT_EOD.replace(hour=12, minute=0)
+        self.assertEqual(set(timeline.statuses(noon).values()), {StatusTimeline.EN_ROUTE})
+        self.assertEqual(set(timeline.statuses(noon.replace(hour=7)).values()), {StatusTimeline.AT_HUB})
+
+    def test_delivery_after_midnight(self):
+        # A truck that leaves late in the evening delivers its packages after midnight, on the next day
+        facility = Facility()
+        facility.plan(time_budget=0)
+        truck = facility.all_trucks[-1]
+        evening = Facility.DEFAULT_EOD.replace(hour=23, minute=30)
+        next_morning = evening + datetime.timedelta(hours=1)
+        truck.departure_time = evening
+        for package in truck.package_list.values():
+            package.delivery_time_stamp = next_morning
+        self.assert_agree(facility)
+        timeline = StatusTimeline(facility.all_trucks)
+        package_ids = {package.package_id for package in truck.package_list.values()}
+        for at_time, expected in ((evening.replace(hour=23, minute=0), StatusTimeline.AT_HUB),
+                                  (evening + datetime.timedelta(minutes=15), StatusTimeline.EN_ROUTE),
+                                  (next_morning, StatusTimeline.DELIVERED),
+                                  (next_morning + datetime.timedelta(hours=8), StatusTimeline.DELIVERED)):
+            statuses = timeline.statuses(at_time)
+            for package_id in package_ids:
+                self.assertEqual(statuses[package_id], expected, f"package {package_id} at {at_time}")
+                self.assertEqual(timeline.status(package_id, at_time), expected, f"package {package_id} at {at_time}")
+
+
+if __name__ == "__main__":
+    unittest.main()
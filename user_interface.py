@@ -1,5 +1,7 @@
 from model.facility import Facility
 from model.package import Package
+from model.statustimeline import StatusTimeline
+from report_renderer import ReportRenderer
 import datetime
 
 
@@ -11,7 +13,7 @@ class UserInterface:
             The list of acceptable commands.
 
     **Methods**
-        *menu* (facility (Facility)) -> (None):
+        *menu* (facility (Facility), page_size (int, optional)) -> (None):
             - TIME: O(f(x))= n
             - SPACE: O(f(x))=
         *print_ui* (None) -> (None):
@@ -29,13 +31,7 @@ class UserInterface:
         *display_package_data* (display_package (Package or None)) -> (bool):
             - TIME: O(f(x))= 1
             - SPACE: O(f(x))=
-        *display_package_data_condensed* (display_package (Package or None)) -> (bool):
-            - TIME: O(f(x))= 1
-            - SPACE: O(f(x))=
-        *display_package_status* (display_package (Package or None), specified_time (datetime), left_hub (bool)) -> (bool):
-            - TIME: O(f(x))= 1
-            - SPACE: O(f(x))=
-        *display_package_status_condensed* (display_package (Package or None), specified_time (datetime), left_hub (bool)) -> (bool):
+        *display_package_status* (display_package (Package or None), package_status (str)) -> (bool):
             - TIME: O(f(x))= 1
             - SPACE: O(f(x))=
     """
@@ -43,7 +39,7 @@ class UserInterface:
     MAIN_UI_COMMAND_LIST = ['l', 's', 'd', 'a', 'i', 'm', 'q', '']
 
     @staticmethod
-    def menu(facility: Facility) -> None:
+    def menu(facility: Facility, page_size: int = None) -> None:
         """*menu*
             Displays and manages user input to display package and truck information
 
@@ -52,8 +48,10 @@ class UserInterface:
             SPACE: O(f(x))=
 
         :param facility: (Facility) The facility from which all data is pulled
+        :param page_size: (int, optional) The number of lines per page of the all package reports; unpaged if None
         :return: (None)
         """
+        renderer = ReportRenderer(UserInterface.datetime_to_string)
         command = ""
         while command != 'q':
             UserInterface.print_ui()
@@ -70,11 +68,9 @@ class UserInterface:
                     else:
                         package_id = int(command)
                         found_package = None
-                        for truck in facility.all_trucks:
-                            if truck.package_list.lookup(package_id) is not None:
-                                found_package = truck.package_list.lookup(package_id)
-                                command = ''
-                                break
+                        if facility.package_truck(package_id) is not None:
+                            found_package = facility.find_package(package_id)[0]
+                            command = ''
                         print("\n\n")
                         if not UserInterface.display_package_data(found_package):
                             command = input("INVALID PACKAGE ID.\n"
@@ -99,35 +95,20 @@ class UserInterface:
                             else:
                                 package_id = int(command)
                                 found_package = None
-                                has_left_hub = False
-                                for truck in facility.all_trucks:
-                                    if truck.package_list.lookup(package_id) is not None:
-                                        found_package = truck.package_list.lookup(package_id)
-                                        if truck.departure_time < parsed_time:
-                                            has_left_hub = True
-                                        command = ''
-                                        break
-                                if not UserInterface.display_package_status(found_package, parsed_time, has_left_hub):
+                                package_status = facility.status_timeline().status(package_id, parsed_time)
+                                if package_status is not None:
+                                    found_package = facility.find_package(package_id)[0]
+                                    command = ''
+                                if not UserInterface.display_package_status(found_package, package_status):
                                     command = input("\nINVALID PACKAGE ID.\n"
                                                     "Please enter a valid package ID,"
                                                     "or enter 'M' to return to the (M)ain menu -> ").lower()
                 print("\n\n\n\n\n\n\n\n")
 
             elif command == UserInterface.MAIN_UI_COMMAND_LIST[2]:
-                sorted_package_list = [None] * 41
-                for truck in facility.all_trucks:
-                    for truck_package in truck.package_list.get_values():
-                        sorted_package_list[truck_package.package_id] = truck_package
-                print(
-                    f"===================================================================================================================\n"
-                    f"||                                              Package Information                                              ||\n"
-                    f"===================================================================================================================")
-                print(
-                    " ID | ADDRESS                                | CITY             |ZIPCODE| DEADLINE   | KG    | NOTE")
-                print(
-                    "----|----------------------------------------|------------------|-------|------------|-------|---------------------")
-                for sorted_package in sorted_package_list:
-                    UserInterface.display_package_data_condensed(sorted_package)
+                loaded_packages = [entry[0] for entry in map(facility.find_package, facility.package_ids)
+                                   if entry[1] is not None]
+                ReportRenderer.emit(renderer.package_report(loaded_packages), page_size=page_size)
                 input("\n\nPress enter to continue.")
                 command = 'm'
                 print("\n\n\n\n\n\n\n\n")
@@ -140,23 +121,9 @@ class UserInterface:
                             "\nPlease enter a specific time in the following format: HH:mm AM/PM -> ").lower()
                         parsed_time = UserInterface.string_to_datetime(command)
                     else:
-                        truck_count = 0
-                        for truck in facility.all_trucks:
-                            sorted_package_list = [None] * 41
-                            truck_count += 1
-                            has_left_hub = False
-                            if truck.departure_time < parsed_time:
-                                has_left_hub = True
-                            print(f"\n====================================================\n"
-                                  f"||         Package Status Data: Truck #{truck_count}          ||\n"
-                                  f"====================================================")
-                            print("ID | DEADLINE   | STATUS     | DELIVERY TIME\n"
-                                  "---|------------|------------|----------------------")
-                            for truck_package in truck.package_list.get_values():
-                                sorted_package_list[truck_package.package_id] = truck_package
-                            for current_package in sorted_package_list:
-                                UserInterface.display_package_status_condensed(current_package, parsed_time, has_left_hub)
-
+                        ReportRenderer.emit(renderer.status_report(facility.truck_packages(),
+                                                                   facility.status_timeline().statuses(parsed_time)),
+                                            page_size=page_size)
                         input("\n\nPress enter to continue.")
                         command = 'm'
                         break
@@ -300,97 +267,27 @@ class UserInterface:
             return True
 
     @staticmethod
-    def display_package_data_condensed(display_package: Package or None) -> bool:
-        """*display_package_data_condensed*
-            Prints a package's details to the console in a condensed format.
-
-            TIME: O(f(x))= 1
-
-            SPACE: O(f(x))=
-
-        :param display_package: (Package) The package to be displayed
-        :return: (bool) False if the input is None, otherwise true.
-        """
-        if display_package is None:
-            return False
-        else:
-            time = UserInterface.datetime_to_string(display_package.deadline)
-            print('{0:{width}}'.format(display_package.package_id, width=3), end=' | ')
-            print('{0:{width}}'.format(display_package.address, width=38), end=' | ')
-            print('{0:{width}}'.format(display_package.city, width=16), end=' | ')
-            print('{0:{width}}'.format(display_package.zipcode, width=5), end=' | ')
-            print('{0:{width}}'.format(time, width=10), end=' | ')
-            print('{0:{width}}'.format(display_package.weight, width=5), end=' | ')
-            print(display_package.note)
-            return True
-
-    @staticmethod
-    def display_package_status(display_package: Package or None, specified_time: datetime, left_hub: bool) -> bool:
+    def display_package_status(display_package: Package or None, package_status: str) -> bool:
         """*display_package_status*
-            Prints a package's status to the console based on the time of day and whether or not the truck has left
-            the hub yet.
+            Prints a package's status to the console, as found by the facility's status timeline.
 
             TIME: O(f(x))= 1
 
             SPACE: O(f(x))=
 
         :param display_package: (Package) The package to be displayed
-        :param specified_time: (datetime) The specific time to check the status for
-        :param left_hub: (bool) Whether or not the truck has left the hub
+        :param package_status: (str) The package's status at the specified time
         :return: (bool) False if the input is None, otherwise true.
         """
         if display_package is None:
             return False
         else:
             delivery_time = "Package not delivered"
-            package_status = "At the Hub"
-            if left_hub:
-                if specified_time < display_package.delivery_time_stamp:
-                    package_status = "En Route"
-                else:
-                    package_status = "Delivered"
-                    delivery_time = UserInterface.datetime_to_string(display_package.delivery_time_stamp)
+            if package_status == StatusTimeline.DELIVERED:
+                delivery_time = UserInterface.datetime_to_string(display_package.delivery_time_stamp)
             print(f"\n\nPackage ID: {display_package.package_id}\n"
                   f"Deadline: {UserInterface.datetime_to_string(display_package.deadline)}\n"
                   f"Status: {package_status}\n"
                   f"Delivery Time: {delivery_time}"
                   )
             return True
-
-    @staticmethod
-    def display_package_status_condensed(display_package: Package or None, specified_time: datetime, left_hub: bool) -> bool:
-        """*display_package_status_condensed*
-            Prints a package's status to the console in a condensed format based on the time of day and whether or not
-            the truck has left the hub yet.
-
-            TIME: O(f(x))= 1
-
-            SPACE: O(f(x))=
-
-        :param display_package: (Package) The package to be displayed
-        :param specified_time: (datetime) The specific time to check the status for
-        :param left_hub: (bool) Whether or not the truck has left the hub
-        :return: (bool) False if the input is None, otherwise true.
-        """
-        if display_package is None:
-            return False
-        else:
-            delivery_time = "Package not delivered"
-            package_status = "At the Hub"
-            if left_hub:
-                if specified_time < display_package.delivery_time_stamp:
-                    package_status = "En Route"
-                else:
-                    package_status = "Delivered"
-                    delivery_time = UserInterface.datetime_to_string(display_package.delivery_time_stamp)
-            if UserInterface.datetime_to_string(display_package.deadline) == "E.O.D":
-                print('{0:{width}}'.format(display_package.package_id, width=4), end=' | ')
-                print('{0:{width}}'.format(UserInterface.datetime_to_string(display_package.deadline), width=10), end=' | ')
-                print('{0:{width}}'.format(package_status, width=10), end=' | ')
-                print(delivery_time)
-            else:
-                print('{0:{width}}'.format(display_package.package_id, width=2), end=' | ')
-                print('{0:{width}}'.format(UserInterface.datetime_to_string(display_package.deadline), width=10), end=' | ')
-                print('{0:{width}}'.format(package_status, width=10), end=' | ')
-                print(delivery_time)
-            return True